@@ -1,25 +1,92 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import AsyncIterator, Iterator
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.auth import decode_access_token
-from app.core.permissions import Permission, has_permission
-from app.db import SessionLocal
+from app.core.auth import decode_access_token, evict_access_token
+from app.core.config import get_settings
+from app.core.permissions import Permission, allowed_roles
+from app.core.response_cache import RedisResponseCache
+from app.core.token_cache import RedisTokenCache
+from app.db import AsyncSessionLocal, SessionLocal
 from app.models.financial import User, UserRole
 from app.repositories.import_jobs import ImportJobRepository
 from app.repositories.expense_forecast import ExpenseForecastRepository
 from app.services.ai_parser import AIParserService
 from app.services.llm_client import LLMClient
-from app.services.financial_overview import FinancialOverviewService
 from app.services.nlq_service import NLQService
 from app.services.storage_adapter import StorageAdapter, StorageFactory
 
 security = HTTPBearer()
 
+# 认证热路径缓存：用户快照，短 TTL 以限制角色/状态变更的延迟（令牌验签结果由 decode_access_token 缓存）
+_user_cache: TTLCache[str, "CurrentUser"] = TTLCache(maxsize=5000, ttl=60)
+# 进程外共享缓存：多个工作进程之间复用用户快照，进程内缓存未命中时先查 Redis 再查数据库
+_redis_token_cache = RedisTokenCache(get_settings().redis_url)
+# 看板汇总接口的响应缓存，数据变更（导入确认、清空、预测增删改）后整体失效
+_financial_response_cache = RedisResponseCache(get_settings().redis_url)
+FINANCIAL_CACHE_NAMESPACE = "financial"
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """已认证用户的只读快照，脱离 ORM 会话，可安全跨请求缓存。"""
+
+    id: str
+    email: str
+    display_name: str
+    role: UserRole
+    is_active: bool
+
+
+async def invalidate_cached_token(token: str) -> None:
+    """使指定令牌的缓存失效（例如登出时）。"""
+    evict_access_token(token)
+    await _redis_token_cache.invalidate_token(token)
+
+
+async def invalidate_cached_user(user_id: str) -> None:
+    """使指定用户的缓存快照失效（例如角色或状态变更时）。"""
+    _user_cache.pop(user_id, None)
+    await _redis_token_cache.invalidate_user(user_id)
+
+
+def get_financial_response_cache() -> RedisResponseCache:
+    return _financial_response_cache
+
+
+async def invalidate_financial_cache() -> None:
+    """使看板汇总的响应缓存失效。"""
+    await _financial_response_cache.invalidate(FINANCIAL_CACHE_NAMESPACE)
+
+
+async def _load_current_user(user_id: str) -> CurrentUser | None:
+    # 只查询权限校验与响应需要的列，不构造完整 ORM 实体
+    async with AsyncSessionLocal() as session:
+        row = (
+            await session.execute(
+                select(User.id, User.email, User.display_name, User.role, User.is_active)
+                .where(User.id == user_id)
+            )
+        ).one_or_none()
+    if row is None:
+        return None
+    return CurrentUser(
+        id=row.id,
+        email=row.email,
+        display_name=row.display_name,
+        role=row.role,
+        is_active=row.is_active,
+    )
+
 
 def get_db_session() -> Iterator[Session]:
     session = SessionLocal()
@@ -29,10 +96,15 @@ def get_db_session() -> Iterator[Session]:
         session.close()
 
 
+async def get_async_db_session() -> AsyncIterator[AsyncSession]:
+    """异步会话依赖，数据库 I/O 不占用线程池。"""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_db_session),
-) -> User:
+) -> CurrentUser:
     """验证JWT并返回当前用户"""
     token = credentials.credentials
     try:
@@ -43,14 +115,32 @@ async def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token payload"
             )
-        
-        user = session.query(User).filter(User.id == user_id).first()
-        if not user or not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="User not found or inactive"
-            )
-        return user
+
+        current_user = _user_cache.get(user_id)
+        if current_user is None:
+            cached = await _redis_token_cache.get(token)
+            if cached is not None and cached.get("id") == user_id:
+                current_user = CurrentUser(**{**cached, "role": UserRole(cached["role"])})
+            else:
+                current_user = await _load_current_user(user_id)
+                if current_user is None or not current_user.is_active:
+                    raise HTTPException(
+                        status_code=status.HTTP_401_UNAUTHORIZED,
+                        detail="User not found or inactive"
+                    )
+                await _redis_token_cache.set(
+                    token,
+                    {
+                        "id": current_user.id,
+                        "email": current_user.email,
+                        "display_name": current_user.display_name,
+                        "role": current_user.role.value,
+                        "is_active": current_user.is_active,
+                    },
+                    expires_at=payload.get("exp"),
+                )
+            _user_cache[user_id] = current_user
+        return current_user
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,12 +148,19 @@ async def get_current_user(
         )
 
 
+@lru_cache(maxsize=32)
 def require_permission(permission: Permission):
-    """权限检查装饰器工厂"""
-    def check_permission(
-        user: User = Depends(get_current_user),
-    ) -> User:
-        if not has_permission(user.role, permission):
+    """权限检查装饰器工厂（相同权限复用同一依赖对象，便于 FastAPI 在请求内去重）
+
+    用户快照由 get_current_user 解析，FastAPI 在同一请求内只执行一次；此处仅做一次 frozenset 成员判断。
+    """
+    roles = allowed_roles(permission)
+
+    # 纯内存判断，定义为协程以在事件循环中直接执行，避免同步依赖每次请求都切换到线程池
+    async def check_permission(
+        user: CurrentUser = Depends(get_current_user),
+    ) -> CurrentUser:
+        if user.role not in roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied: {permission}"
@@ -72,11 +169,12 @@ def require_permission(permission: Permission):
     return check_permission
 
 
+@lru_cache(maxsize=32)
 def require_role(role: UserRole):
-    """角色检查装饰器工厂"""
-    def check_role(
-        user: User = Depends(get_current_user),
-    ) -> User:
+    """角色检查装饰器工厂（相同角色复用同一依赖对象）"""
+    async def check_role(
+        user: CurrentUser = Depends(get_current_user),
+    ) -> CurrentUser:
         if user.role != role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -106,7 +204,3 @@ def get_import_job_repository(session: Session = Depends(get_db_session)) -> Imp
 def get_nlq_service(session: Session = Depends(get_db_session)) -> NLQService:
     return NLQService(session)
 
-
-def get_financial_overview_service(session: Session = Depends(get_db_session)) -> FinancialOverviewService:
-    return FinancialOverviewService(session)
-
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Sequence
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+
+def weak_etag(*parts: object) -> str:
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode("utf-8"), digest_size=8).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """If-None-Match 命中时返回 304 响应，供轮询接口跳过响应体构造。"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def serialize_json(content: BaseModel | Sequence[BaseModel]) -> bytes:
+    """按响应模型的别名直接序列化为 JSON 字节（pydantic-core 实现，不经过中间 dict）。"""
+    if isinstance(content, BaseModel):
+        return content.__pydantic_serializer__.to_json(content, by_alias=True)
+    return b"[" + b",".join(item.__pydantic_serializer__.to_json(item, by_alias=True) for item in content) + b"]"
+
+
+def private_json_response(
+    request: Request,
+    body: bytes,
+    *,
+    user_id: str | None,
+    max_age: int,
+    stale_while_revalidate: int | None = None,
+) -> Response:
+    """按用户与内容计算 ETag，并附带仅限浏览器私有缓存的缓存头。
+
+    ETag 包含用户 ID，避免不同用户之间复用缓存的响应。
+    """
+    etag = weak_etag(user_id, hashlib.blake2b(body, digest_size=16).hexdigest())
+    cache_control = f"private, max-age={max_age}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Origin, Authorization"}
+
+    if not_modified(request, etag) is not None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
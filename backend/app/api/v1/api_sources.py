@@ -1,23 +1,46 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import re
+import uuid
 from datetime import date, datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import pandas as pd
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
+from sqlalchemy import insert, text
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db_session, get_import_job_repository, require_permission
-from app.core.config import get_settings
+from app.api.deps import CurrentUser, get_db_session, invalidate_financial_cache, require_permission
+from app.core.config import Settings, get_settings
 from app.core.permissions import Permission
-from app.models.financial import Certainty, Company, ImportSource, ImportStatus, IncomeForecast, User
+from app.db import session_scope
+from app.models.financial import (
+    CategoryType,
+    Certainty,
+    Company,
+    ImportJob,
+    ImportSource,
+    ImportStatus,
+    IncomeForecast,
+)
 from app.repositories.import_jobs import ImportJobRepository
 from app.schemas.imports import CandidateRecord, ParseJobResponse
-from app.services.api_source import ApiSourceConfig, SqlServerDataSource
+from app.services.api_source import (
+    ApiSourceConfig,
+    SqlServerDataSource,
+    get_cached_api_source_config,
+    get_shared_sqlserver_source,
+    record_source_run,
+)
 from app.services.category_service import FinanceCategoryService
 
 router = APIRouter(prefix="/api/v1", tags=["api-sources"])
+logger = logging.getLogger(__name__)
 
 # SQL Server 查询语句（应付管理人报酬）
 SQLSERVER_EXPENSE_QUERY = """
@@ -47,6 +70,64 @@ WHERE b.FlareAssetCode IN(2241,220601,220602,221001,221002) --应付管理人报
 AND A.Name NOT LIKE '%应付委托人申购款%'
 ORDER  BY A.PMID,A.Date DESC
 """
+# 模块加载时构造一次语句对象，每次触发复用同一语句（及引擎的编译缓存）
+SQLSERVER_EXPENSE_STATEMENT = text(SQLSERVER_EXPENSE_QUERY)
+
+
+# 限制并发的 SQL Server 同步查询数量，避免多个触发同时执行这条重查询
+_sqlserver_trigger_semaphore = asyncio.Semaphore(1)
+
+# 分类层级字段，按层级顺序拼接分类路径
+_LEVEL_KEYS = ('categoryLevel1', 'categoryLevel2', 'categoryLevel3', 'categoryLevel4')
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+
+def _parse_date_fallback(value: str) -> date:
+    """非 ISO 前缀的日期字符串，依次尝试多种格式。"""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    except ValueError:
+        try:
+            return datetime.strptime(value.split()[0], '%Y-%m-%d').date()
+        except (ValueError, IndexError):
+            return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _create_api_sync_job(user: CurrentUser) -> ImportJob:
+    """创建 API 同步导入任务（短事务，SQL Server 查询期间不占用数据库连接）"""
+    with session_scope() as session:
+        return ImportJobRepository(session).create_job(
+            source_type=ImportSource.API_SYNC,
+            user_id=user.id,
+            initiator_id=user.id,
+            initiator_role=user.role.value,
+        )
+
+
+def _save_sqlserver_preview(
+    job_id: str, df: pd.DataFrame, records: List[CandidateRecord]
+) -> tuple[ImportJob, List[Dict[str, Any]]]:
+    """保存预览，并把查询结果转换为可 JSON 序列化的行字典；返回任务与原始数据"""
+    # 将日期列原地格式化，确保原始数据可以JSON序列化
+    datetime_columns = df.select_dtypes(include=["datetime", "datetimetz"]).columns
+    if len(datetime_columns):
+        df[datetime_columns] = df[datetime_columns].apply(lambda column: column.dt.strftime('%Y-%m-%d'))
+    # 列名只取一次，逐行 zip 成字典，避免 to_dict('records') 的逐单元格转换开销（前端按行对象读取）
+    columns = df.columns.tolist()
+    raw_data = [dict(zip(columns, row)) for row in df.itertuples(index=False, name=None)]
+
+    with session_scope() as session:
+        repo = ImportJobRepository(session)
+        job = repo.get_job(job_id)
+        repo.save_preview(job, records)
+    return job, raw_data
+
+
+def _mark_job_failed(job_id: str) -> None:
+    with session_scope() as session:
+        failed_job = session.get(ImportJob, job_id)
+        if failed_job is not None:
+            failed_job.status = ImportStatus.FAILED
 
 
 class ApiSourceResponse(BaseModel):
@@ -67,16 +148,21 @@ class ApiSourceTriggerResponse(BaseModel):
     rawResponse: Dict[str, Any] | None = None
 
 
+def get_sqlserver_source(settings: Settings = Depends(get_settings)) -> SqlServerDataSource | None:
+    """依赖项：返回进程内共享的 SQL Server 数据源（未配置时为 None）"""
+    return get_shared_sqlserver_source(settings)
+
+
 def get_api_source_config() -> ApiSourceConfig:
     """获取 API 数据源配置"""
-    return ApiSourceConfig.load()
+    return get_cached_api_source_config()
 
 
 @router.get("/api-sources", response_model=List[ApiSourceResponse])
 def list_api_sources(
-    user: User = Depends(require_permission(Permission.DATA_VIEW)),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_VIEW)),
     config: ApiSourceConfig = Depends(get_api_source_config),
-) -> List[ApiSourceResponse]:
+) -> List[Dict[str, Any]]:
     """列举所有 API 数据源"""
     settings = get_settings()
     
@@ -84,11 +170,8 @@ def list_api_sources(
     sources = []
     if settings.sqlserver_host and settings.sqlserver_user and settings.sqlserver_password:
         # 从配置文件读取最后运行时间
-        last_run_at = None
-        for config_source in config.sources:
-            if config_source.get("id") == "sqlserver-expense-forecast":
-                last_run_at = config_source.get("lastRunAt")
-                break
+        config_source = config.by_id.get("sqlserver-expense-forecast")
+        last_run_at = config_source.get("lastRunAt") if config_source else None
         
         sources.append({
             "id": "sqlserver-expense-forecast",
@@ -104,15 +187,16 @@ def list_api_sources(
         if config_source.get("id") != "sqlserver-expense-forecast":
             sources.append(config_source)
     
+    # 直接返回字典，由 response_model 只校验一次，避免先构造模型再被 FastAPI 导出并重新校验
     return [
-        ApiSourceResponse(
-            id=source["id"],
-            name=source["name"],
-            apiType=source.get("apiType", "unknown"),
-            enabled=source.get("enabled", True),
-            lastRunAt=source.get("lastRunAt"),
-            schedule=source.get("schedule"),
-        )
+        {
+            "id": source["id"],
+            "name": source["name"],
+            "apiType": source.get("apiType", "unknown"),
+            "enabled": source.get("enabled", True),
+            "lastRunAt": source.get("lastRunAt"),
+            "schedule": source.get("schedule"),
+        }
         for source in sources
     ]
 
@@ -122,105 +206,67 @@ def list_api_sources(
     response_model=ApiSourceTriggerResponse,
     status_code=status.HTTP_202_ACCEPTED,
 )
-def trigger_api_source(
+async def trigger_api_source(
     source_id: str,
-    user: User = Depends(require_permission(Permission.DATA_IMPORT)),
-    repo: ImportJobRepository = Depends(get_import_job_repository),
-    config: ApiSourceConfig = Depends(get_api_source_config),
-) -> ApiSourceTriggerResponse:
-    """触发 API 数据源同步"""
-    settings = get_settings()
-    
+    user: CurrentUser = Depends(require_permission(Permission.DATA_IMPORT)),
+    settings: Settings = Depends(get_settings),
+    data_source: SqlServerDataSource | None = Depends(get_sqlserver_source),
+) -> Dict[str, Any]:
+    """触发 API 数据源同步
+
+    数据库、配置文件与 DataFrame 转换等阻塞操作都放到线程中执行，不阻塞事件循环。
+    """
     # 检查是否是 SQL Server 数据源
     if source_id == "sqlserver-expense-forecast":
-        if not settings.sqlserver_host or not settings.sqlserver_user or not settings.sqlserver_password:
+        if data_source is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="SQL Server 配置未完成，请在 .env 文件中配置 SQLSERVER_HOST, SQLSERVER_USER, SQLSERVER_PASSWORD"
             )
         
-        # 创建导入任务
-        job = repo.create_job(
-            source_type=ImportSource.API_SYNC,
-            user_id=user.id,
-            initiator_id=user.id,
-            initiator_role=user.role.value,
-        )
-        print(f"[API SOURCE] Created job {job.id} for SQL Server data source")
+        job = await asyncio.to_thread(_create_api_sync_job, user)
+        logger.info("[API SOURCE] Created job %s for SQL Server data source", job.id)
         
         try:
-            # 连接 SQL Server 并查询数据
-            data_source = SqlServerDataSource(
-                host=settings.sqlserver_host,
-                user=settings.sqlserver_user,
-                password=settings.sqlserver_password,
-                database=settings.sqlserver_database or "",
-                port=settings.sqlserver_port,
-            )
-            
-            # 先执行原始查询获取数据
-            df = data_source.execute_query(SQLSERVER_EXPENSE_QUERY)
-            print(f"[API SOURCE] Fetched {len(df)} rows from SQL Server")
-            
-            # 将DataFrame转换为字典列表，用于返回原始数据
-            # 处理日期字段，确保可以JSON序列化
-            import pandas as pd
-            df_copy = df.copy()
-            for col in df_copy.columns:
-                # 只处理日期相关的列，避免误处理其他字段（如资产编码）
-                if 'date' in col.lower() or 'Date' in col:
-                    if pd.api.types.is_datetime64_any_dtype(df_copy[col]):
-                        df_copy[col] = df_copy[col].dt.strftime('%Y-%m-%d')
-                    elif pd.api.types.is_object_dtype(df_copy[col]):
-                        # 尝试转换datetime对象
-                        try:
-                            df_copy[col] = pd.to_datetime(df_copy[col], errors='ignore').dt.strftime('%Y-%m-%d')
-                        except:
-                            pass
-            
-            raw_data = df_copy.to_dict(orient='records')
-            
-            # 转换为支出预测记录
-            records = data_source.fetch_expense_forecasts(SQLSERVER_EXPENSE_QUERY)
-            print(f"[API SOURCE] Converted {len(records)} records from SQL Server")
-            
-            # 保存预览
-            repo.save_preview(job, records)
-            repo.session.commit()
-            
-            # 更新配置中的最后运行时间
-            config = ApiSourceConfig.load()
-            for source in config.sources:
-                if source["id"] == source_id:
-                    source["lastRunAt"] = datetime.now().isoformat()
-                    break
-            else:
-                # 如果配置中没有，添加一个
-                config.sources.append({
-                    "id": source_id,
+            # 只查询一次，原始数据与预览记录都由同一结果集生成（阻塞的驱动调用放到线程中，避免阻塞事件循环）
+            # 同一时间只允许一个同步查询打到 SQL Server，并发的触发排队等待
+            async with _sqlserver_trigger_semaphore:
+                df = await asyncio.to_thread(data_source.execute_query, SQLSERVER_EXPENSE_STATEMENT)
+            logger.info("[API SOURCE] Fetched %d rows from SQL Server", len(df))
+
+            # 转换为支出预测记录（需在日期列被格式化为字符串之前进行）
+            records = await asyncio.to_thread(data_source.to_expense_forecasts, df)
+            logger.info("[API SOURCE] Converted %d records from SQL Server", len(records))
+
+            # 保存预览，并生成可JSON序列化的原始数据
+            job, raw_data = await asyncio.to_thread(_save_sqlserver_preview, job.id, df, records)
+
+            # 更新配置中的最后运行时间（配置中没有该数据源时添加一个）
+            await asyncio.to_thread(
+                record_source_run,
+                source_id,
+                {
                     "name": "SQL Server - 应付管理人报酬",
                     "apiType": "sqlserver",
                     "enabled": True,
-                    "lastRunAt": datetime.now().isoformat(),
                     "schedule": None,
-                })
-            config.save()
+                },
+            )
             
-            return ApiSourceTriggerResponse(
-                jobId=job.id,
-                status=job.status.value,
-                preview=records,
-                rawResponse={
+            # 返回字典而非模型实例，原始数据只经过 response_model 一次校验
+            return {
+                "jobId": job.id,
+                "status": job.status.value,
+                "preview": records,
+                "rawResponse": {
                     "source": "sqlserver",
                     "records_count": len(records),
                     "raw_data": raw_data,  # 添加原始查询结果
                 },
-            )
+            }
         except Exception as e:
-            job.status = ImportStatus.FAILED
-            repo.session.add(job)
-            repo.session.commit()
-            print(f"[API SOURCE] Failed to fetch data: {e}")
+            await asyncio.to_thread(_mark_job_failed, job.id)
+            logger.error("[API SOURCE] Failed to fetch data: %s", e)
             
             # 检查是否是连接错误
             error_str = str(e).lower()
@@ -273,7 +319,7 @@ class ApiSourceConfirmResponse(BaseModel):
 def confirm_api_source(
     source_id: str,
     payload: ApiSourceConfirmRequest,
-    user: User = Depends(require_permission(Permission.DATA_IMPORT)),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_IMPORT)),
     session: Session = Depends(get_db_session),
 ) -> ApiSourceConfirmResponse:
     """确认API数据源入库：删除所有一级分类为'资产管理'的预计收入数据，然后导入新数据"""
@@ -284,12 +330,11 @@ def confirm_api_source(
         )
     
     try:
-        # 1. 删除所有一级分类为"资产管理"的预计收入数据
+        # 1. 删除所有一级分类为"资产管理"的预计收入数据（与后续导入同一事务，最后统一提交）
         deleted_count = session.query(IncomeForecast).filter(
-            IncomeForecast.category_path_text.like('资产管理%')
+            IncomeForecast.category_root == '资产管理'
         ).delete(synchronize_session=False)
-        session.commit()
-        print(f"[API SOURCE] Deleted {deleted_count} income forecasts with category '资产管理'")
+        logger.info("[API SOURCE] Deleted %d income forecasts with category '资产管理'", deleted_count)
         
         # 2. 获取或创建公司
         company = session.query(Company).filter(Company.name == "company-unknown").first()
@@ -310,91 +355,89 @@ def confirm_api_source(
             initiator_role=user.role.value,
         )
         
-        # 5. 导入预计收入非0的数据
-        imported_count = 0
-        for item in payload.data:
-            # 只导入预计收入非0的数据
-            expected_amount = item.get('expectedAmount') or item.get('expected_amount') or 0
-            if expected_amount == 0 or expected_amount is None:
-                continue
-            
+        # 5. 筛选并解析预计收入非0的数据
+        pending: list[tuple[Dict[str, Any], date, Optional[str], Optional[str], tuple[str, ...], Any]] = []
+        # 先一次性筛掉预计收入为0或缺少日期的行，后续解析只遍历保留的数据
+        retained = [
+            (item, expected_amount, date_str)
+            for item in payload.data
+            if (expected_amount := item.get('expectedAmount') or item.get('expected_amount') or 0) != 0
+            and (date_str := item.get('Date') or item.get('date'))
+        ]
+        for item, expected_amount, date_str in retained:
             # 解析日期
-            date_str = item.get('Date') or item.get('date')
-            if not date_str:
-                continue
-            
             try:
                 if isinstance(date_str, str):
-                    # 尝试多种日期格式
-                    try:
-                        cash_in_date = datetime.fromisoformat(date_str.replace('Z', '+00:00')).date()
-                    except:
-                        try:
-                            cash_in_date = datetime.strptime(date_str.split()[0], '%Y-%m-%d').date()
-                        except:
-                            cash_in_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                elif isinstance(date_str, date):
-                    cash_in_date = date_str
+                    # 绝大多数为 ISO 格式，正则快速路径；不匹配时才回退到多格式解析
+                    match = _ISO_DATE_RE.match(date_str)
+                    if match:
+                        cash_in_date = date(int(match[1]), int(match[2]), int(match[3]))
+                    else:
+                        cash_in_date = _parse_date_fallback(date_str)
                 elif isinstance(date_str, datetime):
                     cash_in_date = date_str.date()
+                elif isinstance(date_str, date):
+                    cash_in_date = date_str
                 else:
                     continue
             except Exception as e:
-                print(f"[API SOURCE] Failed to parse date: {date_str}, error: {e}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("[API SOURCE] Failed to parse date: %s, error: %s", date_str, e)
                 continue
             
             # 构建分类路径
-            category_path_parts = []
-            if item.get('categoryLevel1'):
-                category_path_parts.append(str(item['categoryLevel1']))
-            if item.get('categoryLevel2'):
-                category_path_parts.append(str(item['categoryLevel2']))
-            if item.get('categoryLevel3'):
-                category_path_parts.append(str(item['categoryLevel3']))
-            if item.get('categoryLevel4'):
-                category_path_parts.append(str(item['categoryLevel4']))
-            
-            category_path_text = '/'.join(category_path_parts) if category_path_parts else None
-            
-            # 获取或创建分类ID
-            category_id = None
-            if category_path_parts:
-                from app.models.financial import CategoryType
-                category = category_service.get_or_create(
-                    names=category_path_parts,
-                    category_type=CategoryType.FORECAST
-                )
-                if category:
-                    category_id = category.id
-            
+            category_path_parts = [str(v) for v in (item.get(k) for k in _LEVEL_KEYS) if v]
+            category_path_text = '/'.join(category_path_parts) or None
+            category_root = category_path_parts[0] if category_path_parts else None
+            category_chain = tuple(part.strip() for part in category_path_parts if part.strip())
+
+            pending.append((item, cash_in_date, category_path_text, category_root, category_chain, expected_amount))
+
+        # 6. 一次性解析所有用到的分类路径（每个不同路径只查询/创建一次）
+        categories = category_service.get_or_create_many(
+            paths=[chain for _, _, _, _, chain, _ in pending if chain],
+            category_type=CategoryType.FORECAST,
+        )
+
+        # 7. 构建行数据并以 Core INSERT 批量写入，跳过 ORM 对象构造、身份映射与单元工作开销
+        rows: list[Dict[str, Any]] = []
+        for item, cash_in_date, category_path_text, category_root, category_chain, expected_amount in pending:
+            category = categories.get(category_chain)
+
             # 确定certainty
             income_status = item.get('incomeStatus') or ''
             certainty = Certainty.UNCERTAIN if income_status == '未确认' else Certainty.CERTAIN
             
-            # 创建收入预测记录
-            forecast = IncomeForecast(
-                company_id=company.id,
-                import_job_id=job.id,
-                category_id=category_id,
-                cash_in_date=cash_in_date,
-                product_name=item.get('categoryLevel4') or item.get('FundName'),
-                certainty=certainty,
-                category=item.get('categoryLevel2'),
-                category_path_text=category_path_text,
-                category_label=item.get('categoryLevel2'),
-                subcategory_label=item.get('categoryLevel3'),
-                description=item.get('name') or item.get('description'),
-                account_name=None,
-                expected_amount=float(expected_amount),
-                currency="CNY",
-                confidence=1.0,
-                notes=f"资产编码: {item.get('FlareAssetCode', '')}" if item.get('FlareAssetCode') else None,
-            )
-            session.add(forecast)
-            imported_count += 1
+            rows.append({
+                "id": str(uuid.uuid4()),
+                "company_id": company.id,
+                "import_job_id": job.id,
+                "category_id": category.id if category else None,
+                "cash_in_date": cash_in_date,
+                "product_name": item.get('categoryLevel4') or item.get('FundName'),
+                "certainty": certainty,
+                "category": item.get('categoryLevel2'),
+                "category_path_text": category_path_text,
+                "category_root": category_root,
+                "category_label": item.get('categoryLevel2'),
+                "subcategory_label": item.get('categoryLevel3'),
+                "description": item.get('name') or item.get('description'),
+                "account_name": None,
+                "expected_amount": float(expected_amount),
+                "currency": "CNY",
+                "confidence": 1.0,
+                "notes": f"资产编码: {item.get('FlareAssetCode', '')}" if item.get('FlareAssetCode') else None,
+            })
+
+        if rows:
+            # 表级 executemany：ORM 批量插入会按“非空列集合”把相邻行拆成多条语句（如 notes 有无值交替出现）
+            session.execute(insert(IncomeForecast.__table__), rows)
+        imported_count = len(rows)
         
         session.commit()
-        print(f"[API SOURCE] Imported {imported_count} income forecasts")
+        # 同步接口运行在工作线程中，通过事件循环执行异步的缓存失效
+        from_thread.run(invalidate_financial_cache)
+        logger.info("[API SOURCE] Imported %d income forecasts", imported_count)
         
         return ApiSourceConfirmResponse(
             deleted_count=deleted_count,
@@ -402,9 +445,7 @@ def confirm_api_source(
         )
     except Exception as e:
         session.rollback()
-        print(f"[API SOURCE] Failed to confirm import: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[API SOURCE] Failed to confirm import: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to confirm import: {str(e)}"
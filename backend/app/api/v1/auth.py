@@ -1,27 +1,47 @@
 from __future__ import annotations
 
+import secrets
+
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
-from app.api.deps import get_db_session, get_current_user, require_role
+from app.api.deps import CurrentUser, get_async_db_session, get_current_user, require_role
 from app.core.auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES, ACCESS_TOKEN_EXPIRE_MINUTES_REMEMBER
 from datetime import timedelta
-from app.core.security import hash_password, verify_password
+from app.core.security import hash_password, hash_password_async, verify_password_async
 from app.models.financial import User, UserRole
 from app.schemas.auth import UserCreate, UserLogin, TokenResponse, UserResponse
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
+# 用户不存在时也对该哈希执行一次 bcrypt 校验，使两条路径耗时一致，防止通过响应时间枚举用户名
+_DUMMY_PASSWORD_HASH = hash_password(secrets.token_urlsafe(32))
+
+
+def _user_response(user: User | CurrentUser) -> UserResponse:
+    # 字段均直接来自数据库，跳过校验构造响应模型
+    return UserResponse.model_construct(
+        id=user.id,
+        email=user.email,
+        display_name=user.display_name,
+        role=user.role,
+        is_active=user.is_active,
+    )
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserCreate,
-    current_user: User = Depends(require_role(UserRole.ADMIN)),  # 只有管理员可以注册新用户
-    session: Session = Depends(get_db_session),
+    current_user: CurrentUser = Depends(require_role(UserRole.ADMIN)),  # 只有管理员可以注册新用户
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> UserResponse:
     """注册新用户（仅管理员可用）"""
     # 检查邮箱是否已存在
-    existing_user = session.query(User).filter(User.email == user_data.email).first()
+    existing_user = (
+        await session.execute(select(User.id).where(User.email == user_data.email).limit(1))
+    ).first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -29,31 +49,42 @@ def register(
         )
     
     # 创建新用户
+    # bcrypt 哈希是 CPU 密集操作，放到专用线程池中执行，避免阻塞事件循环
+    password_hash = await hash_password_async(user_data.password)
     user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=password_hash,
         display_name=user_data.display_name,
         role=user_data.role,
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     
-    return UserResponse.model_validate(user)
+    return _user_response(user)
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     credentials: UserLogin,
-    session: Session = Depends(get_db_session),
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> TokenResponse:
     """用户登录（支持用户名或邮箱登录）"""
-    # 尝试通过display_name（用户名）或email登录
-    user = session.query(User).filter(
-        (User.display_name == credentials.username) | (User.email == credentials.username)
-    ).first()
+    # 尝试通过display_name（用户名）或email登录，大小写不敏感，命中 lower() 函数索引
+    username = credentials.username.lower()
+    result = await session.execute(
+        select(User)
+        .options(
+            load_only(User.id, User.email, User.display_name, User.password_hash, User.role, User.is_active)
+        )
+        .where(or_(func.lower(User.display_name) == username, func.lower(User.email) == username))
+        .limit(1)
+    )
+    user = result.scalars().first()
     
-    if not user or not verify_password(credentials.password, user.password_hash):
+    password_hash = user.password_hash if user is not None else _DUMMY_PASSWORD_HASH
+    password_ok = await verify_password_async(credentials.password, password_hash)
+    if user is None or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -76,16 +107,16 @@ def login(
         expires_delta=expires_delta
     )
     
-    return TokenResponse(
+    return TokenResponse.model_construct(
         access_token=access_token,
-        user=UserResponse.model_validate(user)
+        user=_user_response(user),
     )
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(
-    user: User = Depends(get_current_user),
+async def get_current_user_info(
+    user: CurrentUser = Depends(get_current_user),
 ) -> UserResponse:
     """获取当前用户信息"""
-    return UserResponse.model_validate(user)
+    return _user_response(user)
 
@@ -1,21 +1,21 @@
 from __future__ import annotations
 
+import logging
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db_session, require_permission
+from app.api.deps import CurrentUser, get_async_db_session, invalidate_financial_cache, require_permission
 from app.core.permissions import Permission
-from app.models.financial import User, Certainty, ExpenseForecast
+from app.models.financial import Certainty, ExpenseForecast
 from app.repositories.expense_forecast import ExpenseForecastRepository
 from app.schemas.expense_forecast import ExpenseForecastCreate, ExpenseForecastUpdate, ExpenseForecastResponse
 
 router = APIRouter(prefix="/api/v1", tags=["expense-forecast"])
-
-
-def get_expense_forecast_repository(session: Session = Depends(get_db_session)) -> ExpenseForecastRepository:
-    return ExpenseForecastRepository(session)
+logger = logging.getLogger(__name__)
 
 
 @router.post(
@@ -23,23 +23,28 @@ def get_expense_forecast_repository(session: Session = Depends(get_db_session))
     response_model=ExpenseForecastResponse,
     status_code=status.HTTP_201_CREATED,
 )
-def create_expense_forecast(
+async def create_expense_forecast(
     data: ExpenseForecastCreate,
     company_id: Optional[str] = None,
-    user: User = Depends(require_permission(Permission.DATA_IMPORT)),
-    repo: ExpenseForecastRepository = Depends(get_expense_forecast_repository),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_IMPORT)),
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> ExpenseForecastResponse:
     """创建支出预测记录"""
-    forecast = repo.create(
-        month=data.month,
-        category_label=data.category_label,
-        description=data.description,
-        account_name=data.account_name,
-        amount=data.amount,
-        certainty=data.certainty,
-        company_id=company_id,
-    )
-    repo.session.commit()
+    def _create(sync_session: Session) -> ExpenseForecast:
+        return ExpenseForecastRepository(sync_session).create(
+            month=data.month,
+            category_label=data.category_label,
+            description=data.description,
+            account_name=data.account_name,
+            amount=data.amount,
+            certainty=data.certainty,
+            company_id=company_id,
+        )
+
+    # 仓库为同步实现，通过 run_sync 在异步连接上执行，不占用线程池
+    forecast = await session.run_sync(_create)
+    await session.commit()
+    await invalidate_financial_cache()
     
     return ExpenseForecastResponse(
         id=forecast.id,
@@ -57,21 +62,24 @@ def create_expense_forecast(
     response_model=ExpenseForecastResponse,
     status_code=status.HTTP_200_OK,
 )
-def update_expense_forecast(
+async def update_expense_forecast(
     forecast_id: str,
     data: ExpenseForecastUpdate,
-    user: User = Depends(require_permission(Permission.DATA_IMPORT)),
-    repo: ExpenseForecastRepository = Depends(get_expense_forecast_repository),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_IMPORT)),
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> ExpenseForecastResponse:
     """更新支出预测记录"""
-    forecast = repo.update(
-        forecast_id=forecast_id,
-        description=data.description,
-        account_name=data.account_name,
-        amount=data.amount,
-        category_label=data.category_label,
-        certainty=data.certainty,
-    )
+    def _update(sync_session: Session) -> Optional[ExpenseForecast]:
+        return ExpenseForecastRepository(sync_session).update(
+            forecast_id=forecast_id,
+            description=data.description,
+            account_name=data.account_name,
+            amount=data.amount,
+            category_label=data.category_label,
+            certainty=data.certainty,
+        )
+
+    forecast = await session.run_sync(_update)
     
     if not forecast:
         raise HTTPException(
@@ -79,7 +87,9 @@ def update_expense_forecast(
             detail="Expense forecast not found"
         )
     
-    repo.session.commit()
+    await session.commit()
+    
+    await invalidate_financial_cache()
     
     # 计算月份字符串
     month = f"{forecast.cash_out_date.year}-{forecast.cash_out_date.month:02d}"
@@ -100,35 +110,39 @@ def update_expense_forecast(
     status_code=status.HTTP_204_NO_CONTENT,
     response_class=Response,
 )
-def delete_expense_forecast(
+async def delete_expense_forecast(
     forecast_id: str,
-    user: User = Depends(require_permission(Permission.DATA_IMPORT)),
-    repo: ExpenseForecastRepository = Depends(get_expense_forecast_repository),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_IMPORT)),
+    session: AsyncSession = Depends(get_async_db_session),
 ):
     """删除支出预测记录"""
-    success = repo.delete(forecast_id)
-    if not success:
+    result = await session.execute(delete(ExpenseForecast).where(ExpenseForecast.id == forecast_id))
+    if not result.rowcount:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Expense forecast not found"
         )
     
-    repo.session.commit()
+    await session.commit()
+    
+    await invalidate_financial_cache()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.delete("/expense-forecasts", status_code=status.HTTP_200_OK)
-def clear_expense_forecasts(
-    session: Session = Depends(get_db_session),
+async def clear_expense_forecasts(
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> dict[str, int]:
     """清空所有预测支出记录"""
     try:
-        count = session.query(ExpenseForecast).delete()
-        session.commit()
-        print(f"[IMPORT] Cleared {count} expense forecast records")
+        result = await session.execute(delete(ExpenseForecast))
+        count = result.rowcount
+        await session.commit()
+        await invalidate_financial_cache()
+        logger.info("[IMPORT] Cleared %s expense forecast records", count)
         return {"deleted_count": count}
     except Exception as e:
-        session.rollback()
-        print(f"[IMPORT] Failed to clear expense forecasts: {e}")
+        await session.rollback()
+        logger.exception("[IMPORT] Failed to clear expense forecasts: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to clear expense forecasts: {str(e)}") from e
 
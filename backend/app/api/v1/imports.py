@@ -1,20 +1,37 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
+import logging
+import os
+import stat
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+import aiofiles
+import orjson
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-from sqlalchemy.orm import Session
-
-from app.api.deps import get_ai_parser, get_db_session, get_import_job_repository, get_storage_adapter, require_permission
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    CurrentUser,
+    get_ai_parser,
+    get_async_db_session,
+    get_import_job_repository,
+    get_storage_adapter,
+    invalidate_financial_cache,
+    require_permission,
+)
+from app.api.http_cache import not_modified, weak_etag
 from app.core.permissions import Permission
-from app.models.financial import User
 from app.models.financial import ImportSource, ImportStatus, IncomeForecast, RevenueDetail
 from app.repositories.import_jobs import ImportJobRepository
-from app.schemas.imports import ImportJobDetail, ParseJobResponse
+from app.schemas.imports import AttachmentInfo, ImportJobDetail, ParseJobResponse
 from app.services.ai_parser import AIParserService
 from app.services.file_format_detector import FileFormat, FileFormatDetector
 from app.services.parsers.revenue_parser import RevenueParser
@@ -22,12 +39,38 @@ from app.services.llm_client import LLMClientError, LLMClientParseError
 from app.services.storage_adapter import StorageAdapter
 
 router = APIRouter(prefix="/api/v1", tags=["imports"])
+logger = logging.getLogger(__name__)
 
 # 配置文件路径存储位置（使用绝对路径，存储在backend目录）
 # 从 app/api/v1/imports.py 向上三级到 backend 目录
 BACKEND_ROOT = Path(__file__).parent.parent.parent.parent.resolve()
 CONFIG_FILE_PATH = BACKEND_ROOT / "file_import_config.json"
 
+# 文件流式写入存储时的分块大小
+_STREAM_CHUNK_SIZE = 1 << 20
+
+# 支持导入的 Excel 文件后缀
+_SUPPORTED_EXTENSIONS = (".xlsx", ".xls")
+
+
+@lru_cache(maxsize=32)
+def _list_supported_files(directory: str, mtime_ns: int) -> tuple[str, ...]:
+    """列出目录下支持的 Excel 文件；以目录修改时间为键缓存，增删或重命名文件后自动失效。"""
+    with os.scandir(directory) as entries:
+        return tuple(
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(_SUPPORTED_EXTENSIONS) and entry.is_file()
+        )
+
+
+def _stat_or_none(path: str) -> os.stat_result | None:
+    """一次 stat 同时得到存在性、类型与修改时间，避免 exists/is_file/is_dir 各自触发系统调用。"""
+    try:
+        return os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
 
 class FileImportConfig(BaseModel):
     """文件导入配置"""
@@ -41,16 +84,23 @@ class FileImportConfigResponse(BaseModel):
     file_count: int = 0
 
 
+@lru_cache(maxsize=1)
+def _load_cached_config(mtime_ns: int) -> FileImportConfig:
+    """按文件修改时间缓存解析结果，文件未变化时直接复用。"""
+    try:
+        return FileImportConfig(**orjson.loads(CONFIG_FILE_PATH.read_bytes()))
+    except Exception as e:
+        logger.warning("[CONFIG] Failed to load config: %s", e)
+        return FileImportConfig()
+
+
 def load_config() -> FileImportConfig:
-    """加载配置"""
-    if CONFIG_FILE_PATH.exists():
-        try:
-            with open(CONFIG_FILE_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return FileImportConfig(**data)
-        except Exception as e:
-            print(f"[CONFIG] Failed to load config: {e}")
-    return FileImportConfig()
+    """加载配置（返回共享实例，调用方不应修改）"""
+    try:
+        mtime_ns = CONFIG_FILE_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        return FileImportConfig()
+    return _load_cached_config(mtime_ns)
 
 
 def save_config(config: FileImportConfig) -> None:
@@ -59,14 +109,58 @@ def save_config(config: FileImportConfig) -> None:
         # 确保目录存在
         CONFIG_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
         # 保存配置
-        with open(CONFIG_FILE_PATH, "w", encoding="utf-8") as f:
-            json.dump(config.model_dump(), f, indent=2, ensure_ascii=False)
-        print(f"[CONFIG] Saved config to {CONFIG_FILE_PATH}: watch_path={config.watch_path}")
+        CONFIG_FILE_PATH.write_bytes(orjson.dumps(config.model_dump(), option=orjson.OPT_INDENT_2))
+        _load_cached_config.cache_clear()
+        logger.info("[CONFIG] Saved config to %s: watch_path=%s", CONFIG_FILE_PATH, config.watch_path)
     except Exception as e:
-        print(f"[CONFIG] Failed to save config to {CONFIG_FILE_PATH}: {e}")
+        logger.exception("[CONFIG] Failed to save config to %s: %s", CONFIG_FILE_PATH, e)
         raise HTTPException(status_code=500, detail=f"Failed to save config: {str(e)}") from e
 
 
+def _storage_name(job_id: str, index: int, filename: str | None) -> str:
+    """附件在存储中的文件名：任务 ID + 序号保证唯一（同名文件、并发请求互不覆盖），只保留原文件名的最后一段"""
+    name = Path(filename).name if filename else ""
+    return f"{job_id}_{index}_{name}" if name else f"{job_id}_{index}.upload"
+
+
+def _parse_job_response(job_id: str, job_status: str, preview: list[dict], raw_response: object) -> ORJSONResponse:
+    """直接用已序列化的预览构造响应，跳过 ParseJobResponse 的校验与二次序列化（字段与该模型一致）。"""
+    return ORJSONResponse(
+        {"jobId": job_id, "status": job_status, "preview": preview, "rawResponse": raw_response},
+        status_code=status.HTTP_202_ACCEPTED,
+    )
+
+
+async def _iter_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(_STREAM_CHUNK_SIZE):
+        yield chunk
+
+
+async def _iter_path(path: Path) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, "rb") as f:
+        while chunk := await f.read(_STREAM_CHUNK_SIZE):
+            yield chunk
+
+
+async def _parse_files_concurrently(
+    parser: RevenueParser,
+    parse_inputs: list[tuple[str, Path, FileFormat]],
+) -> list:
+    """在线程池中并发解析多个文件，按输入顺序合并预览；任一文件解析失败返回 400。"""
+    results = await asyncio.gather(
+        *(asyncio.to_thread(parser.parse, path, file_format) for _, path, file_format in parse_inputs),
+        return_exceptions=True,
+    )
+    all_preview: list = []
+    for (file_name, _, _), result in zip(parse_inputs, results):
+        if isinstance(result, BaseException):
+            logger.warning("[IMPORT] failed to parse %s: %s", file_name, result)
+            raise HTTPException(status_code=400, detail=f"Failed to parse file {file_name}: {str(result)}") from result
+        all_preview.extend(result)
+        logger.debug("[IMPORT] parsed %s, got %s records", file_name, len(result))
+    return all_preview
+
+
 @router.post(
     "/parse/upload",
     response_model=ParseJobResponse,
@@ -76,30 +170,30 @@ async def parse_upload(
     prompt: str = Form(...),
     company_id: str | None = Form(None),
     file: UploadFile | None = File(None),
-    user: User = Depends(require_permission(Permission.DATA_IMPORT)),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_IMPORT)),
     repo: ImportJobRepository = Depends(get_import_job_repository),
     parser: AIParserService = Depends(get_ai_parser),
     storage: StorageAdapter = Depends(get_storage_adapter),
-) -> ParseJobResponse:
+) -> ParseJobResponse | ORJSONResponse:
     job = repo.create_job(
         source_type=ImportSource.AI_CHAT,
         user_id=user.id,
         initiator_id=user.id,  # 保留向后兼容
         initiator_role=user.role.value,  # 保留向后兼容
     )
-    print(f"[IMPORT] created job {job.id}")
+    logger.debug("[IMPORT] created job %s", job.id)
 
     attachments_bytes = []
     if file is not None:
         data = await file.read()
         attachments_bytes.append(data)
-        stored_path = await storage.save(file.filename or f"{job.id}.upload", data)
+        stored_path = await storage.save(_storage_name(job.id, 0, file.filename), data)
         repo.add_attachment(
             job,
             file_type=file.content_type or "application/octet-stream",
             storage_path=stored_path,
         )
-        print(f"[IMPORT] stored attachment path={stored_path}")
+        logger.debug("[IMPORT] stored attachment path=%s", stored_path)
 
     try:
         preview, raw = await parser.parse_prompt(prompt, attachments_bytes)
@@ -107,31 +201,21 @@ async def parse_upload(
         job.status = ImportStatus.FAILED
         repo.session.add(job)
         repo.session.commit()
-        return ParseJobResponse(
-            jobId=job.id,
-            status=job.status.value,
-            preview=[],
-            rawResponse={"rawText": exc.raw_text, "error": str(exc)},
-        )
+        return _parse_job_response(job.id, job.status.value, [], {"rawText": exc.raw_text, "error": str(exc)})
     except LLMClientError as exc:
         repo.session.rollback()
         raise HTTPException(status_code=502, detail=str(exc)) from exc
-    print(f"[IMPORT] parser returned {len(preview)} candidate(s)")
+    logger.debug("[IMPORT] parser returned %s candidate(s)", len(preview))
     if company_id:
         for record in preview:
             record.payload.setdefault("company_id", company_id)
 
-    repo.save_preview(job, preview)
-    print(f"[IMPORT] preview persisted for job {job.id}")
+    preview_payload = repo.save_preview(job, preview)
+    logger.debug("[IMPORT] preview persisted for job %s", job.id)
     repo.session.commit()
-    print(f"[IMPORT] job {job.id} committed")
+    logger.info("[IMPORT] job %s committed", job.id)
 
-    return ParseJobResponse(
-        jobId=job.id,
-        status=job.status.value,
-        preview=preview,
-        rawResponse=raw,
-    )
+    return _parse_job_response(job.id, job.status.value, preview_payload, raw)
 
 
 @router.post(
@@ -143,7 +227,7 @@ async def parse_file_upload(
     files: List[UploadFile] = File(..., description="Files to parse"),
     repo: ImportJobRepository = Depends(get_import_job_repository),
     storage: StorageAdapter = Depends(get_storage_adapter),
-) -> ParseJobResponse:
+) -> ParseJobResponse | ORJSONResponse:
     """解析上传的文件（Excel、CSV、JSON格式）"""
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
@@ -153,22 +237,31 @@ async def parse_file_upload(
         initiator_id=None,
         initiator_role="finance_user",
     )
-    print(f"[IMPORT] created file import job {job.id}")
+    logger.debug("[IMPORT] created file import job %s", job.id)
 
-    all_preview: list = []
+    attachment_rows: list[dict[str, str]] = []
     detector = FileFormatDetector()
     parser = RevenueParser()
 
-    for file in files:
+    parse_inputs: list[tuple[str, Path, FileFormat]] = []
+
+    # 并发把上传文件分块写入存储，不在内存中保留整个文件；解析时直接读取存储后的文件
+    stored_paths = await asyncio.gather(
+        *(
+            storage.save_stream(_storage_name(job.id, index, file.filename), _iter_upload(file))
+            for index, file in enumerate(files)
+        ),
+        return_exceptions=True,
+    )
+    for file, stored_path in zip(files, stored_paths):
         try:
-            data = await file.read()
-            stored_path = await storage.save(file.filename or f"{job.id}_{file.filename}", data)
-            repo.add_attachment(
-                job,
-                file_type=file.content_type or "application/octet-stream",
-                storage_path=stored_path,
-            )
-            print(f"[IMPORT] stored file path={stored_path}")
+            if isinstance(stored_path, BaseException):
+                raise stored_path
+            attachment_rows.append({
+                "file_type": file.content_type or "application/octet-stream",
+                "storage_path": stored_path,
+            })
+            logger.debug("[IMPORT] stored file path=%s", stored_path)
 
             # 检测文件格式
             file_format = detector.detect_from_content_type(file.content_type)
@@ -178,93 +271,86 @@ async def parse_file_upload(
             if file_format == FileFormat.UNKNOWN:
                 raise HTTPException(status_code=400, detail=f"Unsupported file format: {file.filename}")
 
-            # 解析文件
-            try:
-                file_preview = parser.parse(data, file_format)
-                all_preview.extend(file_preview)
-                print(f"[IMPORT] parsed {file.filename}, got {len(file_preview)} records")
-            except Exception as e:
-                print(f"[IMPORT] failed to parse {file.filename}: {e}")
-                raise HTTPException(status_code=400, detail=f"Failed to parse file {file.filename}: {str(e)}") from e
+            parse_inputs.append((file.filename or "", Path(stored_path), file_format))
 
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[IMPORT] error processing file {file.filename}: {e}")
+            logger.exception("[IMPORT] error processing file %s: %s", file.filename, e)
             raise HTTPException(status_code=500, detail=f"Error processing file {file.filename}: {str(e)}") from e
 
-    repo.save_preview(job, all_preview)
-    print(f"[IMPORT] preview persisted for job {job.id}, total {len(all_preview)} records")
+    all_preview = await _parse_files_concurrently(parser, parse_inputs)
+
+    # 所有附件在循环结束后一次批量写入，与预览一起在同一事务中提交
+    repo.add_attachments(job, attachment_rows)
+    preview_payload = repo.save_preview(job, all_preview)
+    logger.debug("[IMPORT] preview persisted for job %s, total %s records", job.id, len(all_preview))
     repo.session.commit()
-    print(f"[IMPORT] job {job.id} committed")
+    logger.info("[IMPORT] job %s committed", job.id)
 
-    return ParseJobResponse(
-        jobId=job.id,
-        status=job.status.value,
-        preview=all_preview,
-        rawResponse={"files_processed": len(files), "records_count": len(all_preview)},
+    return _parse_job_response(
+        job.id,
+        job.status.value,
+        preview_payload,
+        {"files_processed": len(files), "records_count": len(all_preview)},
     )
 
 
 @router.delete("/revenue-details", status_code=status.HTTP_200_OK)
-def clear_revenue_details(
-    session: Session = Depends(get_db_session),
+async def clear_revenue_details(
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> dict[str, int]:
     """清空所有收入明细记录"""
     try:
-        count = session.query(RevenueDetail).delete()
-        session.commit()
-        print(f"[IMPORT] Cleared {count} revenue detail records")
+        result = await session.execute(delete(RevenueDetail))
+        count = result.rowcount
+        await session.commit()
+        await invalidate_financial_cache()
+        logger.info("[IMPORT] Cleared %s revenue detail records", count)
         return {"deleted_count": count}
     except Exception as e:
-        session.rollback()
-        print(f"[IMPORT] Failed to clear revenue details: {e}")
+        await session.rollback()
+        logger.exception("[IMPORT] Failed to clear revenue details: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to clear revenue details: {str(e)}") from e
 
 
 @router.delete("/income-forecasts", status_code=status.HTTP_200_OK)
-def clear_income_forecasts(
-    session: Session = Depends(get_db_session),
+async def clear_income_forecasts(
+    session: AsyncSession = Depends(get_async_db_session),
 ) -> dict[str, int]:
     """清空所有预测收入记录"""
     try:
-        count = session.query(IncomeForecast).delete()
-        session.commit()
-        print(f"[IMPORT] Cleared {count} income forecast records")
+        result = await session.execute(delete(IncomeForecast))
+        count = result.rowcount
+        await session.commit()
+        await invalidate_financial_cache()
+        logger.info("[IMPORT] Cleared %s income forecast records", count)
         return {"deleted_count": count}
     except Exception as e:
-        session.rollback()
-        print(f"[IMPORT] Failed to clear income forecasts: {e}")
+        await session.rollback()
+        logger.exception("[IMPORT] Failed to clear income forecasts: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to clear income forecasts: {str(e)}") from e
 
 
-@router.get("/file-import/config", response_model=FileImportConfigResponse)
-def get_file_import_config() -> FileImportConfigResponse:
-    """获取文件导入配置"""
+def _build_config_response() -> FileImportConfigResponse:
     config = load_config()
-    print(f"[CONFIG] Loading config from {CONFIG_FILE_PATH}, exists: {CONFIG_FILE_PATH.exists()}")
-    print(f"[CONFIG] Loaded config: watch_path={config.watch_path}")
+    logger.debug("[CONFIG] Loaded config from %s: watch_path=%s", CONFIG_FILE_PATH, config.watch_path)
     
-    watch_path = Path(config.watch_path) if config.watch_path else None
+    st = _stat_or_none(config.watch_path) if config.watch_path else None
     
-    path_exists = watch_path.exists() if watch_path else False
+    path_exists = st is not None
     file_count = 0
     
-    if path_exists:
-        if watch_path.is_file():
+    if st is not None:
+        if stat.S_ISREG(st.st_mode):
             # 如果是文件，检查是否是支持的Excel格式
-            supported_extensions = {".xlsx", ".xls"}
-            if watch_path.suffix.lower() in supported_extensions:
+            if config.watch_path.lower().endswith(_SUPPORTED_EXTENSIONS):
                 file_count = 1
-        elif watch_path.is_dir():
-            # 如果是目录，统计支持的Excel文件数量
-            supported_extensions = {".xlsx", ".xls"}
-            file_count = sum(
-                1 for f in watch_path.iterdir()
-                if f.is_file() and f.suffix.lower() in supported_extensions
-            )
+        elif stat.S_ISDIR(st.st_mode):
+            # 如果是目录，统计支持的Excel文件数量（目录未变化时复用缓存的扫描结果）
+            file_count = len(_list_supported_files(config.watch_path, st.st_mtime_ns))
     
-    print(f"[CONFIG] Returning config: path_exists={path_exists}, file_count={file_count}")
+    logger.debug("[CONFIG] Returning config: path_exists=%s, file_count=%s", path_exists, file_count)
     return FileImportConfigResponse(
         watch_path=config.watch_path,
         path_exists=path_exists,
@@ -272,28 +358,40 @@ def get_file_import_config() -> FileImportConfigResponse:
     )
 
 
+@router.get("/file-import/config", response_model=FileImportConfigResponse)
+def get_file_import_config(request: Request, response: Response) -> FileImportConfigResponse | Response:
+    """获取文件导入配置（支持 If-None-Match 条件请求）"""
+    result = _build_config_response()
+    etag = weak_etag(result.watch_path, result.path_exists, result.file_count)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return result
+
+
 @router.post("/file-import/config", response_model=FileImportConfigResponse)
 def set_file_import_config(config: FileImportConfig) -> FileImportConfigResponse:
     """设置文件导入配置（支持文件路径或目录路径）"""
     if config.watch_path:
-        watch_path = Path(config.watch_path)
-        if not watch_path.exists():
+        st = _stat_or_none(config.watch_path)
+        if st is None:
             raise HTTPException(status_code=400, detail=f"路径不存在: {config.watch_path}")
-        if watch_path.is_file():
+        if stat.S_ISREG(st.st_mode):
             # 如果是文件，检查是否是支持的Excel格式
-            supported_extensions = {".xlsx", ".xls"}
-            if watch_path.suffix.lower() not in supported_extensions:
+            if not config.watch_path.lower().endswith(_SUPPORTED_EXTENSIONS):
                 raise HTTPException(status_code=400, detail=f"不支持的文件格式: {config.watch_path}。请使用 .xlsx 或 .xls 文件")
-            print(f"[CONFIG] 配置为文件路径: {watch_path}")
-        elif watch_path.is_dir():
-            print(f"[CONFIG] 配置为目录路径: {watch_path}")
+            logger.debug("[CONFIG] 配置为文件路径: %s", config.watch_path)
+        elif stat.S_ISDIR(st.st_mode):
+            logger.debug("[CONFIG] 配置为目录路径: %s", config.watch_path)
         else:
             raise HTTPException(status_code=400, detail=f"路径无效: {config.watch_path}。请输入文件路径或目录路径")
     
     save_config(config)
     
     # 返回更新后的配置
-    return get_file_import_config()
+    return _build_config_response()
 
 
 @router.post(
@@ -304,30 +402,30 @@ def set_file_import_config(config: FileImportConfig) -> FileImportConfigResponse
 async def scan_file_import_path(
     repo: ImportJobRepository = Depends(get_import_job_repository),
     storage: StorageAdapter = Depends(get_storage_adapter),
-) -> ParseJobResponse:
+) -> ParseJobResponse | ORJSONResponse:
     """扫描配置的文件路径并解析文件（支持文件路径或目录路径）"""
     config = load_config()
     if not config.watch_path:
         raise HTTPException(status_code=400, detail="未配置文件路径")
     
-    watch_path = Path(config.watch_path)
-    if not watch_path.exists():
+    st = _stat_or_none(config.watch_path)
+    if st is None:
         raise HTTPException(status_code=400, detail=f"路径不存在: {config.watch_path}")
     
+    watch_path = Path(config.watch_path)
     # 确定要处理的文件列表
-    supported_extensions = {".xlsx", ".xls"}
-    if watch_path.is_file():
+    if stat.S_ISREG(st.st_mode):
         # 如果是文件，直接使用该文件
-        if watch_path.suffix.lower() not in supported_extensions:
+        if not watch_path.name.lower().endswith(_SUPPORTED_EXTENSIONS):
             raise HTTPException(status_code=400, detail=f"不支持的文件格式: {config.watch_path}。请使用 .xlsx 或 .xls 文件")
         files = [watch_path]
-        print(f"[FILE IMPORT] Processing single file: {watch_path}")
-    elif watch_path.is_dir():
+        logger.debug("[FILE IMPORT] Processing single file: %s", watch_path)
+    elif stat.S_ISDIR(st.st_mode):
         # 如果是目录，查找所有支持的Excel文件
-        files = [f for f in watch_path.iterdir() if f.is_file() and f.suffix.lower() in supported_extensions]
+        files = [Path(f) for f in _list_supported_files(config.watch_path, st.st_mtime_ns)]
         if not files:
             raise HTTPException(status_code=404, detail=f"目录中没有找到支持的Excel文件: {config.watch_path}")
-        print(f"[FILE IMPORT] Scanning directory {watch_path}, found {len(files)} files")
+        logger.debug("[FILE IMPORT] Scanning directory %s, found %s files", watch_path, len(files))
     else:
         raise HTTPException(status_code=400, detail=f"路径无效: {config.watch_path}")
     
@@ -336,79 +434,104 @@ async def scan_file_import_path(
         initiator_id=None,
         initiator_role="finance_user",
     )
-    print(f"[IMPORT] created file scan job {job.id}")
+    logger.debug("[IMPORT] created file scan job %s", job.id)
     
-    all_preview: list = []
+    attachment_rows: list[dict[str, str]] = []
     detector = FileFormatDetector()
     parser = RevenueParser()
     
-    for file_path in files:
+    parse_inputs: list[tuple[str, Path, FileFormat]] = []
+
+    # 并发把源文件分块复制到存储，解析时直接读取源文件，不把文件内容整体读入内存
+    stored_paths = await asyncio.gather(
+        *(
+            storage.save_stream(_storage_name(job.id, index, file_path.name), _iter_path(file_path))
+            for index, file_path in enumerate(files)
+        ),
+        return_exceptions=True,
+    )
+    for file_path, stored_path in zip(files, stored_paths):
         try:
             file_name = file_path.name
-            print(f"[FILE IMPORT] Processing file: {file_name}")
-            
-            # 读取文件内容
-            data = file_path.read_bytes()
+            logger.debug("[FILE IMPORT] Processing file: %s", file_name)
             
-            # 保存到存储
-            stored_path = await storage.save(f"{job.id}_{file_name}", data)
-            repo.add_attachment(
-                job,
-                file_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                storage_path=stored_path,
-            )
-            print(f"[IMPORT] stored file path={stored_path}")
+            if isinstance(stored_path, BaseException):
+                raise stored_path
+            attachment_rows.append({
+                "file_type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                "storage_path": stored_path,
+            })
+            logger.debug("[IMPORT] stored file path=%s", stored_path)
             
             # 检测文件格式
             file_format = detector.detect(file_name)
             if file_format == FileFormat.UNKNOWN:
                 raise HTTPException(status_code=400, detail=f"Unsupported file format: {file_name}")
             
-            # 解析文件
-            try:
-                file_preview = parser.parse(data, file_format)
-                all_preview.extend(file_preview)
-                print(f"[IMPORT] parsed {file_name}, got {len(file_preview)} records")
-            except Exception as e:
-                print(f"[IMPORT] failed to parse {file_name}: {e}")
-                raise HTTPException(status_code=400, detail=f"Failed to parse file {file_name}: {str(e)}") from e
+            parse_inputs.append((file_name, file_path, file_format))
         
         except HTTPException:
             raise
         except Exception as e:
-            print(f"[IMPORT] error processing file {file_path}: {e}")
+            logger.exception("[IMPORT] error processing file %s: %s", file_path, e)
             raise HTTPException(status_code=500, detail=f"Error processing file {file_path}: {str(e)}") from e
     
-    repo.save_preview(job, all_preview)
-    print(f"[IMPORT] preview persisted for job {job.id}, total {len(all_preview)} records")
+    all_preview = await _parse_files_concurrently(parser, parse_inputs)
+    
+    # 所有附件在循环结束后一次批量写入，与预览一起在同一事务中提交
+    repo.add_attachments(job, attachment_rows)
+    preview_payload = repo.save_preview(job, all_preview)
+    logger.debug("[IMPORT] preview persisted for job %s, total %s records", job.id, len(all_preview))
     repo.session.commit()
-    print(f"[IMPORT] job {job.id} committed")
+    logger.info("[IMPORT] job %s committed", job.id)
     
-    return ParseJobResponse(
-        jobId=job.id,
-        status=job.status.value,
-        preview=all_preview,
-        rawResponse={"files_processed": len(files), "records_count": len(all_preview)},
+    return _parse_job_response(
+        job.id,
+        job.status.value,
+        preview_payload,
+        {"files_processed": len(files), "records_count": len(all_preview)},
     )
 
 
 @router.get("/import-jobs/{job_id}", response_model=ImportJobDetail)
-def get_import_job(job_id: str, repo: ImportJobRepository = Depends(get_import_job_repository)) -> ImportJobDetail:
-    job = repo.get_job(job_id)
+def get_import_job(
+    job_id: str,
+    request: Request,
+    response: Response,
+    repo: ImportJobRepository = Depends(get_import_job_repository),
+) -> ImportJobDetail | Response:
+    job = repo.get_job(job_id, with_attachments=True)
     if not job:
         raise HTTPException(status_code=404, detail="Import job not found")
 
+    # 任务状态、预览内容或附件变化时 ETag 随之变化；未变化时跳过预览反序列化
+    etag = weak_etag(
+        job.status.value,
+        job.completed_at,
+        hashlib.blake2b((job.raw_payload_ref or "").encode("utf-8"), digest_size=8).hexdigest(),
+        ",".join(attachment.id for attachment in job.attachments),
+    )
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
     preview = repo.load_preview(job)
+    # 数据来自数据库，已是可信数据，跳过响应模型的构造校验
     attachments = [
-        {"id": attachment.id, "fileType": attachment.file_type, "storagePath": attachment.storage_path}
+        AttachmentInfo.model_construct(
+            id=attachment.id,
+            file_type=attachment.file_type,
+            storage_path=attachment.storage_path,
+        )
         for attachment in job.attachments
     ]
 
-    return ImportJobDetail(
-        jobId=job.id,
+    return ImportJobDetail.model_construct(
+        job_id=job.id,
         status=job.status.value,
-        sourceType=job.source_type.value,
+        source_type=job.source_type.value,
         attachments=attachments,
         preview=preview,
     )
-
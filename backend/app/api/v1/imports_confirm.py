@@ -1,10 +1,10 @@
 from __future__ import annotations
 
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from app.api.deps import get_import_job_repository, require_permission
+from app.api.deps import CurrentUser, get_import_job_repository, invalidate_financial_cache, require_permission
 from app.core.permissions import Permission
-from app.models.financial import User
 from app.repositories.import_jobs import DuplicateRecordError, ImportJobRepository
 from app.schemas.imports import ConfirmationPayload, ConfirmationResult
 
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/api/v1", tags=["imports"])
 def confirm_import_job(
     job_id: str,
     payload: ConfirmationPayload,
-    user: User = Depends(require_permission(Permission.DATA_CONFIRM)),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_CONFIRM)),
     repo: ImportJobRepository = Depends(get_import_job_repository),
 ) -> ConfirmationResult:
     job = repo.get_job(job_id)
@@ -29,6 +29,8 @@ def confirm_import_job(
     try:
         approved, rejected, records = repo.apply_confirmation(job, payload.actions)
         repo.session.commit()
+        # 同步接口运行在工作线程中，通过事件循环执行异步的缓存失效
+        from_thread.run(invalidate_financial_cache)
     except DuplicateRecordError as exc:
         repo.session.rollback()
         raise HTTPException(
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_financial_overview_service, require_permission
+from app.api.deps import (
+    FINANCIAL_CACHE_NAMESPACE,
+    CurrentUser,
+    get_async_db_session,
+    get_financial_response_cache,
+    require_permission,
+)
+from app.api.http_cache import private_json_response, serialize_json
 from app.core.permissions import Permission
-from app.models.financial import User
+from app.core.response_cache import RedisResponseCache
 from app.schemas.overview import (
     BalanceHistoryItem,
+    DashboardResponse,
     ExpenseForecastDetailResponse,
     FinancialOverview,
     RevenueSummaryResponse,
@@ -18,19 +27,61 @@ from app.services.financial_overview import FinancialOverviewService
 
 router = APIRouter(prefix="/api/v1", tags=["overview"])
 
+# 看板汇总数据的浏览器缓存时长（秒）；ETag 命中时返回 304，不重复传输响应体
+_SUMMARY_MAX_AGE = 300
+_SUMMARY_STALE_WHILE_REVALIDATE = 3600
+_BALANCES_MAX_AGE = 600
+
+_T = TypeVar("_T")
+
+
+async def _run_overview(session: AsyncSession, call: Callable[[FinancialOverviewService], _T]) -> _T:
+    """在异步会话底层的同步连接上执行汇总服务调用。
+
+    服务只持有当次请求的 Session，构造开销可以忽略；不做成应用级单例，以免跨请求共享会话。
+    汇总服务为同步实现，通过 run_sync 执行，不占用线程池。
+    """
+    return await session.run_sync(lambda sync_session: call(FinancialOverviewService(sync_session)))
+
+
+def _revenue_summary_cache_params(
+    year: Optional[int], company_id: Optional[str], max_level: Optional[int], include_forecast: bool
+) -> dict:
+    """收入汇总的 Redis 缓存键参数，单独接口与看板聚合接口共用同一缓存条目。"""
+    return {
+        "endpoint": "revenue-summary",
+        "year": year,
+        "company_id": company_id,
+        "max_level": max_level,
+        "include_forecast": include_forecast,
+    }
+
+
+def _expense_forecast_detail_cache_params(month: str, company_id: Optional[str]) -> dict:
+    """支出预测明细的 Redis 缓存键参数，单独接口与看板聚合接口共用同一缓存条目。"""
+    return {"endpoint": "expense-forecast-detail", "month": month, "company_id": company_id}
+
 
 @router.get(
     "/financial/overview",
     response_model=FinancialOverview,
     status_code=status.HTTP_200_OK,
 )
-def get_financial_overview(
+async def get_financial_overview(
+    request: Request,
     company_id: Optional[str] = Query(None, alias="companyId"),
     as_of: Optional[date] = Query(None, description="ISO8601 date used as snapshot reference"),
-    user: User = Depends(require_permission(Permission.DATA_VIEW)),
-    service: FinancialOverviewService = Depends(get_financial_overview_service),
-) -> FinancialOverview:
-    return service.get_overview(as_of=as_of, company_id=company_id)
+    user: CurrentUser = Depends(require_permission(Permission.DATA_VIEW)),
+    session: AsyncSession = Depends(get_async_db_session),
+) -> Response:
+    overview = await _run_overview(session, lambda service: service.get_overview(as_of=as_of, company_id=company_id))
+    return private_json_response(
+        request,
+        serialize_json(overview),
+        user_id=user.id,
+        max_age=_SUMMARY_MAX_AGE,
+        stale_while_revalidate=_SUMMARY_STALE_WHILE_REVALIDATE,
+    )
 
 
 @router.get(
@@ -38,19 +89,37 @@ def get_financial_overview(
     response_model=RevenueSummaryResponse,
     status_code=status.HTTP_200_OK,
 )
-def get_revenue_summary(
+async def get_revenue_summary(
+    request: Request,
     year: Optional[int] = Query(None),
     company_id: Optional[str] = Query(None, alias="companyId"),
     max_level: Optional[int] = Query(2, alias="maxLevel", ge=1, le=6),
     include_forecast: bool = Query(False, alias="includeForecast"),
-    user: User = Depends(require_permission(Permission.DATA_VIEW)),
-    service: FinancialOverviewService = Depends(get_financial_overview_service),
-) -> RevenueSummaryResponse:
-    return service.get_revenue_summary(
-        year=year,
-        company_id=company_id,
-        max_level=max_level,
-        include_forecast=include_forecast,
+    user: CurrentUser = Depends(require_permission(Permission.DATA_VIEW)),
+    session: AsyncSession = Depends(get_async_db_session),
+    cache: RedisResponseCache = Depends(get_financial_response_cache),
+) -> Response:
+    # 多级汇总查询较重，且数据只在导入/确认后变化，结果按查询参数缓存在 Redis 中
+    cache_params = _revenue_summary_cache_params(year, company_id, max_level, include_forecast)
+    body, cache_version = await cache.get(FINANCIAL_CACHE_NAMESPACE, cache_params)
+    if body is None:
+        summary = await _run_overview(
+            session,
+            lambda service: service.get_revenue_summary(
+                year=year,
+                company_id=company_id,
+                max_level=max_level,
+                include_forecast=include_forecast,
+            ),
+        )
+        body = serialize_json(summary)
+        await cache.set(FINANCIAL_CACHE_NAMESPACE, cache_params, body, cache_version)
+    return private_json_response(
+        request,
+        body,
+        user_id=user.id,
+        max_age=_SUMMARY_MAX_AGE,
+        stale_while_revalidate=_SUMMARY_STALE_WHILE_REVALIDATE,
     )
 
 
@@ -59,12 +128,14 @@ def get_revenue_summary(
     response_model=list[BalanceHistoryItem],
     status_code=status.HTTP_200_OK,
 )
-def get_balance_history(
+async def get_balance_history(
+    request: Request,
     company_id: Optional[str] = Query(None, alias="companyId"),
-    user: User = Depends(require_permission(Permission.DATA_VIEW)),
-    service: FinancialOverviewService = Depends(get_financial_overview_service),
-) -> list[BalanceHistoryItem]:
-    return service.list_balance_history(company_id=company_id)
+    user: CurrentUser = Depends(require_permission(Permission.DATA_VIEW)),
+    session: AsyncSession = Depends(get_async_db_session),
+) -> Response:
+    balances = await _run_overview(session, lambda service: service.list_balance_history(company_id=company_id))
+    return private_json_response(request, serialize_json(balances), user_id=user.id, max_age=_BALANCES_MAX_AGE)
 
 
 @router.get(
@@ -72,12 +143,93 @@ def get_balance_history(
     response_model=ExpenseForecastDetailResponse,
     status_code=status.HTTP_200_OK,
 )
-def get_expense_forecast_detail(
+async def get_expense_forecast_detail(
     month: str = Query(..., description="月份，格式为 YYYY-MM"),
     company_id: Optional[str] = Query(None, alias="companyId"),
-    user: User = Depends(require_permission(Permission.DATA_VIEW)),
-    service: FinancialOverviewService = Depends(get_financial_overview_service),
-) -> ExpenseForecastDetailResponse:
-    return service.get_expense_forecast_detail(month=month, company_id=company_id)
+    user: CurrentUser = Depends(require_permission(Permission.DATA_VIEW)),
+    session: AsyncSession = Depends(get_async_db_session),
+    cache: RedisResponseCache = Depends(get_financial_response_cache),
+) -> Response:
+    cache_params = _expense_forecast_detail_cache_params(month, company_id)
+    body, cache_version = await cache.get(FINANCIAL_CACHE_NAMESPACE, cache_params)
+    if body is None:
+        detail = await _run_overview(
+            session, lambda service: service.get_expense_forecast_detail(month=month, company_id=company_id)
+        )
+        body = serialize_json(detail)
+        await cache.set(FINANCIAL_CACHE_NAMESPACE, cache_params, body, cache_version)
+    return Response(content=body, media_type="application/json")
+
+
+@router.get(
+    "/financial/dashboard",
+    response_model=DashboardResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_financial_dashboard(
+    request: Request,
+    company_id: Optional[str] = Query(None, alias="companyId"),
+    as_of: Optional[date] = Query(None, description="ISO8601 date used as snapshot reference"),
+    year: Optional[int] = Query(None),
+    max_level: Optional[int] = Query(2, alias="maxLevel", ge=1, le=6),
+    include_forecast: bool = Query(False, alias="includeForecast"),
+    month: Optional[str] = Query(None, description="月份，格式为 YYYY-MM；提供时附带支出预测明细"),
+    user: CurrentUser = Depends(require_permission(Permission.DATA_VIEW)),
+    session: AsyncSession = Depends(get_async_db_session),
+    cache: RedisResponseCache = Depends(get_financial_response_cache),
+) -> Response:
+    """看板聚合接口：一次鉴权、一次连接内完成四项查询，减少页面加载时的往返次数
+
+    收入汇总与支出预测明细复用单独接口的 Redis 缓存条目，命中时直接拼接缓存的 JSON，不再重复计算。
+    """
+    revenue_params = _revenue_summary_cache_params(year, company_id, max_level, include_forecast)
+    revenue_body, revenue_version = await cache.get(FINANCIAL_CACHE_NAMESPACE, revenue_params)
+    detail_params = _expense_forecast_detail_cache_params(month, company_id) if month else None
+    detail_body, detail_version = (
+        await cache.get(FINANCIAL_CACHE_NAMESPACE, detail_params) if detail_params else (None, None)
+    )
+    need_revenue = revenue_body is None
+    need_detail = detail_params is not None and detail_body is None
 
+    def _build(service: FinancialOverviewService) -> tuple[bytes, bytes, bytes | None, bytes | None]:
+        # 同一会话上的查询只能串行执行，放在一次 run_sync 中完成
+        overview = serialize_json(service.get_overview(as_of=as_of, company_id=company_id))
+        balances = serialize_json(service.list_balance_history(company_id=company_id))
+        revenue = None
+        if need_revenue:
+            revenue = serialize_json(
+                service.get_revenue_summary(
+                    year=year,
+                    company_id=company_id,
+                    max_level=max_level,
+                    include_forecast=include_forecast,
+                )
+            )
+        detail = None
+        if need_detail:
+            detail = serialize_json(service.get_expense_forecast_detail(month=month, company_id=company_id))
+        return overview, balances, revenue, detail
 
+    overview_body, balances_body, fresh_revenue, fresh_detail = await _run_overview(session, _build)
+    if fresh_revenue is not None:
+        revenue_body = fresh_revenue
+        await cache.set(FINANCIAL_CACHE_NAMESPACE, revenue_params, revenue_body, revenue_version)
+    if fresh_detail is not None:
+        detail_body = fresh_detail
+        await cache.set(FINANCIAL_CACHE_NAMESPACE, detail_params, detail_body, detail_version)
+
+    # 各部分均为按别名序列化的 JSON，按 DashboardResponse 的字段顺序拼接
+    body = (
+        b'{"overview":' + overview_body
+        + b',"revenueSummary":' + revenue_body
+        + b',"balances":' + balances_body
+        + b',"expenseForecastDetail":' + (detail_body if detail_body is not None else b"null")
+        + b"}"
+    )
+    return private_json_response(
+        request,
+        body,
+        user_id=user.id,
+        max_age=_SUMMARY_MAX_AGE,
+        stale_while_revalidate=_SUMMARY_STALE_WHILE_REVALIDATE,
+    )
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import threading
+import time
+from functools import lru_cache
+
 import jwt
-from datetime import datetime, timedelta, UTC
+from cachetools import TTLCache
+from datetime import timedelta
 from typing import Optional
 
 from app.core.config import get_settings
@@ -10,33 +15,58 @@ from app.core.config import get_settings
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7天（默认）
 ACCESS_TOKEN_EXPIRE_MINUTES_REMEMBER = 60 * 24 * 30  # 30天（记住我）
+_ALGORITHMS = [ALGORITHM]
+_EXPIRE_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# 已验签的令牌载荷缓存：同一令牌在 TTL 内只做一次 HMAC 校验；命中时仍按令牌自身的 exp 判断是否过期
+_decoded_tokens: TTLCache[str, dict] = TTLCache(maxsize=8192, ttl=300)
+_decoded_tokens_lock = threading.Lock()
 
 
+@lru_cache(maxsize=1)
 def get_secret_key() -> str:
-    """获取JWT密钥"""
+    """获取JWT密钥（配置在进程内不变，只解析一次）"""
     return getattr(get_settings(), "jwt_secret_key", "your-secret-key-change-in-production")
 
 
+@lru_cache(maxsize=1)
+def _signing_key() -> bytes:
+    # HS256 的 HMAC 由标准库 hmac/hashlib（OpenSSL 实现）完成；预先编码密钥，省去每次签名/验签时的 str → bytes 转换
+    return get_secret_key().encode("utf-8")
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建JWT访问令牌"""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(UTC) + expires_delta
-    else:
-        expire = datetime.now(UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    # 直接写入整数秒时间戳（与 PyJWT 对 datetime 的转换结果一致），省去 datetime 构造与 timegm 转换
+    now = int(time.time())
+    expire = now + (int(expires_delta.total_seconds()) if expires_delta is not None else _EXPIRE_SECONDS)
     
-    to_encode.update({"exp": expire, "iat": datetime.now(UTC)})
-    encoded_jwt = jwt.encode(to_encode, get_secret_key(), algorithm=ALGORITHM)
+    to_encode.update({"exp": expire, "iat": now})
+    encoded_jwt = jwt.encode(to_encode, _signing_key(), algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> dict:
-    """解码JWT令牌"""
+    """解码JWT令牌（验签结果按令牌缓存）"""
+    with _decoded_tokens_lock:
+        payload = _decoded_tokens.get(token)
+    if payload is not None:
+        if payload.get("exp", float("inf")) > time.time():
+            return payload
+        evict_access_token(token)
     try:
-        payload = jwt.decode(token, get_secret_key(), algorithms=[ALGORITHM])
-        return payload
+        payload = jwt.decode(token, _signing_key(), algorithms=_ALGORITHMS)
     except jwt.ExpiredSignatureError:
         raise ValueError("Token expired")
     except jwt.InvalidTokenError:
         raise ValueError("Invalid token")
+    with _decoded_tokens_lock:
+        _decoded_tokens[token] = payload
+    return payload
+
 
+def evict_access_token(token: str) -> None:
+    """从验签缓存中移除令牌（例如登出时）。"""
+    with _decoded_tokens_lock:
+        _decoded_tokens.pop(token, None)
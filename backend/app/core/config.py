@@ -7,6 +7,11 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./finance_sync.db"
+    db_pool_class: str = "queue"  # queue：常驻进程；null：无服务器部署（每次请求新建连接，建议配合 PgBouncer 事务池）；static：单连接
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 2.0
+    db_pool_recycle: int = 1800
     redis_url: str = "redis://localhost:6379/0"
     llm_provider: str = "deepseek"
     llm_endpoint: str = "https://api.deepseek.com"
@@ -26,9 +31,11 @@ class Settings(BaseSettings):
     sqlserver_password: str | None = None
     sqlserver_database: str | None = None
 
-    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore")
+    # frozen：进程内共享同一个已校验实例，禁止运行时修改，避免各模块读到不一致的配置
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, extra="ignore", frozen=True)
 
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    """读取并校验一次配置，之后返回同一个只读实例。"""
     return Settings()
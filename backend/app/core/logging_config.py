@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import get_settings
+
+_LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+def setup_logging() -> QueueListener:
+    """配置根日志：请求线程只把记录放入队列，由后台线程负责格式化和输出。
+
+    返回已启动的 QueueListener，应用关闭时需调用 stop() 刷新剩余日志。
+    """
+    settings = get_settings()
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(settings.log_level.upper())
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
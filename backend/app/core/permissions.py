@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+from enum import StrEnum
+from functools import lru_cache
+
 from app.models.financial import UserRole
 
 
-class Permission(str):
-    """权限枚举"""
+class Permission(StrEnum):
+    """权限枚举（StrEnum：成员即字符串，与原有字符串值比较、哈希、格式化结果一致）"""
     # 数据录入
     DATA_IMPORT = "data:import"
     DATA_CONFIRM = "data:confirm"
@@ -22,9 +25,9 @@ class Permission(str):
     SYSTEM_CONFIG = "system:config"
 
 
-# 角色-权限映射
-ROLE_PERMISSIONS: dict[UserRole, list[str]] = {
-    UserRole.ADMIN: [
+# 角色-权限映射（frozenset：成员判断 O(1)，且可在线程间安全共享）
+ROLE_PERMISSIONS: dict[UserRole, frozenset[Permission]] = {
+    UserRole.ADMIN: frozenset({
         Permission.DATA_IMPORT,
         Permission.DATA_CONFIRM,
         Permission.DATA_VIEW,
@@ -33,22 +36,37 @@ ROLE_PERMISSIONS: dict[UserRole, list[str]] = {
         Permission.NLQ_QUERY,
         Permission.USER_MANAGE,
         Permission.SYSTEM_CONFIG,
-    ],
-    UserRole.FINANCE: [
+    }),
+    UserRole.FINANCE: frozenset({
         Permission.DATA_IMPORT,
         Permission.DATA_CONFIRM,
         Permission.DATA_VIEW,
         Permission.DATA_EXPORT,
-    ],
-    UserRole.VIEWER: [
+    }),
+    UserRole.VIEWER: frozenset({
         Permission.DATA_VIEW,
         Permission.DATA_EXPORT,
-    ],
+    }),
+}
+
+
+# 权限-角色反向映射，模块加载时预计算，依赖检查只需一次 frozenset 成员判断
+PERMISSION_ROLES: dict[Permission, frozenset[UserRole]] = {
+    permission: frozenset(role for role, permissions in ROLE_PERMISSIONS.items() if permission in permissions)
+    for permissions in ROLE_PERMISSIONS.values()
+    for permission in permissions
 }
 
+_NO_PERMISSIONS: frozenset[Permission] = frozenset()
+
+
+def allowed_roles(permission: str) -> frozenset[UserRole]:
+    """返回拥有指定权限的角色集合（未知权限返回空集合）"""
+    return PERMISSION_ROLES.get(permission, frozenset())
+
 
+@lru_cache(maxsize=64)
 def has_permission(user_role: UserRole, permission: str) -> bool:
     """检查角色是否有指定权限"""
-    user_permissions = ROLE_PERMISSIONS.get(user_role, [])
-    return permission in user_permissions
+    return permission in ROLE_PERMISSIONS.get(user_role, _NO_PERMISSIONS)
 
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import logging
+import time
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class FailOpenRedisCache:
+    """Redis 缓存基类：Redis 不可用时静默降级（视为未命中），并在 retry_after 秒内不再尝试连接。"""
+
+    LOG_PREFIX = "[CACHE]"
+
+    def __init__(self, redis_url: str, retry_after: float = 30.0) -> None:
+        self._redis_url = redis_url
+        self._retry_after = retry_after
+        self._client: Redis | None = None
+        self._disabled_until = 0.0
+
+    def _get_client(self, *, bypass_breaker: bool = False) -> Redis | None:
+        """返回 Redis 客户端；熔断期间返回 None，bypass_breaker=True 时仍尝试连接（用于必须送达的失效操作）"""
+        if not bypass_breaker and time.monotonic() < self._disabled_until:
+            return None
+        if self._client is None:
+            self._client = Redis.from_url(
+                self._redis_url,
+                socket_connect_timeout=0.2,
+                socket_timeout=0.2,
+            )
+        return self._client
+
+    def _mark_unavailable(self, error: Exception) -> None:
+        logger.warning("%s Redis unavailable, falling back to database: %s", self.LOG_PREFIX, error)
+        self._disabled_until = time.monotonic() + self._retry_after
+        self._client = None
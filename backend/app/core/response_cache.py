@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Mapping, Optional
+
+import orjson
+from redis.asyncio import Redis
+
+from app.core.redis_cache import FailOpenRedisCache
+
+
+class RedisResponseCache(FailOpenRedisCache):
+    """按命名空间缓存已序列化的响应体，供多个工作进程共享。
+
+    每个命名空间有一个版本号，缓存键包含版本号；数据变更后调用 invalidate() 递增版本号，旧版本的缓存不再被读取，
+    随 TTL 过期。读取方在计算响应之前取得版本号并按该版本写回，计算期间发生的失效会让这次写回落在旧版本上，
+    不会把失效前的数据写进新版本。
+    """
+
+    KEY_PREFIX = "fs:"
+    LOG_PREFIX = "[RESPONSE CACHE]"
+
+    def __init__(self, redis_url: str, ttl: int = 300, retry_after: float = 30.0) -> None:
+        super().__init__(redis_url, retry_after=retry_after)
+        self._ttl = ttl
+        # 尚未成功递增版本号的命名空间：确认失效之前本进程不读写这些命名空间的缓存
+        self._pending_invalidations: set[str] = set()
+
+    @classmethod
+    def entry_key(cls, namespace: str, version: str, params: Mapping[str, Any]) -> str:
+        digest = hashlib.blake2b(orjson.dumps(params, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+        return f"{cls.KEY_PREFIX}{namespace}:v{version}:{digest}"
+
+    @classmethod
+    def version_key(cls, namespace: str) -> str:
+        return f"{cls.KEY_PREFIX}{namespace}:version"
+
+    async def get(self, namespace: str, params: Mapping[str, Any]) -> tuple[Optional[bytes], Optional[str]]:
+        """返回 (缓存的响应体, 命名空间当前版本号)；版本号为 None 表示缓存不可用，调用方不应写回。"""
+        client = await self._ready_client(namespace)
+        if client is None:
+            return None, None
+        try:
+            version = (await client.get(self.version_key(namespace)) or b"0").decode()
+            return await client.get(self.entry_key(namespace, version, params)), version
+        except Exception as e:
+            self._mark_unavailable(e)
+            return None, None
+
+    async def set(self, namespace: str, params: Mapping[str, Any], body: bytes, version: Optional[str]) -> None:
+        """按 get() 返回的版本号写回；版本号已过期时写入的缓存不会再被读取。"""
+        if version is None:
+            return
+        client = await self._ready_client(namespace)
+        if client is None:
+            return
+        try:
+            await client.set(self.entry_key(namespace, version, params), body, ex=self._ttl)
+        except Exception as e:
+            self._mark_unavailable(e)
+
+    async def invalidate(self, namespace: str) -> None:
+        """使命名空间下的全部缓存失效（数据导入、确认或清空后调用）。
+
+        不受熔断影响，总会尝试递增版本号；失败时记为待失效，本进程在成功递增之前跳过该命名空间的缓存。
+        """
+        self._pending_invalidations.add(namespace)
+        client = self._get_client(bypass_breaker=True)
+        if client is not None:
+            await self._flush_invalidation(client, namespace)
+
+    async def _ready_client(self, namespace: str) -> Redis | None:
+        client = self._get_client()
+        if client is None:
+            return None
+        if namespace in self._pending_invalidations and not await self._flush_invalidation(client, namespace):
+            return None
+        return client
+
+    async def _flush_invalidation(self, client: Redis, namespace: str) -> bool:
+        try:
+            await client.incr(self.version_key(namespace))
+        except Exception as e:
+            self._mark_unavailable(e)
+            return False
+        self._pending_invalidations.discard(namespace)
+        return True
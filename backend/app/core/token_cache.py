@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.core.redis_cache import FailOpenRedisCache
+
+
+class RedisTokenCache(FailOpenRedisCache):
+    """令牌 → 用户快照的 Redis 缓存，供多个工作进程共享。
+
+    Redis 不可用时静默降级（返回未命中），并在 retry_after 秒内不再尝试连接，
+    认证流程回退到数据库查询。
+    """
+
+    KEY_PREFIX = "auth:"
+    LOG_PREFIX = "[AUTH CACHE]"
+
+    def __init__(self, redis_url: str, max_ttl: int = 300, retry_after: float = 30.0) -> None:
+        super().__init__(redis_url, retry_after=retry_after)
+        self._max_ttl = max_ttl
+
+    @classmethod
+    def token_key(cls, token: str) -> str:
+        return cls.KEY_PREFIX + hashlib.blake2b(token.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def user_tokens_key(user_id: str) -> str:
+        return f"user:{user_id}:tokens"
+
+    async def get(self, token: str) -> Optional[Dict[str, Any]]:
+        client = self._get_client()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(self.token_key(token))
+        except Exception as e:
+            self._mark_unavailable(e)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set(self, token: str, user: Dict[str, Any], expires_at: Optional[float] = None) -> None:
+        """缓存用户快照，过期时间不超过 max_ttl，也不超过令牌本身的剩余有效期。"""
+        ttl = self._max_ttl
+        if expires_at is not None:
+            ttl = min(ttl, int(expires_at - time.time()))
+        if ttl <= 0:
+            return
+        client = self._get_client()
+        if client is None:
+            return
+        key = self.token_key(token)
+        tokens_key = self.user_tokens_key(user["id"])
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.set(key, json.dumps(user), ex=ttl)
+                pipe.sadd(tokens_key, key)
+                pipe.expire(tokens_key, self._max_ttl)
+                await pipe.execute()
+        except Exception as e:
+            self._mark_unavailable(e)
+
+    async def invalidate_token(self, token: str) -> None:
+        client = self._get_client()
+        if client is None:
+            return
+        try:
+            await client.delete(self.token_key(token))
+        except Exception as e:
+            self._mark_unavailable(e)
+
+    async def invalidate_user(self, user_id: str) -> None:
+        """删除该用户所有已缓存的令牌（角色或状态变更后调用）。"""
+        client = self._get_client()
+        if client is None:
+            return
+        tokens_key = self.user_tokens_key(user_id)
+        try:
+            keys = await client.smembers(tokens_key)
+            await client.delete(tokens_key, *keys)
+        except Exception as e:
+            self._mark_unavailable(e)
@@ -1,13 +1,75 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 
+from app import db
+from app.core.config import get_settings
+from app.core.logging_config import setup_logging
+from app.services.api_source import get_shared_sqlserver_source
 from app.api.v1 import auth, imports, imports_confirm, nlq, overview, expense_forecast, api_sources
 
 
+logger = logging.getLogger(__name__)
+
+
+async def _warm_sqlserver_pool() -> None:
+    source = get_shared_sqlserver_source(get_settings())
+    if source is None:
+        return
+    try:
+        await asyncio.to_thread(source.warm_pool)
+    except Exception as e:
+        logger.warning("[SQL SERVER] Failed to warm connection pool: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    log_listener = setup_logging()
+    try:
+        db.warm_pool()
+    except Exception as e:
+        # 预热失败不影响启动，连接会在首次请求时按需建立
+        logger.warning("[DB] Failed to warm connection pool: %s", e)
+    # SQL Server 登录较慢且可能不可达，放到后台预热，不阻塞启动
+    sqlserver_warmup = asyncio.create_task(_warm_sqlserver_pool())
+    try:
+        yield
+    finally:
+        sqlserver_warmup.cancel()
+        # 关闭异步引擎的连接（aiosqlite 连接持有后台线程，不释放会阻止进程退出）
+        await db.async_engine.dispose()
+        log_listener.stop()
+
+
+def _ensure_unique_routes(app: FastAPI) -> None:
+    """同一方法+路径只允许注册一次，避免重复的路由模块互相遮蔽（例如未鉴权的旧版处理器抢先匹配）。"""
+    seen: set[tuple[str, str]] = set()
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in route.methods:
+            key = (method, route.path)
+            if key in seen:
+                raise RuntimeError(f"Duplicate route registered: {method} {route.path}")
+            seen.add(key)
+
+
 def create_app() -> FastAPI:
-    app = FastAPI(title="FinanceSync API", version="0.1.0")
+    # 响应统一用 orjson 序列化，大体量的预览/原始数据返回明显快于标准库 json
+    app = FastAPI(
+        title="FinanceSync API",
+        version="0.1.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
 
     app.add_middleware(
         CORSMiddleware,
@@ -29,6 +91,7 @@ def create_app() -> FastAPI:
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    _ensure_unique_routes(app)
     return app
 
 
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import enum
+import hashlib
 import uuid
 from datetime import datetime, date
-from typing import Optional
+from decimal import Decimal
+from typing import Any, Optional
 
 from sqlalchemy import (
     Date,
@@ -11,13 +13,17 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     Numeric,
     String,
     Text,
     UniqueConstraint,
     JSON,
     Boolean,
+    event,
+    func,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -57,6 +63,16 @@ class CategoryType(str, enum.Enum):
     FORECAST = "forecast"
 
 
+def _value_enum(enum_cls: type[enum.Enum], length: int) -> Enum:
+    """以枚举值（小写字符串）存为 VARCHAR，与迁移建立的字符串列一致；不使用数据库原生 ENUM 类型。"""
+    return Enum(
+        enum_cls,
+        native_enum=False,
+        length=length,
+        values_callable=lambda members: [member.value for member in members],
+    )
+
+
 class FinanceCategory(Base):
     __tablename__ = "finance_categories"
     __table_args__ = (
@@ -64,9 +80,9 @@ class FinanceCategory(Base):
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    category_type: Mapped[CategoryType] = mapped_column(Enum(CategoryType), nullable=False)
+    category_type: Mapped[CategoryType] = mapped_column(_value_enum(CategoryType, 16), nullable=False)
     name: Mapped[str] = mapped_column(String(128), nullable=False)
-    parent_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id", ondelete="SET NULL"))
+    parent_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id", ondelete="SET NULL"), index=True)
     level: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     full_path: Mapped[str] = mapped_column(String(512), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
@@ -89,21 +105,33 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index(
+            "ix_users_id_active_role",
+            "id",
+            postgresql_include=["is_active", "role", "email", "display_name"],
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     display_name: Mapped[str] = mapped_column(String(128), nullable=False)
-    role: Mapped[UserRole] = mapped_column(Enum(UserRole), nullable=False, default=UserRole.VIEWER)
+    role: Mapped[UserRole] = mapped_column(_value_enum(UserRole, 16), nullable=False, default=UserRole.VIEWER)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
     import_jobs: Mapped[list["ImportJob"]] = relationship(back_populates="user")
 
 
+# 登录按用户名或邮箱做大小写不敏感匹配，使用函数索引避免全表扫描
+Index("ix_users_email_lower", func.lower(User.email))
+Index("ix_users_display_name_lower", func.lower(User.display_name))
+
+
 class Company(Base):
     __tablename__ = "companies"
 
@@ -111,9 +139,9 @@ class Company(Base):
     name: Mapped[str] = mapped_column(String(128), unique=True, nullable=False)
     display_name: Mapped[str] = mapped_column(String(128), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
 
     account_balances: Mapped[list["AccountBalance"]] = relationship(back_populates="company")
@@ -128,14 +156,14 @@ class ImportJob(Base):
     __tablename__ = "import_jobs"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    source_type: Mapped[ImportSource] = mapped_column(Enum(ImportSource), nullable=False)
-    status: Mapped[ImportStatus] = mapped_column(Enum(ImportStatus), nullable=False, default=ImportStatus.PENDING_REVIEW)
+    source_type: Mapped[ImportSource] = mapped_column(_value_enum(ImportSource, 32), nullable=False)
+    status: Mapped[ImportStatus] = mapped_column(_value_enum(ImportStatus, 32), nullable=False, default=ImportStatus.PENDING_REVIEW)
     user_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("users.id"))
     initiator_id: Mapped[str | None] = mapped_column(String(36))  # 保留向后兼容
     initiator_role: Mapped[str | None] = mapped_column(String(64))  # 保留向后兼容
     llm_model: Mapped[str | None] = mapped_column(String(64))
     confidence_score: Mapped[float | None] = mapped_column(Float)
-    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     raw_payload_ref: Mapped[str | None] = mapped_column(String(255))
     error_log: Mapped[str | None] = mapped_column(Text)
@@ -154,7 +182,7 @@ class Attachment(Base):
     storage_path: Mapped[str] = mapped_column(String(255), nullable=False)
     text_snapshot: Mapped[str | None] = mapped_column(Text)
     checksum: Mapped[str | None] = mapped_column(String(128))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     import_job: Mapped[ImportJob] = relationship(back_populates="attachments")
 
@@ -169,9 +197,10 @@ class AccountBalance(Base):
     company_id: Mapped[str] = mapped_column(String(36), ForeignKey("companies.id"), nullable=False)
     import_job_id: Mapped[str] = mapped_column(String(36), ForeignKey("import_jobs.id"))
     reported_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
-    cash_balance: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
-    investment_balance: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
-    total_balance: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    # 金额列在数据库中仍为 NUMERIC(18,2) 精确存储；读出为 float（asdecimal=False），与 Mapped[float] 一致，省去逐行构造 Decimal
+    cash_balance: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
+    investment_balance: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
+    total_balance: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     notes: Mapped[str | None] = mapped_column(Text)
 
@@ -189,7 +218,7 @@ class RevenueRecord(Base):
     month: Mapped[date] = mapped_column(Date, nullable=False)
     category: Mapped[str] = mapped_column(String(64), nullable=False)
     subcategory: Mapped[str | None] = mapped_column(String(64))
-    amount: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    amount: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     confidence: Mapped[float | None] = mapped_column(Float)
     notes: Mapped[str | None] = mapped_column(Text)
@@ -199,18 +228,51 @@ class RevenueRecord(Base):
     category_ref: Mapped[Optional["FinanceCategory"]] = relationship(back_populates="revenue_records")
 
 
+_CENT = Decimal("0.01")
+
+
+def natural_key_hash(
+    company_id: str | None,
+    on_date: date | None,
+    amount: Any,
+    category_id: str | None,
+    description: str | None,
+    account_name: str | None,
+) -> bytes | None:
+    """计算自然键（公司、日期、金额、分类、描述、账户）的 16 字节摘要，用于唯一性校验与去重查询。
+
+    任一部分为空时返回 None：与原多列唯一约束的语义一致，含 NULL 的组合不参与唯一性校验。
+    """
+    parts = (company_id, on_date, amount, category_id, description, account_name)
+    if any(part is None for part in parts):
+        return None
+    # 金额按列精度（两位小数）规范化，保证 10、10.0 与 Decimal("10.00") 得到相同摘要
+    amount_text = str(Decimal(str(amount)).quantize(_CENT))
+    date_text = on_date.isoformat() if isinstance(on_date, date) else str(on_date)
+    raw = "\x1f".join((company_id, date_text, amount_text, category_id, description, account_name))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+
+def _revenue_detail_key_default(context) -> bytes | None:
+    """未显式赋值时，由插入参数计算收入明细的自然键摘要（ORM 与 Core 批量插入都会调用）。"""
+    params = context.get_current_parameters()
+    return natural_key_hash(
+        params.get("company_id"),
+        params.get("occurred_on"),
+        params.get("amount"),
+        params.get("category_id"),
+        params.get("description"),
+        params.get("account_name"),
+    )
+
+
 class RevenueDetail(Base):
     __tablename__ = "revenue_details"
     __table_args__ = (
-        UniqueConstraint(
-            "company_id",
-            "occurred_on",
-            "amount",
-            "category_id",
-            "description",
-            "account_name",
-            name="uq_revenue_detail_natural_key",
-        ),
+        # 以自然键摘要代替六列宽唯一索引：索引项只有 16 字节，重复检查是一次等值查找
+        UniqueConstraint("natural_key_hash", name="uq_revenue_detail_natural_key_hash"),
+        # 自然键不完整时的逐列查重、按公司与日期范围的汇总查询都以这些列为前缀
+        Index("ix_revenue_details_company_occurred_amount", "company_id", "occurred_on", "amount", "category_id"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -218,7 +280,7 @@ class RevenueDetail(Base):
     import_job_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("import_jobs.id"))
     category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"))
     occurred_on: Mapped[date] = mapped_column(Date, nullable=False)
-    amount: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    amount: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     description: Mapped[str | None] = mapped_column(String(255))
     account_name: Mapped[str | None] = mapped_column(String(64))
@@ -227,8 +289,9 @@ class RevenueDetail(Base):
     subcategory_label: Mapped[str | None] = mapped_column(String(128))
     confidence: Mapped[float | None] = mapped_column(Float)
     notes: Mapped[str | None] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    natural_key_hash: Mapped[bytes | None] = mapped_column(LargeBinary(16), default=_revenue_detail_key_default)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     company: Mapped[Company] = relationship(back_populates="revenue_details")
     import_job: Mapped[ImportJob] = relationship()
@@ -241,10 +304,10 @@ class ExpenseRecord(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     company_id: Mapped[str] = mapped_column(String(36), ForeignKey("companies.id"), nullable=False)
     import_job_id: Mapped[str] = mapped_column(String(36), ForeignKey("import_jobs.id"))
-    category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"))
+    category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"), index=True)
     month: Mapped[date] = mapped_column(Date, nullable=False)
     category: Mapped[str] = mapped_column(String(64), nullable=False)
-    amount: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    amount: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     confidence: Mapped[float | None] = mapped_column(Float)
     notes: Mapped[str | None] = mapped_column(Text)
@@ -254,44 +317,85 @@ class ExpenseRecord(Base):
     category_ref: Mapped[Optional["FinanceCategory"]] = relationship(back_populates="expense_records")
 
 
+def _category_root_default(context) -> str | None:
+    """未显式赋值时，从 category_path_text 推导一级分类。"""
+    path_text = context.get_current_parameters().get("category_path_text")
+    if not path_text:
+        return None
+    return path_text.split("/", 1)[0] or None
+
+
+def _income_forecast_key_default(context) -> bytes | None:
+    """未显式赋值时，由插入参数计算收入预测的自然键摘要（ORM 与 Core 批量插入都会调用）。"""
+    params = context.get_current_parameters()
+    return natural_key_hash(
+        params.get("company_id"),
+        params.get("cash_in_date"),
+        params.get("expected_amount"),
+        params.get("category_id"),
+        params.get("description"),
+        params.get("account_name"),
+    )
+
+
 class IncomeForecast(Base):
     __tablename__ = "income_forecasts"
     __table_args__ = (
-        UniqueConstraint(
-            "company_id",
-            "cash_in_date",
-            "expected_amount",
-            "category_id",
-            "description",
-            "account_name",
-            name="uq_income_forecast_natural_key",
-        ),
+        UniqueConstraint("natural_key_hash", name="uq_income_forecast_natural_key_hash"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     company_id: Mapped[str] = mapped_column(String(36), ForeignKey("companies.id"), nullable=False)
     import_job_id: Mapped[str] = mapped_column(String(36), ForeignKey("import_jobs.id"))
-    category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"))
+    category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"), index=True)
     cash_in_date: Mapped[date] = mapped_column(Date, nullable=False)
     product_line: Mapped[str | None] = mapped_column(String(64))
     product_name: Mapped[str | None] = mapped_column(String(64))
-    certainty: Mapped[Certainty] = mapped_column(Enum(Certainty), nullable=False)
+    certainty: Mapped[Certainty] = mapped_column(_value_enum(Certainty, 16), nullable=False)
     category: Mapped[str | None] = mapped_column(String(64))
     category_path_text: Mapped[str | None] = mapped_column(String(512))
+    category_root: Mapped[str | None] = mapped_column(String(128), index=True, default=_category_root_default)
     category_label: Mapped[str | None] = mapped_column(String(128))
     subcategory_label: Mapped[str | None] = mapped_column(String(128))
     description: Mapped[str | None] = mapped_column(String(255))
     account_name: Mapped[str | None] = mapped_column(String(64))
-    expected_amount: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    expected_amount: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     confidence: Mapped[float | None] = mapped_column(Float)
     notes: Mapped[str | None] = mapped_column(Text)
+    natural_key_hash: Mapped[bytes | None] = mapped_column(LargeBinary(16), default=_income_forecast_key_default)
 
     company: Mapped[Company] = relationship(back_populates="income_forecasts")
     import_job: Mapped[ImportJob] = relationship()
     category_ref: Mapped[Optional["FinanceCategory"]] = relationship(back_populates="income_forecasts")
 
 
+@event.listens_for(RevenueDetail, "before_update")
+def _refresh_revenue_detail_key(mapper, connection, target: RevenueDetail) -> None:
+    """通过 ORM 修改记录时，按当前字段重新计算自然键摘要。"""
+    target.natural_key_hash = natural_key_hash(
+        target.company_id,
+        target.occurred_on,
+        target.amount,
+        target.category_id,
+        target.description,
+        target.account_name,
+    )
+
+
+@event.listens_for(IncomeForecast, "before_update")
+def _refresh_income_forecast_key(mapper, connection, target: IncomeForecast) -> None:
+    """通过 ORM 修改记录时，按当前字段重新计算自然键摘要。"""
+    target.natural_key_hash = natural_key_hash(
+        target.company_id,
+        target.cash_in_date,
+        target.expected_amount,
+        target.category_id,
+        target.description,
+        target.account_name,
+    )
+
+
 class ExpenseForecast(Base):
     __tablename__ = "expense_forecasts"
     __table_args__ = (
@@ -304,28 +408,38 @@ class ExpenseForecast(Base):
             "account_name",
             name="uq_expense_forecast_natural_key",
         ),
+        # 按公司与月份汇总/列出支出预测；PostgreSQL 上附带金额与分类列，汇总查询无需回表
+        Index(
+            "ix_expense_forecasts_company_date",
+            "company_id",
+            "cash_out_date",
+            postgresql_include=["expected_amount", "category_id"],
+        ),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     company_id: Mapped[str] = mapped_column(String(36), ForeignKey("companies.id"), nullable=False)
     import_job_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("import_jobs.id"))
-    category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"))
+    category_id: Mapped[str | None] = mapped_column(String(36), ForeignKey("finance_categories.id"), index=True)
     cash_out_date: Mapped[date] = mapped_column(Date, nullable=False)
-    certainty: Mapped[Certainty] = mapped_column(Enum(Certainty), nullable=False, default=Certainty.CERTAIN)
+    certainty: Mapped[Certainty] = mapped_column(_value_enum(Certainty, 16), nullable=False, default=Certainty.CERTAIN)
     category: Mapped[str | None] = mapped_column(String(64))
     category_path_text: Mapped[str | None] = mapped_column(String(512))
     category_label: Mapped[str | None] = mapped_column(String(128))
     subcategory_label: Mapped[str | None] = mapped_column(String(128))
     description: Mapped[str | None] = mapped_column(String(255))
     account_name: Mapped[str | None] = mapped_column(String(64))
-    expected_amount: Mapped[float] = mapped_column(Numeric(18, 2), nullable=False)
+    expected_amount: Mapped[float] = mapped_column(Numeric(18, 2, asdecimal=False), nullable=False)
     currency: Mapped[str] = mapped_column(String(8), default="CNY")
     confidence: Mapped[float | None] = mapped_column(Float)
     notes: Mapped[str | None] = mapped_column(Text)
 
-    company: Mapped[Company] = relationship(back_populates="expense_forecasts")
-    import_job: Mapped[ImportJob] = relationship()
-    category_ref: Mapped[Optional["FinanceCategory"]] = relationship(back_populates="expense_forecasts")
+    # 关联对象不做隐式懒加载：需要时在查询中显式 selectinload/joinedload，未加载就访问会直接报错，避免 N+1 查询
+    company: Mapped[Company] = relationship(back_populates="expense_forecasts", lazy="raise_on_sql")
+    import_job: Mapped[ImportJob] = relationship(lazy="raise_on_sql")
+    category_ref: Mapped[Optional["FinanceCategory"]] = relationship(
+        back_populates="expense_forecasts", lazy="raise_on_sql"
+    )
 
 
 class ConfirmationLog(Base):
@@ -340,7 +454,7 @@ class ConfirmationLog(Base):
     action: Mapped[str] = mapped_column(String(32), nullable=False)
     diff_snapshot: Mapped[dict | None] = mapped_column(JSON)
     comment: Mapped[str | None] = mapped_column(Text)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     import_job: Mapped[ImportJob] = relationship(back_populates="confirmation_logs")
 
@@ -353,9 +467,9 @@ class NlqQuery(Base):
     question: Mapped[str] = mapped_column(Text, nullable=False)
     generated_sql: Mapped[str | None] = mapped_column(Text)
     execution_result_ref: Mapped[str | None] = mapped_column(String(255))
-    chart_type: Mapped[NlqChartType | None] = mapped_column(Enum(NlqChartType))
+    chart_type: Mapped[NlqChartType | None] = mapped_column(_value_enum(NlqChartType, 16))
     chart_config: Mapped[dict | None] = mapped_column(JSON)
     responded_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     latency_ms: Mapped[int | None] = mapped_column(Integer)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,17 +1,51 @@
 from __future__ import annotations
 
+import threading
+import uuid
+import weakref
 from datetime import date, datetime
-from typing import Optional
+from typing import Any, Dict, List, Mapping, Optional, Sequence
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import Row, Select, and_, bindparam, delete, func, insert, select, update
+from sqlalchemy.sql.base import ExecutableOption
 
-from app.models.financial import ExpenseForecast, Company, Certainty
+from app.models.financial import CategoryType, ExpenseForecast, Company, Certainty
 from app.services.category_service import FinanceCategoryService
 
+# 高频语句在模块加载时构建一次，调用时只绑定参数：省去每次构造语句对象的开销，缓存键也保持稳定，始终命中编译缓存
+_GET_BY_ID = select(ExpenseForecast).options(raiseload("*")).where(ExpenseForecast.id == bindparam("id"))
+_GET_COMPANY_ID_BY_NAME = select(Company.id).where(Company.name == bindparam("name"))
+_DELETE_BY_ID = delete(ExpenseForecast).where(ExpenseForecast.id == bindparam("id"))
+
 
 class ExpenseForecastRepository:
-    """支出预测数据仓库"""
+    """支出预测数据仓库
+
+    写操作只登记到会话，默认不 flush：由调用方在工作单元边界（commit 或显式 flush）统一写入，
+    连续写入可合并为批量语句。需要在同一事务内立即读到数据库状态时传入 flush=True。
+    """
+
+    # 占位公司“company-unknown”的 id，按数据库引擎缓存（公司记录不会被删除），避免每次创建都查询一次
+    _unknown_company_ids: "weakref.WeakKeyDictionary[object, str]" = weakref.WeakKeyDictionary()
+    _unknown_company_lock = threading.Lock()
+    # 批量插入每批行数：兼顾单条语句大小与往返次数
+    _BULK_CHUNK_SIZE = 1000
+    # update_fields 允许直接更新的列
+    _UPDATABLE_FIELDS = frozenset(
+        {"description", "account_name", "expected_amount", "category_label", "certainty", "category_id"}
+    )
+
+    # list_slim 返回的列：支出预测明细列表所需字段
+    _SLIM_COLUMNS = (
+        ExpenseForecast.id,
+        ExpenseForecast.cash_out_date,
+        ExpenseForecast.expected_amount,
+        ExpenseForecast.category_label,
+        ExpenseForecast.category,
+        ExpenseForecast.description,
+        ExpenseForecast.account_name,
+    )
 
     def __init__(self, session: Session) -> None:
         self._session = session
@@ -30,6 +64,7 @@ class ExpenseForecastRepository:
         amount: float,
         certainty: Certainty = Certainty.CERTAIN,
         company_id: Optional[str] = None,
+        flush: bool = False,
     ) -> ExpenseForecast:
         """创建支出预测记录"""
         # 解析月份
@@ -38,22 +73,18 @@ class ExpenseForecastRepository:
 
         # 获取或创建公司
         if not company_id:
-            company = self._session.query(Company).filter(Company.name == "company-unknown").first()
-            if not company:
-                company = Company(name="company-unknown", display_name="未知公司")
-                self._session.add(company)
-                self._session.flush()
-            company_id = company.id
+            company_id = self._unknown_company_id()
 
         # 获取分类
         category_id = None
         if category_label:
-            category = self._category_service.find_by_label("expense", category_label)
+            category = self._category_service.find_by_label(CategoryType.EXPENSE, category_label)
             if category:
                 category_id = category.id
 
-        # 创建记录
+        # 创建记录（id 在客户端生成，未 flush 前即可返回给调用方）
         forecast = ExpenseForecast(
+            id=str(uuid.uuid4()),
             company_id=company_id,
             cash_out_date=cash_out_date,
             category_id=category_id,
@@ -64,12 +95,124 @@ class ExpenseForecastRepository:
             certainty=certainty,
         )
         self._session.add(forecast)
-        self._session.flush()
+        if flush:
+            self._session.flush()
         return forecast
 
-    def get_by_id(self, forecast_id: str) -> Optional[ExpenseForecast]:
+    def bulk_create(self, items: Sequence[Mapping[str, Any]]) -> List[str]:
+        """批量创建支出预测记录，返回新记录的 id（与 items 顺序一致）
+
+        每项的键与 create() 的参数相同。公司与分类只解析一次，记录按批以 executemany 写入，
+        不逐条构造 ORM 对象、也不逐条 flush。
+        """
+        if not items:
+            return []
+
+        unknown_company_id: Optional[str] = None
+        if any(not item.get("company_id") for item in items):
+            unknown_company_id = self._unknown_company_id()
+        categories = self._category_service.find_by_labels(
+            CategoryType.EXPENSE, (item.get("category_label") for item in items)
+        )
+        # 占位公司可能在本事务中刚创建，先写入再插入引用它的记录
+        self._session.flush()
+
+        ids: List[str] = []
+        rows: List[Dict[str, Any]] = []
+        for item in items:
+            year, month_num = map(int, item["month"].split("-"))
+            category_label = item.get("category_label")
+            forecast_id = str(uuid.uuid4())
+            ids.append(forecast_id)
+            rows.append(
+                {
+                    "id": forecast_id,
+                    "company_id": item.get("company_id") or unknown_company_id,
+                    "cash_out_date": date(year, month_num, 1),
+                    "category_id": categories[category_label].id if category_label in categories else None,
+                    "category_label": category_label,
+                    "description": item.get("description"),
+                    "account_name": item.get("account_name"),
+                    "expected_amount": item["amount"],
+                    "certainty": item.get("certainty") or Certainty.CERTAIN,
+                }
+            )
+
+        # 使用表级 INSERT：ORM 批量插入会按“非空列集合”把相邻行拆成多条语句，表级 INSERT 整批一条 executemany
+        stmt = insert(ExpenseForecast.__table__)
+        for start in range(0, len(rows), self._BULK_CHUNK_SIZE):
+            self._session.execute(stmt, rows[start:start + self._BULK_CHUNK_SIZE])
+        return ids
+
+    def _unknown_company_id(self) -> str:
+        """返回占位公司的 id，不存在时创建"""
+        bind = self._session.get_bind()
+        with self._unknown_company_lock:
+            cached = self._unknown_company_ids.get(bind)
+        if cached is not None:
+            return cached
+
+        # 本会话中已登记、尚未 flush 的占位公司（会话未开启 autoflush，查询看不到它）；回滚后对象会被移出会话
+        pending = self._session.info.get("pending_unknown_company")
+        if pending is not None and pending in self._session:
+            return pending.id
+
+        company_id = self._session.execute(_GET_COMPANY_ID_BY_NAME, {"name": "company-unknown"}).scalar()
+        if company_id is None:
+            # id 在客户端生成，无需 flush 取回；同一次 flush 中公司记录按外键依赖先于引用它的记录写入
+            company = Company(id=str(uuid.uuid4()), name="company-unknown", display_name="未知公司")
+            self._session.add(company)
+            self._session.info["pending_unknown_company"] = company
+            # 新建的记录尚未提交，事务回滚后该 id 失效，因此不缓存；下次查询命中已提交的记录时再缓存
+            return company.id
+
+        with self._unknown_company_lock:
+            self._unknown_company_ids[bind] = company_id
+        return company_id
+
+    def _base_query(self, *load_options: ExecutableOption) -> Select:
+        """支出预测查询的公共起点：默认禁止隐式懒加载关联对象（访问时立即报错，而不是逐行补查）
+
+        需要关联对象的调用方传入 selectinload(...) 等加载选项，随查询一并预加载。
+        """
+        return select(ExpenseForecast).options(*load_options, raiseload("*"))
+
+    def get_by_id(self, forecast_id: str, *load_options: ExecutableOption) -> Optional[ExpenseForecast]:
         """根据ID获取支出预测记录"""
-        return self._session.query(ExpenseForecast).filter(ExpenseForecast.id == forecast_id).first()
+        if not load_options:
+            return self._session.execute(_GET_BY_ID, {"id": forecast_id}).scalar_one_or_none()
+        return self._session.scalars(
+            self._base_query(*load_options).where(ExpenseForecast.id == forecast_id)
+        ).first()
+
+    def list_by_company(
+        self,
+        company_id: Optional[str],
+        start: date,
+        end: date,
+        *load_options: ExecutableOption,
+    ) -> List[ExpenseForecast]:
+        """按公司（为空时不过滤）与日期范围 [start, end) 列出支出预测记录"""
+        stmt = self._base_query(*load_options).where(
+            ExpenseForecast.cash_out_date >= start,
+            ExpenseForecast.cash_out_date < end,
+        )
+        if company_id:
+            stmt = stmt.where(ExpenseForecast.company_id == company_id)
+        return list(self._session.scalars(stmt))
+
+    def list_slim(self, company_id: Optional[str], start: date, end: date) -> List[Row]:
+        """与 list_by_company 条件相同，但只取列表/图表展示用到的列（见 _SLIM_COLUMNS），返回 Row 而非 ORM 实体
+
+        不构造实体、不登记身份映射，也不对未用到的列做类型转换。
+        """
+        stmt = select(*self._SLIM_COLUMNS).where(
+            ExpenseForecast.cash_out_date >= start,
+            ExpenseForecast.cash_out_date < end,
+        )
+        if company_id:
+            stmt = stmt.where(ExpenseForecast.company_id == company_id)
+        return list(self._session.execute(stmt))
 
     def update(
         self,
@@ -79,40 +222,80 @@ class ExpenseForecastRepository:
         amount: Optional[float] = None,
         category_label: Optional[str] = None,
         certainty: Optional[Certainty] = None,
+        flush: bool = False,
     ) -> Optional[ExpenseForecast]:
-        """更新支出预测记录"""
+        """更新支出预测记录（值为 None 的字段保持不变），返回更新后的记录"""
+        changes = {
+            key: value
+            for key, value in (
+                ("description", description),
+                ("account_name", account_name),
+                ("expected_amount", amount),
+                ("category_label", category_label),
+                ("certainty", certainty),
+            )
+            if value is not None
+        }
+        if not changes:
+            return self.get_by_id(forecast_id)
+
+        values = self._column_values(changes)
+        if self._session.get_bind().dialect.update_returning:
+            # UPDATE ... RETURNING：一条语句完成更新并取回整行，省去先 SELECT 再 UPDATE 的往返
+            stmt = (
+                update(ExpenseForecast)
+                .where(ExpenseForecast.id == forecast_id)
+                .values(**values)
+                .returning(ExpenseForecast)
+                .options(raiseload("*"))
+            )
+            return self._session.scalars(stmt).first()
+
         forecast = self.get_by_id(forecast_id)
         if not forecast:
             return None
+        for key, value in values.items():
+            setattr(forecast, key, value)
+        if flush:
+            self._session.flush()
+        return forecast
 
-        if description is not None:
-            forecast.description = description
-        if account_name is not None:
-            forecast.account_name = account_name
-        if amount is not None:
-            forecast.expected_amount = amount
-        if category_label is not None:
-            forecast.category_label = category_label
-            # 更新分类ID
-            if category_label:
-                category = self._category_service.find_by_label("expense", category_label)
-                forecast.category_id = category.id if category else None
-            else:
-                forecast.category_id = None
-        if certainty is not None:
-            forecast.certainty = certainty
+    def update_fields(self, forecast_id: str, **changes: Any) -> int:
+        """只按列更新、不取回记录，返回受影响的行数
 
-        self._session.add(forecast)
-        self._session.flush()
-        return forecast
+        可更新的列见 _UPDATABLE_FIELDS；传入 category_label 时同时解析 category_id。
+        """
+        unknown = set(changes) - self._UPDATABLE_FIELDS
+        if unknown:
+            raise ValueError(f"Unsupported expense forecast fields: {', '.join(sorted(unknown))}")
+        if not changes:
+            return 0
+        result = self._session.execute(
+            update(ExpenseForecast)
+            .where(ExpenseForecast.id == forecast_id)
+            .values(**self._column_values(changes)),
+            execution_options={"synchronize_session": False},
+        )
+        return result.rowcount
+
+    def _column_values(self, changes: Mapping[str, Any]) -> Dict[str, Any]:
+        """把待更新字段转换为列值：分类标签变更时一并解析分类ID（空标签清空分类）"""
+        values = dict(changes)
+        if "category_label" in values and "category_id" not in values:
+            category_label = values["category_label"]
+            category = (
+                self._category_service.find_by_label(CategoryType.EXPENSE, category_label)
+                if category_label
+                else None
+            )
+            values["category_id"] = category.id if category else None
+        return values
 
     def delete(self, forecast_id: str) -> bool:
-        """删除支出预测记录"""
-        forecast = self.get_by_id(forecast_id)
-        if not forecast:
-            return False
+        """删除支出预测记录，返回是否存在该记录
 
-        self._session.delete(forecast)
-        self._session.flush()
-        return True
+        直接执行 DELETE，不先 SELECT 取回对象；没有其他表引用支出预测，无需 ORM 级联。
+        """
+        result = self._session.execute(_DELETE_BY_ID, {"id": forecast_id})
+        return result.rowcount > 0
 
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-import json
+import logging
+import uuid
+from collections import deque
 from datetime import UTC, date, datetime
 from decimal import Decimal
-from typing import Any, Dict, Iterable, Sequence
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, selectinload
 
 from app.models.financial import (
     AccountBalance,
@@ -22,10 +28,53 @@ from app.models.financial import (
     RevenueDetail,
     Company,
     CategoryType,
+    natural_key_hash,
 )
 from app.schemas.imports import CandidateRecord, ConfirmationAction, ConfirmationOperation, RecordType
 from app.services.category_service import FinanceCategoryService
 
+logger = logging.getLogger(__name__)
+
+_CANDIDATE_RECORDS = TypeAdapter(list[CandidateRecord])
+
+# 批量查重、批量删除时每条 IN 语句携带的键数
+_PREFETCH_CHUNK_SIZE = 500
+
+# payload 字段的别名（按优先级排列），由 _first 依次取第一个有值的键
+_COMPANY_ID_ALIASES = ("company_id", "companyId")
+_IN_FORECAST_DATE_ALIASES = (
+    "cash_in_date",
+    "cashInDate",
+    "occurred_on",
+    "occurredOn",
+    "forecast_date",
+    "forecastDate",
+)
+_OUT_FORECAST_DATE_ALIASES = (
+    "cash_out_date",
+    "cashOutDate",
+    "occurred_on",
+    "occurredOn",
+    "forecast_date",
+    "forecastDate",
+)
+_REVENUE_DATE_ALIASES = ("occurred_on", "occurredOn", "date")
+_FORECAST_AMOUNT_ALIASES = ("expected_amount", "amount")
+_DESCRIPTION_ALIASES = ("description", "item", "item_name")
+_ACCOUNT_ALIASES = ("account_name", "account", "accountName")
+
+# 支持 INSERT ... ON CONFLICT 的方言
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+# 账户余额覆盖写入时更新的列
+_BALANCE_UPDATE_COLUMNS = (
+    "import_job_id",
+    "cash_balance",
+    "investment_balance",
+    "total_balance",
+    "currency",
+    "notes",
+)
+
 
 class DuplicateRecordError(RuntimeError):
     """Raised when a record already exists and overwrite was not permitted."""
@@ -42,8 +91,27 @@ class ImportJobRepository:
     def __init__(self, session: Session) -> None:
         self._session = session
         self._category_service = FinanceCategoryService(session)
-        self._income_forecast_cleared_companies: set[str] = set()
-        self._expense_forecast_cleared_companies: set[str] = set()
+        # apply_confirmation 期间待批量写入的行（按模型分组），以及尚未写入的账户余额（按自然键索引，用于批内查重）
+        self._pending_rows: dict[type, list[dict[str, Any]]] = {}
+        self._pending_balances: dict[tuple[str, datetime], dict[str, Any]] = {}
+        # 允许覆盖的待写入账户余额 ID：写入时与已有记录冲突则更新，否则冲突视为重复
+        self._overwrite_balance_ids: set[str] = set()
+        # 本次确认中是否已确认占位公司存在（缺少公司 ID 的记录都归到占位公司）
+        self._placeholder_ensured = False
+        # 本次确认中已解析的分类：(分类类型, 路径) -> 分类 ID；一次导入通常只有少量不同路径
+        self._category_ids: dict[tuple[CategoryType, tuple[str, ...]], str | None] = {}
+        # _prefetch_existing 批量查出的已有记录（未命中为 None）
+        self._existing_balances: dict[tuple[str, datetime], AccountBalance | None] = {}
+        self._existing_revenue: dict[bytes, RevenueDetail | None] = {}
+        # 各记录类型的写入方法，_persist_record 据此分派
+        self._handlers: dict[RecordType, Callable[..., str]] = {
+            RecordType.ACCOUNT_BALANCE: self._persist_account_balance,
+            RecordType.REVENUE: self._persist_revenue,
+            RecordType.EXPENSE: self._persist_expense,
+            RecordType.INCOME_FORECAST: self._persist_income_forecast,
+            RecordType.REVENUE_FORECAST: self._persist_income_forecast,
+            RecordType.EXPENSE_FORECAST: self._persist_expense_forecast,
+        }
 
     @property
     def session(self) -> Session:
@@ -73,23 +141,27 @@ class ImportJobRepository:
         self._session.flush()
         return job
 
-    def get_job(self, job_id: str) -> ImportJob | None:
+    def get_job(self, job_id: str, *, with_attachments: bool = False) -> ImportJob | None:
+        """按 ID 获取任务；with_attachments=True 时用 selectin 一并加载附件，避免访问时再懒加载。"""
+        if with_attachments:
+            return self.session.get(ImportJob, job_id, options=[selectinload(ImportJob.attachments)])
         return self.session.get(ImportJob, job_id)
 
-    def save_preview(self, job: ImportJob, preview: Sequence[CandidateRecord]) -> None:
-        job.raw_payload_ref = json.dumps(
-            [record.model_dump(mode="json", by_alias=True) for record in preview],
-            ensure_ascii=False,
-        )
+    def save_preview(self, job: ImportJob, preview: Sequence[CandidateRecord]) -> list[dict[str, Any]]:
+        """持久化预览，并返回序列化后的记录（调用方可直接用于响应，无需再次序列化）。"""
+        # 与 load_preview 共用同一个 TypeAdapter：整份列表一次序列化，不逐条调用 model_dump
+        payload = _CANDIDATE_RECORDS.dump_python(list(preview), mode="json", by_alias=True)
+        job.raw_payload_ref = orjson.dumps(payload).decode("utf-8")
         job.confidence_score = _average_confidence(preview)
         self._session.add(job)
         self._session.flush()
+        return payload
 
     def load_preview(self, job: ImportJob) -> list[CandidateRecord]:
         if not job.raw_payload_ref:
             return []
-        payload = json.loads(job.raw_payload_ref)
-        return [CandidateRecord.model_validate(item) for item in payload]
+        # 直接从 JSON 文本校验，省去先解析成字典列表再逐条校验的中间步骤
+        return _CANDIDATE_RECORDS.validate_json(job.raw_payload_ref)
 
     def complete_job(self, job: ImportJob, status: ImportStatus) -> None:
         job.status = status
@@ -110,6 +182,23 @@ class ImportJobRepository:
         self._session.flush()
         return attachment
 
+    def add_attachments(self, job: ImportJob, attachments: Sequence[Dict[str, Any]]) -> None:
+        """批量写入附件记录（每项包含 file_type、storage_path，可选 checksum），一条 INSERT 完成。"""
+        if not attachments:
+            return
+        self._session.execute(
+            insert(Attachment),
+            [
+                {
+                    "import_job_id": job.id,
+                    "file_type": item["file_type"],
+                    "storage_path": item["storage_path"],
+                    "checksum": item.get("checksum"),
+                }
+                for item in attachments
+            ],
+        )
+
     # ------------------------------------------------------------------ #
     # Confirmation & persistence
     # ------------------------------------------------------------------ #
@@ -122,26 +211,44 @@ class ImportJobRepository:
         rejected = 0
         resulting_records: list[CandidateRecord] = []
 
-        preview_lookup: dict[RecordType, list[CandidateRecord]] = {}
+        # 每次确认重新积累待写入的行；占位公司与分类也重新确认一次（上次确认可能已回滚）
+        self._pending_rows = {}
+        self._pending_balances = {}
+        self._overwrite_balance_ids = set()
+        self._placeholder_ensured = False
+        self._category_ids = {}
+        # 按类型排队的预览记录，未携带 payload 的操作依次取用（deque 头部弹出为 O(1)）
+        preview_lookup: dict[RecordType, deque[CandidateRecord]] = {}
         for record in self.load_preview(job):
-            preview_lookup.setdefault(record.record_type, []).append(record)
+            preview_lookup.setdefault(record.record_type, deque()).append(record)
 
+        # 先确定每条通过的操作对应的 payload，并预先规范化收入明细，以便批量查重
+        resolved: list[tuple[ConfirmationAction, Dict[str, Any] | None, Dict[str, Any] | None]] = []
         for action in actions:
             if action.operation is ConfirmationOperation.REJECT:
-                rejected += 1
-                self._log(job, action, record_id=None)
+                resolved.append((action, None, None))
                 continue
-
             payload = action.payload
             if payload is None:
-                candidate_list = preview_lookup.get(action.record_type, [])
-                payload = candidate_list.pop(0).payload if candidate_list else {}
+                candidate_list = preview_lookup.get(action.record_type)
+                payload = candidate_list.popleft().payload if candidate_list else {}
+            prepared = self._prepare_revenue(payload) if action.record_type is RecordType.REVENUE else None
+            resolved.append((action, payload, prepared))
+        self._prefetch_existing(job, resolved)
+        self._reset_forecasts(resolved)
+
+        for action, payload, prepared in resolved:
+            if payload is None:
+                rejected += 1
+                self._log(job, action, record_id=None)
+                continue
 
             record_id = self._persist_record(
                 job,
                 action.record_type,
                 payload,
                 overwrite=bool(action.overwrite),
+                prepared=prepared,
             )
             approved += 1
             self._log(job, action, record_id=record_id)
@@ -154,21 +261,149 @@ class ImportJobRepository:
                 )
             )
 
+        self._insert_pending_rows()
         self.complete_job(job, ImportStatus.APPROVED if approved else ImportStatus.REJECTED)
         return approved, rejected, resulting_records
 
+    def _prefetch_existing(
+        self,
+        job: ImportJob,
+        resolved: Sequence[tuple[ConfirmationAction, Dict[str, Any] | None, Dict[str, Any] | None]],
+    ) -> None:
+        """批量查出本次确认可能重复的已有记录，代替逐条查重：
+
+        - 账户余额按 (公司, 报告时间) 一次 tuple IN 查询；
+        - 自然键齐全的收入明细按摘要一次 IN 查询（排除当前任务的记录），其余仍逐条查询。
+        查询过的键即使未命中也会记录为 None，_persist_record 据此不再访问数据库。
+        """
+        balance_keys: set[tuple[str, datetime]] = set()
+        revenue_hashes: set[bytes] = set()
+        for action, payload, prepared in resolved:
+            if payload is None:
+                continue
+            if action.record_type is RecordType.ACCOUNT_BALANCE and payload.get("reported_at"):
+                balance_keys.add((self._resolve_company_id(payload), _as_datetime(payload["reported_at"])))
+            elif prepared is not None and prepared["key_hash"] is not None:
+                revenue_hashes.add(prepared["key_hash"])
+
+        self._existing_balances = dict.fromkeys(balance_keys)
+        # 不保存时区的数据库（如 SQLite）取回的是不带时区的时间，同时按去掉时区的值建立映射
+        key_lookup: dict[tuple[str, datetime], tuple[str, datetime]] = {}
+        for key in balance_keys:
+            key_lookup[key] = key
+            key_lookup[(key[0], key[1].replace(tzinfo=None))] = key
+        keys = list(balance_keys)
+        for start in range(0, len(keys), _PREFETCH_CHUNK_SIZE):
+            stmt = select(AccountBalance).where(
+                tuple_(AccountBalance.company_id, AccountBalance.reported_at).in_(
+                    keys[start:start + _PREFETCH_CHUNK_SIZE]
+                )
+            )
+            for balance in self._session.scalars(stmt):
+                key = key_lookup.get((balance.company_id, balance.reported_at))
+                if key is not None:
+                    self._existing_balances[key] = balance
+
+        self._existing_revenue = dict.fromkeys(revenue_hashes)
+        hashes = list(revenue_hashes)
+        for start in range(0, len(hashes), _PREFETCH_CHUNK_SIZE):
+            stmt = select(RevenueDetail).where(
+                RevenueDetail.natural_key_hash.in_(hashes[start:start + _PREFETCH_CHUNK_SIZE]),
+                RevenueDetail.import_job_id != job.id,
+            )
+            for detail in self._session.scalars(stmt):
+                self._existing_revenue[detail.natural_key_hash] = detail
+
+    def _reset_forecasts(
+        self,
+        resolved: Sequence[tuple[ConfirmationAction, Dict[str, Any] | None, Dict[str, Any] | None]],
+    ) -> None:
+        """预测数据按公司整体替换：写入前按类型一次性删除本次涉及公司的已有预测（每种预测一条 DELETE ... IN）。"""
+        companies: dict[type, set[str]] = {IncomeForecast: set(), ExpenseForecast: set()}
+        for action, payload, _prepared in resolved:
+            if payload is None:
+                continue
+            if action.record_type in (RecordType.INCOME_FORECAST, RecordType.REVENUE_FORECAST):
+                companies[IncomeForecast].add(self._resolve_company_id(payload))
+            elif action.record_type is RecordType.EXPENSE_FORECAST:
+                companies[ExpenseForecast].add(self._resolve_company_id(payload))
+
+        for model, company_ids in companies.items():
+            ids = list(company_ids)
+            for start in range(0, len(ids), _PREFETCH_CHUNK_SIZE):
+                self._session.execute(
+                    delete(model).where(model.company_id.in_(ids[start:start + _PREFETCH_CHUNK_SIZE])),
+                    execution_options={"synchronize_session": False},
+                )
+
     def _log(self, job: ImportJob, action: ConfirmationAction, record_id: str | None) -> None:
-        log = ConfirmationLog(
-            import_job_id=job.id,
-            record_type=action.record_type.value,
-            record_id=record_id,
-            actor_id=job.initiator_id,
-            actor_role=job.initiator_role,
-            action=action.operation.value,
-            diff_snapshot=action.payload,
-            comment=action.comment,
+        self._pending_rows.setdefault(ConfirmationLog, []).append(
+            {
+                "id": str(uuid.uuid4()),
+                "import_job_id": job.id,
+                "record_type": action.record_type.value,
+                "record_id": record_id,
+                "actor_id": job.initiator_id,
+                "actor_role": job.initiator_role,
+                "action": action.operation.value,
+                "diff_snapshot": action.payload,
+                "comment": action.comment,
+            }
         )
-        self._session.add(log)
+
+    def _insert_pending_rows(self) -> None:
+        """按表批量写入本次确认积累的记录：每张表一条 executemany，确认日志最后写入。
+
+        使用表级 INSERT 而非 ORM 批量插入：后者会按“非空列集合”把相邻行拆成多条语句。
+        列默认值（主键以外的 Python 端默认值，如 category_root、natural_key_hash）由 Core 逐行计算。
+        """
+        # 唯一的一次 flush：写入占位公司与被覆盖的已有记录（Core INSERT 不会自动 flush 会话中的挂起对象）
+        self._session.flush()
+        for model in (AccountBalance, RevenueDetail, ExpenseRecord, IncomeForecast, ExpenseForecast, ConfirmationLog):
+            rows = self._pending_rows.pop(model, None)
+            if not rows:
+                continue
+            if model is AccountBalance:
+                self._upsert_balances(rows)
+            else:
+                self._session.execute(insert(model.__table__), rows)
+
+    def _upsert_balances(self, rows: list[dict[str, Any]]) -> None:
+        """写入账户余额：支持的方言上使用 INSERT ... ON CONFLICT (company_id, reported_at)。
+
+        查重已由 _prefetch_existing 批量完成，这里处理的是查重之后、写入之前被并发写入的同一余额：
+        允许覆盖的行 DO UPDATE 合并为一条语句；其余行 DO NOTHING，未写入的行按重复记录报错（而不是唯一约束异常）。
+        """
+        table = AccountBalance.__table__
+        dialect_insert = _UPSERT_INSERTS.get(self._session.get_bind().dialect.name)
+        if dialect_insert is None:
+            self._session.execute(insert(table), rows)
+            return
+
+        index_elements = [table.c.company_id, table.c.reported_at]
+        upsert_rows = [row for row in rows if row["id"] in self._overwrite_balance_ids]
+        if upsert_rows:
+            stmt = dialect_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: stmt.excluded[column] for column in _BALANCE_UPDATE_COLUMNS},
+            )
+            self._session.execute(stmt, upsert_rows)
+
+        insert_rows = [row for row in rows if row["id"] not in self._overwrite_balance_ids]
+        if insert_rows:
+            stmt = (
+                dialect_insert(table)
+                .on_conflict_do_nothing(index_elements=index_elements)
+                .returning(table.c.id)
+            )
+            inserted = set(self._session.scalars(stmt, insert_rows))
+            for row in insert_rows:
+                if row["id"] not in inserted:
+                    raise DuplicateRecordError(
+                        RecordType.ACCOUNT_BALANCE,
+                        {"companyId": row["company_id"], "reportedAt": row["reported_at"].isoformat()},
+                    )
 
     _placeholder_company_id = "company-unknown"
 
@@ -179,89 +414,410 @@ class ImportJobRepository:
         payload: Dict[str, Any],
         *,
         overwrite: bool,
+        prepared: Dict[str, Any] | None = None,
+    ) -> str:
+        """根据 record_type 生成待写入的财务数据行（apply_confirmation 结束时批量插入），并返回记录 ID。
+
+        按类型分派到 _persist_* 方法（见 __init__ 中的 _handlers）。
+        prepared 为收入明细预先规范化的字段（见 _prepare_revenue），省略时在此规范化。
+        """
+        handler = self._handlers.get(record_type)
+        if handler is None:
+            raise ValueError(f"Unsupported record type: {record_type}")
+        return handler(job, payload, overwrite, prepared)
+
+    def _add_pending(self, model: type, row: Dict[str, Any]) -> str:
+        """登记待写入的行，由 apply_confirmation 结束时按表批量插入；主键在客户端生成，确认日志可直接引用"""
+        row["id"] = str(uuid.uuid4())
+        self._pending_rows.setdefault(model, []).append(row)
+        return row["id"]
+
+
+    def _persist_account_balance(
+        self,
+        job: ImportJob,
+        payload: Dict[str, Any],
+        overwrite: bool,
+        prepared: Dict[str, Any] | None,
     ) -> str:
-        """根据 record_type 保存财务数据，并返回记录 ID。"""
-        if record_type is RecordType.ACCOUNT_BALANCE:
-            company_id = self._resolve_company_id(payload)
-            reported_at = _as_datetime(payload["reported_at"])
+        """账户余额：批内或库中已有同一 (公司, 报告时间) 时按 overwrite 覆盖或报重复"""
+        company_id = self._resolve_company_id(payload)
+        reported_at = _as_datetime(payload["reported_at"])
+
+        balance_key = (company_id, reported_at)
+        pending = self._pending_balances.get(balance_key)
+        if pending is not None:
+            # 本批次中已登记、尚未写入数据库的同一余额
+            if not overwrite:
+                raise DuplicateRecordError(
+                    RecordType.ACCOUNT_BALANCE,
+                    {"companyId": company_id, "reportedAt": reported_at.isoformat()},
+                )
+            for key in ("cash_balance", "investment_balance", "total_balance", "currency", "notes"):
+                pending[key] = payload.get(key, pending[key])
+            self._overwrite_balance_ids.add(pending["id"])
+            return pending["id"]
 
+        if balance_key in self._existing_balances:
+            existing = self._existing_balances[balance_key]
+        else:
             existing = self.session.execute(
                 select(AccountBalance).where(
                     AccountBalance.company_id == company_id,
                     AccountBalance.reported_at == reported_at,
                 )
             ).scalar_one_or_none()
-            if existing:
-                if not overwrite:
-                    raise DuplicateRecordError(
-                        record_type,
-                        {"companyId": company_id, "reportedAt": reported_at.isoformat()},
-                    )
-                existing.import_job_id = job.id
-                existing.cash_balance = payload.get("cash_balance", existing.cash_balance)
-                existing.investment_balance = payload.get(
-                    "investment_balance", existing.investment_balance
+        if existing:
+            if not overwrite:
+                raise DuplicateRecordError(
+                    RecordType.ACCOUNT_BALANCE,
+                    {"companyId": company_id, "reportedAt": reported_at.isoformat()},
                 )
-                existing.total_balance = payload.get("total_balance", existing.total_balance)
-                existing.currency = payload.get("currency", existing.currency)
-                existing.notes = payload.get("notes", existing.notes)
-                self._session.flush()
-                return existing.id
-
-            record = AccountBalance(
-                company_id=company_id,
-                import_job_id=job.id,
-                reported_at=reported_at,
-                cash_balance=payload.get("cash_balance", 0),
-                investment_balance=payload.get("investment_balance", 0),
-                total_balance=payload.get("total_balance", 0),
-                currency=payload.get("currency", "CNY"),
-                notes=payload.get("notes"),
+            existing.import_job_id = job.id
+            existing.cash_balance = payload.get("cash_balance", existing.cash_balance)
+            existing.investment_balance = payload.get(
+                "investment_balance", existing.investment_balance
             )
-        elif record_type is RecordType.REVENUE:
-            company_id = self._resolve_company_id(payload)
-            raw_occurred = payload.get("occurred_on") or payload.get("occurredOn") or payload.get("date")
-            if not raw_occurred:
-                raise ValueError("Revenue detail missing occurred_on/date field")
-            occurred_on = _as_date(raw_occurred)
-            payload["occurred_on"] = occurred_on.isoformat()
-
-            category_id = self._ensure_category(
-                payload,
-                CategoryType.REVENUE,
-                fallback_keys=[
-                    "category",
-                    "subcategory",
-                    "category_level1",
-                    "categoryLevel1",
-                    "category_level2",
-                    "categoryLevel2",
-                ],
+            existing.total_balance = payload.get("total_balance", existing.total_balance)
+            existing.currency = payload.get("currency", existing.currency)
+            existing.notes = payload.get("notes", existing.notes)
+            return existing.id
+
+        row = {
+            "company_id": company_id,
+            "import_job_id": job.id,
+            "reported_at": reported_at,
+            "cash_balance": payload.get("cash_balance", 0),
+            "investment_balance": payload.get("investment_balance", 0),
+            "total_balance": payload.get("total_balance", 0),
+            "currency": payload.get("currency", "CNY"),
+            "notes": payload.get("notes"),
+        }
+        record_id = self._add_pending(AccountBalance, row)
+        self._pending_balances[balance_key] = row
+        if overwrite:
+            self._overwrite_balance_ids.add(record_id)
+        return record_id
+
+    def _persist_revenue(
+        self,
+        job: ImportJob,
+        payload: Dict[str, Any],
+        overwrite: bool,
+        prepared: Dict[str, Any] | None,
+    ) -> str:
+        """收入明细：按自然键查重，已有记录时按 overwrite 覆盖或报重复"""
+        fields = prepared if prepared is not None else self._prepare_revenue(payload)
+        company_id = fields["company_id"]
+        occurred_on = fields["occurred_on"]
+        category_id = fields["category_id"]
+        amount_value = fields["amount_value"]
+        description = fields["description"]
+        account_name = fields["account_name"]
+        category_text = fields["category_text"]
+        category_label = fields["category_label"]
+        subcategory_label = fields["subcategory_label"]
+        existing_detail = self._find_existing_revenue(job, fields)
+
+        conflict_info = {
+            "companyId": company_id,
+            "occurredOn": occurred_on.isoformat(),
+            "category": payload.get("category"),
+            "categoryPath": payload.get("category_path_text"),
+            "categoryLabel": category_label,
+            "subcategory": subcategory_label,
+            "description": description,
+            "accountName": account_name,
+            "amount": float(amount_value),
+        }
+
+        if existing_detail:
+            if not overwrite:
+                raise DuplicateRecordError(RecordType.REVENUE, conflict_info)
+            existing_detail.import_job_id = job.id
+            existing_detail.category_id = category_id or existing_detail.category_id
+            existing_detail.category_path_text = category_text or existing_detail.category_path_text
+            existing_detail.category_label = category_label or existing_detail.category_label
+            existing_detail.subcategory_label = subcategory_label or existing_detail.subcategory_label
+            existing_detail.amount = amount_value
+            existing_detail.currency = payload.get("currency", existing_detail.currency)
+            existing_detail.description = description
+            existing_detail.account_name = account_name
+            existing_detail.confidence = payload.get("confidence", existing_detail.confidence)
+            existing_detail.notes = payload.get("notes", existing_detail.notes)
+            return existing_detail.id
+
+        row = {
+            "company_id": company_id,
+            "import_job_id": job.id,
+            "category_id": category_id,
+            "occurred_on": occurred_on,
+            "amount": amount_value,
+            "currency": payload.get("currency", "CNY"),
+            "description": description,
+            "account_name": account_name,
+            "category_path_text": category_text,
+            "category_label": category_label,
+            "subcategory_label": subcategory_label,
+            "confidence": payload.get("confidence"),
+            "notes": payload.get("notes"),
+        }
+        return self._add_pending(RevenueDetail, row)
+
+    def _persist_expense(
+        self,
+        job: ImportJob,
+        payload: Dict[str, Any],
+        overwrite: bool,
+        prepared: Dict[str, Any] | None,
+    ) -> str:
+        """支出记录"""
+        category_id = self._ensure_category(
+            payload,
+            CategoryType.EXPENSE,
+            fallback_keys=["category"],
+        )
+        company_id = self._resolve_company_id(payload)
+        row = {
+            "company_id": company_id,
+            "import_job_id": job.id,
+            "category_id": category_id,
+            "month": _as_date(payload["month"]),
+            "category": payload.get("category", ""),
+            "amount": payload.get("amount", 0),
+            "currency": payload.get("currency", "CNY"),
+            "confidence": payload.get("confidence"),
+            "notes": payload.get("notes"),
+        }
+        return self._add_pending(ExpenseRecord, row)
+
+    def _persist_income_forecast(
+        self,
+        job: ImportJob,
+        payload: Dict[str, Any],
+        overwrite: bool,
+        prepared: Dict[str, Any] | None,
+    ) -> str:
+        """收入预测（含 revenue_forecast）"""
+        category_id = self._ensure_category(
+            payload,
+            CategoryType.FORECAST,
+            fallback_keys=[
+                "category",
+                "subcategory",
+                "category_level1",
+                "category_level2",
+                "categoryLevel1",
+                "categoryLevel2",
+            ],
+        )
+        company_id = self._resolve_company_id(payload)
+
+        raw_date = _first(payload, _IN_FORECAST_DATE_ALIASES)
+        if not raw_date:
+            raise ValueError("Income forecast missing date field (cash_in_date/occurred_on/forecast_date)")
+        cash_in_date = _as_date(str(raw_date))
+        payload["cash_in_date"] = cash_in_date.isoformat()
+
+        amount_raw = _first(payload, _FORECAST_AMOUNT_ALIASES, allow_falsy=True)
+        if amount_raw is None:
+            raise ValueError("Income forecast missing amount field")
+        amount_value = _to_decimal(amount_raw)
+        payload["expected_amount"] = float(amount_value)
+
+        description = (_first(payload, _DESCRIPTION_ALIASES) or "").strip() or None
+        account_name = (_first(payload, _ACCOUNT_ALIASES) or "").strip() or None
+        category_text = payload.get("category_path_text")
+        if not category_text:
+            category_text = payload.get("category_path")
+        category_label = payload.get("category")
+        subcategory_label = payload.get("subcategory")
+        if isinstance(category_text, (list, tuple)):
+            category_path_text = "/".join(
+                str(part).strip() for part in category_text if str(part).strip()
             )
+        elif isinstance(category_text, str):
+            category_path_text = category_text
+        else:
+            category_path_text = None
+
+        certainty_value = payload.get("certainty") or Certainty.CERTAIN.value
+        record_certainty = Certainty(certainty_value)
+
+        row = {
+            "company_id": company_id,
+            "import_job_id": job.id,
+            "category_id": category_id,
+            "cash_in_date": cash_in_date,
+            "product_line": payload.get("product_line"),
+            "product_name": payload.get("product_name"),
+            "certainty": record_certainty,
+            "category": payload.get("category"),
+            "category_path_text": category_path_text,
+            "category_label": category_label,
+            "subcategory_label": subcategory_label,
+            "description": description,
+            "account_name": account_name,
+            "expected_amount": amount_value,
+            "currency": payload.get("currency", "CNY"),
+            "confidence": payload.get("confidence"),
+            "notes": payload.get("notes"),
+        }
+        return self._add_pending(IncomeForecast, row)
+
+    def _persist_expense_forecast(
+        self,
+        job: ImportJob,
+        payload: Dict[str, Any],
+        overwrite: bool,
+        prepared: Dict[str, Any] | None,
+    ) -> str:
+        """支出预测"""
+        category_id = self._ensure_category(
+            payload,
+            CategoryType.EXPENSE,
+            fallback_keys=[
+                "category",
+                "subcategory",
+                "category_level1",
+                "category_level2",
+                "categoryLevel1",
+                "categoryLevel2",
+            ],
+        )
+        company_id = self._resolve_company_id(payload)
+
+        raw_date = _first(payload, _OUT_FORECAST_DATE_ALIASES)
+        if not raw_date:
+            raise ValueError("Expense forecast missing date field (cash_out_date/occurred_on/forecast_date)")
+        cash_out_date = _as_date(str(raw_date))
+        payload["cash_out_date"] = cash_out_date.isoformat()
+
+        amount_raw = _first(payload, _FORECAST_AMOUNT_ALIASES, allow_falsy=True)
+        if amount_raw is None:
+            raise ValueError("Expense forecast missing amount field")
+        amount_value = _to_decimal(amount_raw)
+        payload["expected_amount"] = float(amount_value)
+
+        description = (_first(payload, _DESCRIPTION_ALIASES) or "").strip() or None
+        account_name = (_first(payload, _ACCOUNT_ALIASES) or "").strip() or None
+        category_text = payload.get("category_path_text")
+        if not category_text:
+            category_text = payload.get("category_path")
+        category_label = payload.get("category")
+        subcategory_label = payload.get("subcategory")
+        if isinstance(category_text, (list, tuple)):
+            category_path_text = "/".join(
+                str(part).strip() for part in category_text if str(part).strip()
+            )
+        elif isinstance(category_text, str):
+            category_path_text = category_text
+        else:
+            category_path_text = None
+
+        certainty_value = payload.get("certainty") or Certainty.CERTAIN.value
+        record_certainty = Certainty(certainty_value)
+
+        row = {
+            "company_id": company_id,
+            "import_job_id": job.id,
+            "category_id": category_id,
+            "cash_out_date": cash_out_date,
+            "certainty": record_certainty,
+            "category": payload.get("category"),
+            "category_path_text": category_path_text,
+            "category_label": category_label,
+            "subcategory_label": subcategory_label,
+            "description": description,
+            "account_name": account_name,
+            "expected_amount": amount_value,
+            "currency": payload.get("currency", "CNY"),
+            "confidence": payload.get("confidence"),
+            "notes": payload.get("notes"),
+        }
+        return self._add_pending(ExpenseForecast, row)
+
+    def _prepare_revenue(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """规范化收入明细 payload（解析公司、日期、分类与金额），返回写入与查重所需的字段。
+
+        会改写 payload（补全 company_id、occurred_on、分类路径等），每条记录只能调用一次。
+        """
+        company_id = self._resolve_company_id(payload)
+        raw_occurred = _first(payload, _REVENUE_DATE_ALIASES)
+        if not raw_occurred:
+            raise ValueError("Revenue detail missing occurred_on/date field")
+        occurred_on = _as_date(raw_occurred)
+        payload["occurred_on"] = occurred_on.isoformat()
+
+        category_id = self._ensure_category(
+            payload,
+            CategoryType.REVENUE,
+            fallback_keys=[
+                "category",
+                "subcategory",
+                "category_level1",
+                "categoryLevel1",
+                "category_level2",
+                "categoryLevel2",
+            ],
+        )
 
-            amount_raw = payload.get("amount")
-            if amount_raw is None:
-                raise ValueError("Revenue detail missing amount")
-            amount_value = Decimal(str(amount_raw))
-            payload["amount"] = float(amount_value)
-
-            description = (payload.get("description") or payload.get("item") or payload.get("item_name") or "").strip() or None
-            account_name = (payload.get("account_name") or payload.get("account") or payload.get("accountName") or "").strip() or None
-            category_text = payload.get("category_path_text") or payload.get("category")
-            category_label = payload.get("category_label") or payload.get("category")
-            subcategory_label = payload.get("subcategory_label") or payload.get("subcategory")
-
-            # 排除当前导入任务中已插入的记录（在同一个事务中）
-            # 只检查已提交的其他任务的记录，避免在同一个导入任务中误判为重复
+        amount_raw = payload.get("amount")
+        if amount_raw is None:
+            raise ValueError("Revenue detail missing amount")
+        amount_value = _to_decimal(amount_raw)
+        payload["amount"] = float(amount_value)
+
+        description = (_first(payload, _DESCRIPTION_ALIASES) or "").strip() or None
+        account_name = (_first(payload, _ACCOUNT_ALIASES) or "").strip() or None
+        category_text = payload.get("category_path_text") or payload.get("category")
+        category_label = payload.get("category_label") or payload.get("category")
+        subcategory_label = payload.get("subcategory_label") or payload.get("subcategory")
+
+        return {
+            "company_id": company_id,
+            "occurred_on": occurred_on,
+            "category_id": category_id,
+            "amount_value": amount_value,
+            "description": description,
+            "account_name": account_name,
+            "category_text": category_text,
+            "category_label": category_label,
+            "subcategory_label": subcategory_label,
+            "key_hash": natural_key_hash(company_id, occurred_on, amount_value, category_id, description, account_name),
+        }
+
+    def _find_existing_revenue(self, job: ImportJob, fields: Dict[str, Any]) -> RevenueDetail | None:
+        """查找与待导入收入明细重复、且来自其他导入任务的已有记录。"""
+        company_id = fields["company_id"]
+        occurred_on = fields["occurred_on"]
+        amount_value = fields["amount_value"]
+        category_id = fields["category_id"]
+        category_text = fields["category_text"]
+        description = fields["description"]
+        account_name = fields["account_name"]
+        key_hash = fields["key_hash"]
+
+        if key_hash is not None and key_hash in self._existing_revenue:
+            # 自然键各部分齐全且已由 _prefetch_existing 批量查过
+            return self._existing_revenue[key_hash]
+
+        # 排除当前导入任务中已插入的记录（在同一个事务中）
+        # 只检查已提交的其他任务的记录，避免在同一个导入任务中误判为重复
+        if key_hash is not None:
+            # 自然键各部分齐全：按摘要等值查找，与唯一约束使用同一索引
+            stmt = select(RevenueDetail).where(RevenueDetail.natural_key_hash == key_hash)
+        else:
             stmt = select(RevenueDetail).where(
                 RevenueDetail.company_id == company_id,
                 RevenueDetail.occurred_on == occurred_on,
                 RevenueDetail.amount == amount_value,
             )
-            # 排除当前任务中已插入的记录
-            if job.id:
-                stmt = stmt.where(RevenueDetail.import_job_id != job.id)
-            
+        # 排除当前任务中已插入的记录
+        if job.id:
+            stmt = stmt.where(RevenueDetail.import_job_id != job.id)
+        
+        if key_hash is None:
             if category_id:
                 stmt = stmt.where(RevenueDetail.category_id == category_id)
             elif category_text:
@@ -285,278 +841,30 @@ class ImportJobRepository:
                 stmt = stmt.where(RevenueDetail.account_name == account_name)
             else:
                 stmt = stmt.where(RevenueDetail.account_name.is_(None))
-            
-            # 调试日志
-            print(f"[DUPLICATE CHECK] Checking for duplicate revenue:")
-            print(f"  company_id: {company_id}")
-            print(f"  occurred_on: {occurred_on}")
-            print(f"  amount: {amount_value}")
-            print(f"  category_id: {category_id}")
-            print(f"  category_path_text: {category_text}")
-            print(f"  description: {description}")
-            print(f"  account_name: {account_name}")
-            print(f"  current_job_id: {job.id} (excluding records from this job)")
-            
-            # 使用 first() 而不是 scalar_one_or_none()，因为可能有多条匹配的记录
-            result = self.session.execute(stmt).first()
-            existing_detail = result[0] if result else None
-            
-            if existing_detail:
-                print(f"[DUPLICATE CHECK] Found existing record:")
-                print(f"  ID: {existing_detail.id}")
-                print(f"  import_job_id: {existing_detail.import_job_id}")
-                print(f"  amount: {existing_detail.amount}")
-                print(f"  category_path: {existing_detail.category_path_text}")
-                print(f"  description: {existing_detail.description}")
-                # 检查是否有多条匹配的记录
-                all_matches = self.session.execute(stmt).all()
-                if len(all_matches) > 1:
-                    print(f"[DUPLICATE CHECK] WARNING: Found {len(all_matches)} matching records (duplicate data in database)")
-            else:
-                print(f"[DUPLICATE CHECK] No duplicate found")
-            conflict_info = {
-                "companyId": company_id,
-                "occurredOn": occurred_on.isoformat(),
-                "category": payload.get("category"),
-                "categoryPath": payload.get("category_path_text"),
-                "categoryLabel": category_label,
-                "subcategory": subcategory_label,
-                "description": description,
-                "accountName": account_name,
-                "amount": float(amount_value),
-            }
-
-            if existing_detail:
-                if not overwrite:
-                    raise DuplicateRecordError(record_type, conflict_info)
-                existing_detail.import_job_id = job.id
-                existing_detail.category_id = category_id or existing_detail.category_id
-                existing_detail.category_path_text = category_text or existing_detail.category_path_text
-                existing_detail.category_label = category_label or existing_detail.category_label
-                existing_detail.subcategory_label = subcategory_label or existing_detail.subcategory_label
-                existing_detail.amount = amount_value
-                existing_detail.currency = payload.get("currency", existing_detail.currency)
-                existing_detail.description = description
-                existing_detail.account_name = account_name
-                existing_detail.confidence = payload.get("confidence", existing_detail.confidence)
-                existing_detail.notes = payload.get("notes", existing_detail.notes)
-                self._session.flush()
-                return existing_detail.id
-
-            record = RevenueDetail(
-                company_id=company_id,
-                import_job_id=job.id,
-                category_id=category_id,
-                occurred_on=occurred_on,
-                amount=amount_value,
-                currency=payload.get("currency", "CNY"),
-                description=description,
-                account_name=account_name,
-                category_path_text=category_text,
-                category_label=category_label,
-                subcategory_label=subcategory_label,
-                confidence=payload.get("confidence"),
-                notes=payload.get("notes"),
-            )
-        elif record_type is RecordType.EXPENSE:
-            category_id = self._ensure_category(
-                payload,
-                CategoryType.EXPENSE,
-                fallback_keys=["category"],
-            )
-            company_id = self._resolve_company_id(payload)
-            record = ExpenseRecord(
-                company_id=company_id,
-                import_job_id=job.id,
-                category_id=category_id,
-                month=_as_date(payload["month"]),
-                category=payload.get("category", ""),
-                amount=payload.get("amount", 0),
-                currency=payload.get("currency", "CNY"),
-                confidence=payload.get("confidence"),
-                notes=payload.get("notes"),
-            )
-        elif record_type in (RecordType.INCOME_FORECAST, RecordType.REVENUE_FORECAST):
-            category_id = self._ensure_category(
-                payload,
-                CategoryType.FORECAST,
-                fallback_keys=[
-                    "category",
-                    "subcategory",
-                    "category_level1",
-                    "category_level2",
-                    "categoryLevel1",
-                    "categoryLevel2",
-                ],
-            )
-            company_id = self._resolve_company_id(payload)
-            self._ensure_income_forecast_reset(company_id)
-
-            raw_date = (
-                payload.get("cash_in_date")
-                or payload.get("cashInDate")
-                or payload.get("occurred_on")
-                or payload.get("occurredOn")
-                or payload.get("forecast_date")
-                or payload.get("forecastDate")
-            )
-            if not raw_date:
-                raise ValueError("Income forecast missing date field (cash_in_date/occurred_on/forecast_date)")
-            cash_in_date = _as_date(str(raw_date))
-            payload["cash_in_date"] = cash_in_date.isoformat()
-
-            amount_raw = payload.get("expected_amount")
-            if amount_raw is None:
-                amount_raw = payload.get("amount")
-            if amount_raw is None:
-                raise ValueError("Income forecast missing amount field")
-            amount_value = Decimal(str(amount_raw))
-            payload["expected_amount"] = float(amount_value)
-
-            description = (
-                payload.get("description")
-                or payload.get("item")
-                or payload.get("item_name")
-                or ""
-            ).strip() or None
-            account_name = (
-                payload.get("account_name")
-                or payload.get("account")
-                or payload.get("accountName")
-                or ""
-            ).strip() or None
-            category_text = payload.get("category_path_text")
-            if not category_text:
-                category_text = payload.get("category_path")
-            category_label = payload.get("category")
-            subcategory_label = payload.get("subcategory")
-            if isinstance(category_text, (list, tuple)):
-                category_path_text = "/".join(
-                    str(part).strip() for part in category_text if str(part).strip()
-                )
-            elif isinstance(category_text, str):
-                category_path_text = category_text
-            else:
-                category_path_text = None
-
-            certainty_value = payload.get("certainty") or Certainty.CERTAIN.value
-            record_certainty = Certainty(certainty_value)
-
-            record = IncomeForecast(
-                company_id=company_id,
-                import_job_id=job.id,
-                category_id=category_id,
-                cash_in_date=cash_in_date,
-                product_line=payload.get("product_line"),
-                product_name=payload.get("product_name"),
-                certainty=record_certainty,
-                category=payload.get("category"),
-                category_path_text=category_path_text,
-                category_label=category_label,
-                subcategory_label=subcategory_label,
-                description=description,
-                account_name=account_name,
-                expected_amount=amount_value,
-                currency=payload.get("currency", "CNY"),
-                confidence=payload.get("confidence"),
-                notes=payload.get("notes"),
-            )
-        elif record_type is RecordType.EXPENSE_FORECAST:
-            category_id = self._ensure_category(
-                payload,
-                CategoryType.EXPENSE,
-                fallback_keys=[
-                    "category",
-                    "subcategory",
-                    "category_level1",
-                    "category_level2",
-                    "categoryLevel1",
-                    "categoryLevel2",
-                ],
-            )
-            company_id = self._resolve_company_id(payload)
-            self._ensure_expense_forecast_reset(company_id)
-
-            raw_date = (
-                payload.get("cash_out_date")
-                or payload.get("cashOutDate")
-                or payload.get("occurred_on")
-                or payload.get("occurredOn")
-                or payload.get("forecast_date")
-                or payload.get("forecastDate")
-            )
-            if not raw_date:
-                raise ValueError("Expense forecast missing date field (cash_out_date/occurred_on/forecast_date)")
-            cash_out_date = _as_date(str(raw_date))
-            payload["cash_out_date"] = cash_out_date.isoformat()
-
-            amount_raw = payload.get("expected_amount")
-            if amount_raw is None:
-                amount_raw = payload.get("amount")
-            if amount_raw is None:
-                raise ValueError("Expense forecast missing amount field")
-            amount_value = Decimal(str(amount_raw))
-            payload["expected_amount"] = float(amount_value)
-
-            description = (
-                payload.get("description")
-                or payload.get("item")
-                or payload.get("item_name")
-                or ""
-            ).strip() or None
-            account_name = (
-                payload.get("account_name")
-                or payload.get("account")
-                or payload.get("accountName")
-                or ""
-            ).strip() or None
-            category_text = payload.get("category_path_text")
-            if not category_text:
-                category_text = payload.get("category_path")
-            category_label = payload.get("category")
-            subcategory_label = payload.get("subcategory")
-            if isinstance(category_text, (list, tuple)):
-                category_path_text = "/".join(
-                    str(part).strip() for part in category_text if str(part).strip()
-                )
-            elif isinstance(category_text, str):
-                category_path_text = category_text
-            else:
-                category_path_text = None
-
-            certainty_value = payload.get("certainty") or Certainty.CERTAIN.value
-            record_certainty = Certainty(certainty_value)
-
-            record = ExpenseForecast(
-                company_id=company_id,
-                import_job_id=job.id,
-                category_id=category_id,
-                cash_out_date=cash_out_date,
-                certainty=record_certainty,
-                category=payload.get("category"),
-                category_path_text=category_path_text,
-                category_label=category_label,
-                subcategory_label=subcategory_label,
-                description=description,
-                account_name=account_name,
-                expected_amount=amount_value,
-                currency=payload.get("currency", "CNY"),
-                confidence=payload.get("confidence"),
-                notes=payload.get("notes"),
+        
+        # 使用 first() 而不是 scalar_one_or_none()，因为可能有多条匹配的记录
+        existing_detail = self.session.scalars(stmt).first()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "[DUPLICATE CHECK] revenue company=%s date=%s amount=%s job=%s duplicate=%s",
+                company_id,
+                occurred_on,
+                amount_value,
+                job.id,
+                existing_detail.id if existing_detail else None,
             )
-        else:
-            raise ValueError(f"Unsupported record type: {record_type}")
-
-        self._session.add(record)
-        self._session.flush()
-        return record.id
+        return existing_detail
 
     def _resolve_company_id(self, payload: Dict[str, Any]) -> str:
-        raw_id = str(payload.get("company_id") or payload.get("companyId") or "").strip()
+        raw_id = str(_first(payload, _COMPANY_ID_ALIASES) or "").strip()
         if raw_id:
             payload["company_id"] = raw_id
             return raw_id
 
+        if self._placeholder_ensured:
+            payload["company_id"] = self._placeholder_company_id
+            return self._placeholder_company_id
+
         placeholder = self._session.get(Company, self._placeholder_company_id)
         if placeholder is None:
             placeholder = Company(
@@ -566,8 +874,8 @@ class ImportJobRepository:
                 currency="CNY",
             )
             self._session.add(placeholder)
-            self._session.flush()
 
+        self._placeholder_ensured = True
         payload["company_id"] = placeholder.id
         return placeholder.id
 
@@ -590,37 +898,53 @@ class ImportJobRepository:
                     names.append(value.strip())
         if not names:
             return None
-        category = self._category_service.get_or_create(names=names, category_type=category_type)
-        if category:
+        key = (category_type, tuple(names))
+        if key in self._category_ids:
+            category_id = self._category_ids[key]
+        else:
+            category = self._category_service.get_or_create(names=names, category_type=category_type)
+            category_id = category.id if category else None
+            self._category_ids[key] = category_id
+        if category_id:
             payload["category"] = names[-1]
             payload["category_path_text"] = "/".join(names)
-            return category.id
-        return None
-
-    def _ensure_income_forecast_reset(self, company_id: str) -> None:
-        if company_id in self._income_forecast_cleared_companies:
-            return
-        self.session.query(IncomeForecast).filter(IncomeForecast.company_id == company_id).delete(
-            synchronize_session=False
-        )
-        self._income_forecast_cleared_companies.add(company_id)
-
-    def _ensure_expense_forecast_reset(self, company_id: str) -> None:
-        if company_id in self._expense_forecast_cleared_companies:
-            return
-        self.session.query(ExpenseForecast).filter(ExpenseForecast.company_id == company_id).delete(
-            synchronize_session=False
-        )
-        self._expense_forecast_cleared_companies.add(company_id)
+        return category_id
 
 
 def _average_confidence(records: Sequence[CandidateRecord]) -> float | None:
-    confidences = [record.confidence for record in records if record.confidence is not None]
-    if not confidences:
-        return None
-    return sum(confidences) / len(confidences)
-
-
+    # 单次遍历累加，不构造中间列表
+    total = 0.0
+    count = 0
+    for record in records:
+        confidence = record.confidence
+        if confidence is not None:
+            total += confidence
+            count += 1
+    return total / count if count else None
+
+
+def _first(payload: Dict[str, Any], keys: Sequence[str], *, allow_falsy: bool = False) -> Any:
+    """按顺序返回 payload 中第一个有值（allow_falsy=True 时为第一个非 None）的别名键的值，都没有时返回 None"""
+    for key in keys:
+        value = payload.get(key)
+        if value or (allow_falsy and value is not None):
+            return value
+    return None
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _to_decimal(value: Any) -> Decimal:
+    """金额转 Decimal：整数直接构造；浮点数经 str() 取最短十进制表示（与原值往返一致），避免带入二进制误差
+
+    工资、订阅费等金额在一次导入中大量重复，结果按值缓存（typed=True：1 与 1.0 得到的 Decimal 精度不同，分开缓存）。
+    """
+    if isinstance(value, int):
+        return Decimal(value)
+    return Decimal(str(value))
+
+
+# 一次导入中同一批日期字符串会在成千上万行中重复出现；返回值为不可变的 date/datetime，可安全缓存
+@lru_cache(maxsize=4096)
 def _as_datetime(value: str) -> datetime:
     dt = datetime.fromisoformat(value)
     if dt.tzinfo is None:
@@ -628,6 +952,7 @@ def _as_datetime(value: str) -> datetime:
     return dt
 
 
+@lru_cache(maxsize=4096)
 def _as_date(value: str) -> date:
     return datetime.fromisoformat(value).date()
 
@@ -157,3 +157,14 @@ class ExpenseForecastDetailResponse(BaseModel):
 ExpenseForecastDetailItem.model_rebuild()
 ExpenseForecastItem.model_rebuild()
 
+
+class DashboardResponse(BaseModel):
+    """看板聚合响应：一次请求返回概览、收入汇总、余额历史与（可选）支出预测明细"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    overview: FinancialOverview
+    revenue_summary: RevenueSummaryResponse = Field(alias="revenueSummary")
+    balances: List[BalanceHistoryItem] = Field(default_factory=list)
+    expense_forecast_detail: Optional[ExpenseForecastDetailResponse] = Field(
+        default=None, alias="expenseForecastDetail"
+    )
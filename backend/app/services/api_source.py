@@ -1,25 +1,47 @@
 from __future__ import annotations
 
 import json
+import logging
+import threading
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
 
+from app.core.config import Settings
 from app.schemas.imports import CandidateRecord, RecordType
 
 # API 数据源配置文件路径
 BACKEND_ROOT = Path(__file__).parent.parent.parent.resolve()
 API_SOURCES_CONFIG_PATH = BACKEND_ROOT / "api_sources_config.json"
 
+logger = logging.getLogger(__name__)
+
 
 class ApiSourceConfig:
     """API 数据源配置"""
 
     def __init__(self) -> None:
         self.sources: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def by_id(self) -> Dict[str, Dict[str, Any]]:
+        """按 id 索引的数据源视图"""
+        return self._by_id
+
+    def _reindex(self) -> None:
+        self._by_id = {source["id"]: source for source in self.sources if "id" in source}
+
+    def add_source(self, source: Dict[str, Any]) -> None:
+        """追加数据源并同步更新索引"""
+        self.sources.append(source)
+        self._by_id[source["id"]] = source
 
     @classmethod
     def load(cls) -> "ApiSourceConfig":
@@ -30,19 +52,50 @@ class ApiSourceConfig:
                 with open(API_SOURCES_CONFIG_PATH, "r", encoding="utf-8") as f:
                     data = json.load(f)
                     config.sources = data.get("sources", [])
+                    config._reindex()
             except Exception as e:
-                print(f"[API SOURCE] Failed to load config: {e}")
+                logger.warning("[API SOURCE] Failed to load config: %s", e)
         return config
 
     def save(self) -> None:
         """保存配置到文件"""
+        self._reindex()
         try:
             API_SOURCES_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
             with open(API_SOURCES_CONFIG_PATH, "w", encoding="utf-8") as f:
                 json.dump({"sources": self.sources}, f, indent=2, ensure_ascii=False)
         except Exception as e:
-            print(f"[API SOURCE] Failed to save config: {e}")
+            logger.error("[API SOURCE] Failed to save config: %s", e)
             raise
+        finally:
+            get_cached_api_source_config.cache_clear()
+
+
+@lru_cache(maxsize=1)
+def get_cached_api_source_config() -> ApiSourceConfig:
+    """进程内缓存的配置，仅在 save() 后失效，避免每次请求读取并解析配置文件"""
+    return ApiSourceConfig.load()
+
+
+# 串行化配置文件的“读取-修改-保存”，避免并发触发互相覆盖
+_config_write_lock = threading.Lock()
+
+
+def record_source_run(source_id: str, default_source: Dict[str, Any]) -> None:
+    """记录数据源的最后运行时间并保存配置；配置中没有该数据源时按 default_source 添加
+
+    在锁内修改从文件重新加载的副本，不改动被并发请求共享的缓存实例；保存后缓存失效，下次请求读取新配置。
+    会读写文件，异步调用方应放到线程中执行。
+    """
+    with _config_write_lock:
+        config = ApiSourceConfig.load()
+        now = datetime.now().isoformat()
+        source = config.by_id.get(source_id)
+        if source is not None:
+            source["lastRunAt"] = now
+        else:
+            config.add_source({**default_source, "id": source_id, "lastRunAt": now})
+        config.save()
 
 
 class SqlServerDataSource:
@@ -54,53 +107,74 @@ class SqlServerDataSource:
         self.user = user
         self.password = password
         self.database = database
+        self._engine: Engine | None = None
 
-    def execute_query(self, query: str) -> pd.DataFrame:
-        """执行 SQL 查询并返回 DataFrame"""
-        try:
-            # 使用 SQLAlchemy + pymssql（与测试脚本一致）
+    def _get_engine(self) -> Engine:
+        """延迟创建并复用 SQL Server 引擎，跨请求共享已建立的连接。"""
+        if self._engine is None:
             port = self.port or 1433
             database = self.database if self.database else "master"
-            
             # 构建连接字符串（与测试脚本格式一致）
             connection_string = f"mssql+pymssql://{self.user}:{self.password}@{self.host}:{port}/{database}?charset=utf8"
-            
-            print(f"[SQL SERVER] Connecting to {self.host}:{port} as {self.user}...")
-            print(f"[SQL SERVER] Database: {database}")
-            
-            # 使用 SQLAlchemy 创建引擎（与测试脚本一致）
-            engine = create_engine(
+            logger.info("[SQL SERVER] Connecting to %s:%s as %s, database: %s", self.host, port, self.user, database)
+            self._engine = create_engine(
                 connection_string,
                 pool_size=10,
                 max_overflow=20,
                 pool_pre_ping=True,
+                pool_recycle=1800,
             )
-            
-            # 执行查询（使用 text() 包装 SQL，然后手动构建 DataFrame）
-            from sqlalchemy import text
+        return self._engine
+
+    def warm_pool(self) -> None:
+        """预先建立一个连接，把登录握手的开销挪到启动阶段。"""
+        with self._get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    def dispose(self) -> None:
+        """释放连接池。"""
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    def fetch_rows(self, query: str | TextClause) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+        """执行 SQL 查询，返回 (行, 列名)
+
+        固定查询应传入模块级的 text() 语句，复用同一个语句对象及其编译缓存，避免每次重新构造和编译。
+        """
+        statement = text(query) if isinstance(query, str) else query
+        try:
+            # 使用 SQLAlchemy + pymssql（与测试脚本一致）
+            engine = self._get_engine()
+
             with engine.connect() as conn:
-                result = conn.execute(text(query))
-                # 获取列名
-                columns = result.keys()
-                # 获取所有行
-                rows = result.fetchall()
-                # 构建 DataFrame
-                df = pd.DataFrame(rows, columns=columns)
-            engine.dispose()
-            return df
-                
+                result = conn.execute(statement)
+                columns = list(result.keys())
+                rows = [tuple(row) for row in result.fetchall()]
+            return rows, columns
+
         except Exception as e:
-            print(f"[SQL SERVER] Query execution failed: {e}")
-            print(f"[SQL SERVER] Connection details: host={self.host}, port={self.port or '1433 (default)'}, user={self.user}, database={self.database or 'master'}")
-            import traceback
-            traceback.print_exc()
+            logger.exception(
+                "[SQL SERVER] Query execution failed: %s (host=%s, port=%s, user=%s, database=%s)",
+                e, self.host, self.port or "1433 (default)", self.user, self.database or "master",
+            )
             raise
 
-    def fetch_expense_forecasts(self, query: str) -> List[CandidateRecord]:
+    def execute_query(self, query: str | TextClause) -> pd.DataFrame:
+        """执行 SQL 查询并返回 DataFrame"""
+        rows, columns = self.fetch_rows(query)
+        return pd.DataFrame(rows, columns=columns)
+
+    def fetch_expense_forecasts(self, query: str | TextClause) -> List[CandidateRecord]:
         """从 SQL Server 查询数据并转换为支出预测记录"""
-        df = self.execute_query(query)
-        print(f"[SQL SERVER] Query returned {len(df)} rows")
-        print(f"[SQL SERVER] Columns: {list(df.columns)}")
+        return self.to_expense_forecasts(self.execute_query(query))
+
+    def to_expense_forecasts(self, df: pd.DataFrame) -> List[CandidateRecord]:
+        """将查询结果转换为支出预测记录（复用已取回的结果集，不再重复查询）"""
+        logger.info("[SQL SERVER] Query returned %d rows", len(df))
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("[SQL SERVER] Columns: %s", list(df.columns))
 
         records: List[CandidateRecord] = []
         for idx, row in df.iterrows():
@@ -123,7 +197,8 @@ class SqlServerDataSource:
                                     date_value = datetime.strptime(row[field].split()[0], "%Y-%m-%d").date()
                             break
                         except Exception as e:
-                            print(f"[SQL SERVER] Failed to parse date field {field}: {e}")
+                            if debug_enabled:
+                                logger.debug("[SQL SERVER] Failed to parse date field %s: %s", field, e)
                             continue
 
                 # 解析金额字段（新查询返回 cost 字段）
@@ -139,11 +214,13 @@ class SqlServerDataSource:
                             continue
 
                 if not date_value:
-                    print(f"[SQL SERVER] Row {idx} skipped: missing date. Available fields: {list(row.index)}")
+                    if debug_enabled:
+                        logger.debug("[SQL SERVER] Row %s skipped: missing date. Available fields: %s", idx, list(row.index))
                     continue
                 
                 if amount is None or amount == 0:
-                    print(f"[SQL SERVER] Row {idx} skipped: missing or zero amount")
+                    if debug_enabled:
+                        logger.debug("[SQL SERVER] Row %s skipped: missing or zero amount", idx)
                     continue
 
                 # 构建分类路径（使用 FundName）
@@ -193,12 +270,28 @@ class SqlServerDataSource:
                     )
                 )
             except Exception as e:
-                print(f"[SQL SERVER] Failed to convert row {idx} to record: {e}")
-                print(f"  Row data: {dict(row)}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("[SQL SERVER] Failed to convert row %s to record: %s, row data: %s", idx, e, dict(row))
                 continue
 
-        print(f"[SQL SERVER] Converted {len(records)} records")
+        logger.info("[SQL SERVER] Converted %d records", len(records))
         return records
 
+
+@lru_cache(maxsize=4)
+def _sqlserver_source_for(
+    host: str, port: int | None, user: str, password: str, database: str
+) -> SqlServerDataSource:
+    return SqlServerDataSource(host=host, user=user, password=password, database=database, port=port)
+
+
+def get_shared_sqlserver_source(settings: Settings) -> SqlServerDataSource | None:
+    """按连接参数缓存 SQL Server 数据源，复用其连接池；未配置时返回 None"""
+    if not settings.sqlserver_host or not settings.sqlserver_user or not settings.sqlserver_password:
+        return None
+    return _sqlserver_source_for(
+        settings.sqlserver_host,
+        settings.sqlserver_port,
+        settings.sqlserver_user,
+        settings.sqlserver_password,
+        settings.sqlserver_database or "",
+    )
@@ -1,46 +1,108 @@
 from __future__ import annotations
 
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, Optional, Sequence, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.orm import Session
 
 from app.models.financial import CategoryType, FinanceCategory
 
+# 分类路径缓存在 session.info 中的键
+_PATH_CACHE_KEY = "finance_category_path_cache"
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _clear_path_cache(session: Session, previous_transaction) -> None:
+    """回滚后本事务新建的分类已失效，丢弃缓存，下次重新查询。"""
+    cache = session.info.get(_PATH_CACHE_KEY)
+    if cache:
+        # 原地清空：已创建的服务实例持有同一个字典
+        cache.clear()
+
 
 class FinanceCategoryService:
     """负责维护财务分类树结构。"""
 
     def __init__(self, session: Session) -> None:
         self._session = session
+        # 按 (分类类型, 完整路径) 记录已查询/创建过的分类（含未命中）。缓存挂在会话上（每个请求一个会话），
+        # 同一请求内各仓库各自创建的服务实例共享；导入时同一路径会被逐条记录反复解析，命中后不再访问数据库
+        self._path_cache: Dict[Tuple[CategoryType, str], Optional[FinanceCategory]] = session.info.setdefault(
+            _PATH_CACHE_KEY, {}
+        )
+
+    def find_by_label(self, category_type: CategoryType | str, label: str) -> Optional[FinanceCategory]:
+        """按标签（分类完整路径，一级分类即名称）查找分类。"""
+        return self.find_by_labels(category_type, [label]).get(label)
+
+    def find_by_labels(
+        self,
+        category_type: CategoryType | str,
+        labels: Iterable[Optional[str]],
+    ) -> Dict[str, FinanceCategory]:
+        """批量按标签查找分类：未缓存的标签合并为一次 IN 查询，返回 {标签: 分类}。"""
+        category_type = CategoryType(category_type)
+        unique_labels = {label for label in labels if label}
+        missing = [label for label in unique_labels if (category_type, label) not in self._path_cache]
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            stmt = select(FinanceCategory).where(
+                FinanceCategory.category_type == category_type,
+                FinanceCategory.full_path.in_(chunk),
+            )
+            found = {category.full_path: category for category in self._session.execute(stmt).scalars()}
+            for label in chunk:
+                self._path_cache[(category_type, label)] = found.get(label)
+
+        result: Dict[str, FinanceCategory] = {}
+        for label in unique_labels:
+            category = self._path_cache[(category_type, label)]
+            if category is not None:
+                result[label] = category
+        return result
 
     def get_or_create(self, *, names: Iterable[str], category_type: CategoryType) -> Optional[FinanceCategory]:
-        chain: List[str] = [name.strip() for name in names if name and name.strip()]
+        chain = tuple(name.strip() for name in names if name and name.strip())
         if not chain:
             return None
+        # 一次查询取回路径上的全部层级，而不是逐级查询父节点
+        return self.get_or_create_many(paths=[chain], category_type=category_type)[chain]
 
-        parent: Optional[FinanceCategory] = None
-        path: List[str] = []
+    def get_or_create_many(
+        self,
+        *,
+        paths: Iterable[Sequence[str]],
+        category_type: CategoryType,
+    ) -> Dict[Tuple[str, ...], FinanceCategory]:
+        """批量解析分类路径：一次查询已存在的节点，缺失的节点按层级补建后统一 flush。"""
+        chains = set()
+        for names in paths:
+            chain = tuple(name.strip() for name in names if name and name.strip())
+            if chain:
+                chains.add(chain)
+        if not chains:
+            return {}
 
-        for name in chain:
-            path.append(name)
-            full_path = "/".join(path)
+        prefixes = {chain[:index] for chain in chains for index in range(1, len(chain) + 1)}
+        by_path = self.find_by_labels(category_type, ("/".join(prefix) for prefix in prefixes))
 
-            stmt = select(FinanceCategory).where(
-                FinanceCategory.category_type == category_type,
-                FinanceCategory.full_path == full_path,
+        created = False
+        for prefix in sorted(prefixes, key=len):
+            full_path = "/".join(prefix)
+            if full_path in by_path:
+                continue
+            category = FinanceCategory(
+                name=prefix[-1],
+                category_type=category_type,
+                parent=by_path["/".join(prefix[:-1])] if len(prefix) > 1 else None,
+                level=len(prefix),
+                full_path=full_path,
             )
-            category = self._session.execute(stmt).scalar_one_or_none()
-            if category is None:
-                category = FinanceCategory(
-                    name=name,
-                    category_type=category_type,
-                    parent=parent,
-                    level=len(path),
-                    full_path=full_path,
-                )
-                self._session.add(category)
-                self._session.flush()
-            parent = category
-
-        return parent
+            self._session.add(category)
+            by_path[full_path] = category
+            self._path_cache[(CategoryType(category_type), full_path)] = category
+            created = True
+        if created:
+            self._session.flush()
+
+        return {chain: by_path["/".join(chain)] for chain in chains}
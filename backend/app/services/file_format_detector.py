@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import os
 from enum import Enum
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -11,23 +13,46 @@ class FileFormat(str, Enum):
     UNKNOWN = "unknown"
 
 
+# 扩展名 → 格式
+_SUFFIX_FORMATS: dict[str, FileFormat] = {
+    ".csv": FileFormat.CSV,
+    ".xlsx": FileFormat.EXCEL,
+    ".xls": FileFormat.EXCEL,
+    ".json": FileFormat.JSON,
+}
+
+# 常见 Content-Type → 格式，命中时无需再做子串匹配
+_CONTENT_TYPE_FORMATS: dict[str, FileFormat] = {
+    "text/csv": FileFormat.CSV,
+    "application/csv": FileFormat.CSV,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": FileFormat.EXCEL,
+    "application/vnd.ms-excel": FileFormat.EXCEL,
+    "application/json": FileFormat.JSON,
+    "text/json": FileFormat.JSON,
+}
+
+
+@lru_cache(maxsize=128)
+def _match_content_type(content_type: str) -> FileFormat:
+    """非常见 Content-Type 按关键字匹配，结果按取值缓存。"""
+    if "csv" in content_type:
+        return FileFormat.CSV
+    elif "spreadsheet" in content_type or "excel" in content_type:
+        return FileFormat.EXCEL
+    elif "json" in content_type:
+        return FileFormat.JSON
+    else:
+        return FileFormat.UNKNOWN
+
+
 class FileFormatDetector:
     """检测文件格式"""
 
     @staticmethod
     def detect(file_path: str | Path) -> FileFormat:
         """根据文件扩展名检测格式"""
-        path = Path(file_path) if isinstance(file_path, str) else file_path
-        suffix = path.suffix.lower()
-
-        if suffix == ".csv":
-            return FileFormat.CSV
-        elif suffix in (".xlsx", ".xls"):
-            return FileFormat.EXCEL
-        elif suffix == ".json":
-            return FileFormat.JSON
-        else:
-            return FileFormat.UNKNOWN
+        suffix = os.path.splitext(file_path)[1].lower()
+        return _SUFFIX_FORMATS.get(suffix, FileFormat.UNKNOWN)
 
     @staticmethod
     def detect_from_content_type(content_type: str | None) -> FileFormat:
@@ -36,12 +61,7 @@ class FileFormatDetector:
             return FileFormat.UNKNOWN
 
         content_type_lower = content_type.lower()
-        if "csv" in content_type_lower:
-            return FileFormat.CSV
-        elif "spreadsheet" in content_type_lower or "excel" in content_type_lower:
-            return FileFormat.EXCEL
-        elif "json" in content_type_lower:
-            return FileFormat.JSON
-        else:
-            return FileFormat.UNKNOWN
-
+        file_format = _CONTENT_TYPE_FORMATS.get(content_type_lower)
+        if file_format is not None:
+            return file_format
+        return _match_content_type(content_type_lower)
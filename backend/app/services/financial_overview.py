@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from datetime import UTC, date, datetime
 from decimal import Decimal
 from typing import Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import func, select
+from sqlalchemy import Row, func, select
 from sqlalchemy.orm import Session
 
 from app.models.financial import (
@@ -18,6 +19,7 @@ from app.models.financial import (
     RevenueDetail,
     Certainty,
 )
+from app.repositories.expense_forecast import ExpenseForecastRepository
 from app.schemas.overview import (
     BalanceHistoryItem,
     BalanceSummary,
@@ -33,6 +35,8 @@ from app.schemas.overview import (
     RevenueSummaryTotals,
 )
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class _CompanyAggregates:
@@ -41,14 +45,15 @@ class _CompanyAggregates:
     revenue: Optional["_RevenueMonthlySnapshot"] = None
     expense: Optional[ExpenseRecord] = None
     income_forecasts: List[IncomeForecast] = None
-    expense_forecasts: List[ExpenseForecast] = None
+    # (company_id, cash_out_date, expected_amount) 行
+    expense_forecasts: List[Row] = None
 
 
 @dataclass
 class _RevenueMonthlySnapshot:
     company_id: str
     period: date
-    amount: Decimal
+    amount: float
     currency: str
 
 
@@ -117,22 +122,25 @@ class FinancialOverviewService:
         )
         latest: Dict[str, AccountBalance] = {}
         all_balances = list(self._session.execute(stmt).scalars().all())
-        
-        # 调试日志：打印所有查询到的余额记录
-        print(f"[BALANCE QUERY] Found {len(all_balances)} balance records for companies: {company_ids}")
-        for balance in all_balances:
-            print(f"[BALANCE QUERY] Company: {balance.company_id}, reported_at: {balance.reported_at}, total: {balance.total_balance}")
-        
+
+        # 调试日志：查询到的余额记录与每个公司选中的最新一条（关闭 DEBUG 时不逐行格式化）
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+        if debug_enabled:
+            logger.debug("[BALANCE QUERY] Found %s balance records for companies: %s", len(all_balances), company_ids)
         for balance in all_balances:
             # 只取每个公司的第一条记录（因为已经按 reported_at.desc() 排序，第一条就是最新的）
             if balance.company_id not in latest:
                 latest[balance.company_id] = balance
-                print(f"[BALANCE QUERY] Selected latest for company {balance.company_id}: reported_at={balance.reported_at}, total={balance.total_balance}")
+                if debug_enabled:
+                    logger.debug(
+                        "[BALANCE QUERY] Selected latest for company %s: reported_at=%s, total=%s",
+                        balance.company_id,
+                        balance.reported_at,
+                        balance.total_balance,
+                    )
 
         for aggregate in aggregates:
             aggregate.balance = latest.get(aggregate.company.id)
-            if aggregate.balance:
-                print(f"[BALANCE QUERY] Assigned balance to company {aggregate.company.id}: reported_at={aggregate.balance.reported_at}, total={aggregate.balance.total_balance}")
 
     def _attach_latest_revenue(self, aggregates: Iterable[_CompanyAggregates], as_of: date) -> None:
         company_ids = [aggregate.company.id for aggregate in aggregates]
@@ -156,7 +164,7 @@ class FinancialOverviewService:
         for row in self._session.execute(stmt):
             company_id_value: str = row[0]
             period_str: str = row[1]
-            total_amount: Decimal = row[2] or Decimal(0)
+            total_amount: float = row[2] or 0.0
             currency: str = row[3] or "CNY"
             if company_id_value not in latest:
                 latest[company_id_value] = _RevenueMonthlySnapshot(
@@ -182,7 +190,7 @@ class FinancialOverviewService:
             for row in self._session.execute(fallback_stmt):
                 company_id_value: str = row[0]
                 period_str: str = row[1]
-                total_amount: Decimal = row[2] or Decimal(0)
+                total_amount: float = row[2] or 0.0
                 currency: str = row[3] or "CNY"
                 if company_id_value not in latest:
                     latest[company_id_value] = _RevenueMonthlySnapshot(
@@ -219,28 +227,15 @@ class FinancialOverviewService:
         if not company_ids:
             return
 
-        income_stmt = (
-            select(IncomeForecast)
-            .where(IncomeForecast.company_id.in_(company_ids))
-        )
-        income_grouped: Dict[str, List[IncomeForecast]] = {aggregate.company.id: [] for aggregate in aggregates}
-        all_income_forecasts: List[IncomeForecast] = []
-        for forecast, in self._session.execute(income_stmt):
-            income_grouped.setdefault(forecast.company_id, []).append(forecast)
-            all_income_forecasts.append(forecast)
-
+        # 预测汇总只用到日期与金额：只取这几列（PostgreSQL 上可走覆盖索引的 index-only scan），不加载整行实体。
+        # 收入预测的月度统计由 get_revenue_summary 计算，这里无需再加载收入预测明细
         expense_stmt = (
-            select(ExpenseForecast)
+            select(ExpenseForecast.company_id, ExpenseForecast.cash_out_date, ExpenseForecast.expected_amount)
             .where(ExpenseForecast.company_id.in_(company_ids))
         )
-        expense_grouped: Dict[str, List[ExpenseForecast]] = {aggregate.company.id: [] for aggregate in aggregates}
-        all_expense_forecasts: List[ExpenseForecast] = []
-        for forecast, in self._session.execute(expense_stmt):
-            expense_grouped.setdefault(forecast.company_id, []).append(forecast)
-            all_expense_forecasts.append(forecast)
+        all_expense_forecasts = list(self._session.execute(expense_stmt))
 
         for aggregate in aggregates:
-            aggregate.income_forecasts = all_income_forecasts
             aggregate.expense_forecasts = all_expense_forecasts
 
     def _build_balance_summary(self, balance: Optional[AccountBalance]) -> Optional[BalanceSummary]:
@@ -276,7 +271,7 @@ class FinancialOverviewService:
     def _build_forecast_summary(
         self,
         income_forecasts: Optional[List[IncomeForecast]],
-        expense_forecasts: Optional[List[ExpenseForecast]],
+        expense_forecasts: Optional[List[Row]],
         as_of: date,
         company_id: str,
     ) -> Optional[ForecastSummary]:
@@ -576,14 +571,7 @@ class FinancialOverviewService:
             return ExpenseForecastDetailResponse(month=month, total=0.0, categories=[])
 
         # 查询该月范围内的支出预测
-        stmt = select(ExpenseForecast).where(
-            ExpenseForecast.cash_out_date >= month_start,
-            ExpenseForecast.cash_out_date < month_end,
-        )
-        if company_id:
-            stmt = stmt.where(ExpenseForecast.company_id == company_id)
-
-        forecasts = [row[0] for row in self._session.execute(stmt)]
+        forecasts = ExpenseForecastRepository(self._session).list_slim(company_id, month_start, month_end)
 
         if not forecasts:
             return ExpenseForecastDetailResponse(month=month, total=0.0, categories=[])
@@ -3,7 +3,7 @@ from __future__ import annotations
 import io
 from datetime import datetime
 from pathlib import Path
-from typing import Any, List
+from typing import Any, BinaryIO, List, Union
 
 import pandas as pd
 
@@ -14,8 +14,17 @@ from app.services.file_format_detector import FileFormat
 class RevenueParser:
     """解析收入数据文件（Excel格式）"""
 
-    def parse(self, file_bytes: bytes, format: FileFormat) -> List[CandidateRecord]:
-        """解析文件并返回候选记录列表"""
+    def parse(self, file_bytes: Union[bytes, Path], format: FileFormat) -> List[CandidateRecord]:
+        """解析文件并返回候选记录列表
+
+        传入路径时直接从打开的文件读取（openpyxl 按需读取 zip 成员），而不是先把整个文件复制为 bytes。
+        """
+        if isinstance(file_bytes, Path):
+            with open(file_bytes, "rb") as f:
+                return self._parse_source(f, format)
+        return self._parse_source(file_bytes, format)
+
+    def _parse_source(self, file_bytes: Union[bytes, BinaryIO], format: FileFormat) -> List[CandidateRecord]:
         if format == FileFormat.EXCEL:
             return self._parse_excel(file_bytes)
         elif format == FileFormat.CSV:
@@ -25,17 +34,18 @@ class RevenueParser:
         else:
             raise ValueError(f"Unsupported file format: {format}")
 
-    def _parse_excel(self, file_bytes: bytes) -> List[CandidateRecord]:
+    def _parse_excel(self, file_bytes: Union[bytes, BinaryIO]) -> List[CandidateRecord]:
         """解析Excel文件，读取'总收入' sheet"""
         try:
             # 读取Excel文件
-            excel_file = io.BytesIO(file_bytes)
+            excel_file = _as_file(file_bytes)
             
             # 尝试读取"总收入"sheet
             try:
                 df = pd.read_excel(excel_file, sheet_name="总收入", engine="openpyxl")
             except ValueError:
                 # 如果"总收入"sheet不存在，尝试读取第一个sheet
+                excel_file.seek(0)
                 df = pd.read_excel(excel_file, sheet_name=0, engine="openpyxl")
             
             # 清理数据：删除空行
@@ -214,22 +224,23 @@ class RevenueParser:
         except Exception as e:
             raise ValueError(f"Failed to parse Excel file: {e}") from e
 
-    def _parse_csv(self, file_bytes: bytes) -> List[CandidateRecord]:
+    def _parse_csv(self, file_bytes: Union[bytes, BinaryIO]) -> List[CandidateRecord]:
         """解析CSV文件"""
         try:
-            df = pd.read_csv(io.BytesIO(file_bytes), encoding="utf-8-sig")
+            df = pd.read_csv(_as_file(file_bytes), encoding="utf-8-sig")
             # CSV格式与Excel类似，可以复用解析逻辑
             # 这里简化处理，实际可以根据CSV格式调整
             return self._parse_dataframe(df)
         except Exception as e:
             raise ValueError(f"Failed to parse CSV file: {e}") from e
 
-    def _parse_json(self, file_bytes: bytes) -> List[CandidateRecord]:
+    def _parse_json(self, file_bytes: Union[bytes, BinaryIO]) -> List[CandidateRecord]:
         """解析JSON文件"""
         import json
         
         try:
-            data = json.loads(file_bytes.decode("utf-8"))
+            raw = file_bytes if isinstance(file_bytes, bytes) else file_bytes.read()
+            data = json.loads(raw.decode("utf-8"))
             records: List[CandidateRecord] = []
             
             # 假设JSON是数组格式
@@ -256,3 +267,9 @@ class RevenueParser:
         # 实现类似_excel的逻辑
         return records
 
+
+def _as_file(source: Union[bytes, BinaryIO]) -> BinaryIO:
+    """bytes 包装为 BytesIO；文件对象直接使用。"""
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import uuid
 from pathlib import Path
-from typing import Protocol
+from typing import AsyncIterator, Protocol
+
+import aiofiles
+import aiofiles.os
 
 from app.core.config import get_settings
 
@@ -10,6 +14,9 @@ class StorageAdapter(Protocol):
     async def save(self, filename: str, data: bytes) -> str:
         ...
 
+    async def save_stream(self, filename: str, chunks: AsyncIterator[bytes]) -> str:
+        ...
+
     async def read(self, path: str) -> bytes:
         ...
 
@@ -20,13 +27,35 @@ class LocalStorageAdapter:
         self._base_path.mkdir(parents=True, exist_ok=True)
 
     async def save(self, filename: str, data: bytes) -> str:
-        target = self._base_path / filename
-        target.write_bytes(data)
+        async def _single() -> AsyncIterator[bytes]:
+            yield data
+
+        return await self.save_stream(filename, _single())
+
+    async def save_stream(self, filename: str, chunks: AsyncIterator[bytes]) -> str:
+        """逐块写入文件，内存占用与文件大小无关。
+
+        先写入同目录下的唯一临时文件，写完再原子地重命名为目标文件：并发写入同一文件名时不会交错，
+        读取方也不会看到写了一半的文件。
+        """
+        target = self._base_path / Path(filename).name
+        temp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            async with aiofiles.open(temp, "wb") as f:
+                async for chunk in chunks:
+                    await f.write(chunk)
+            await aiofiles.os.replace(temp, target)
+        except BaseException:
+            try:
+                await aiofiles.os.remove(temp)
+            except FileNotFoundError:
+                pass
+            raise
         return str(target)
 
     async def read(self, path: str) -> bytes:
-        target = Path(path)
-        return target.read_bytes()
+        async with aiofiles.open(path, "rb") as f:
+            return await f.read()
 
 
 class StorageFactory:
@@ -25,9 +25,8 @@ def process_prompt(job_id: str, prompt: str, attachment_paths: Sequence[str] | N
         parser = AIParserService(client)
         storage = StorageFactory.create()
 
-        attachments = []
-        for path in attachment_paths or []:
-            attachments.append(await storage.read(path))
+        # 附件并发读取，互不等待
+        attachments = list(await asyncio.gather(*(storage.read(path) for path in attachment_paths or [])))
 
         preview = await parser.parse_prompt(prompt, attachments)
 
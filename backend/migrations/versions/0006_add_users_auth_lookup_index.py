@@ -0,0 +1,44 @@
+"""add covering index for auth user lookup
+
+Revision ID: 0006_add_users_auth_lookup_index
+Revises: 0005_add_user_auth
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006_add_users_auth_lookup_index"
+down_revision = "0005_add_user_auth"
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = "ix_users_id_active_role"
+INCLUDED_COLUMNS = ["is_active", "role", "email", "display_name"]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_indexes = {index["name"] for index in inspector.get_indexes("users")}
+    if INDEX_NAME in existing_indexes:
+        return
+
+    if bind.dialect.name == "postgresql":
+        # 认证查询只读取这些列，INCLUDE 后可走 index-only scan
+        op.create_index(INDEX_NAME, "users", ["id"], postgresql_include=INCLUDED_COLUMNS)
+    else:
+        op.create_index(INDEX_NAME, "users", ["id", "is_active", "role"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_indexes = {index["name"] for index in inspector.get_indexes("users")}
+    if INDEX_NAME in existing_indexes:
+        op.drop_index(INDEX_NAME, table_name="users")
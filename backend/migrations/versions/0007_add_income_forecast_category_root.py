@@ -0,0 +1,66 @@
+"""add category_root column to income forecasts
+
+Revision ID: 0007_add_income_forecast_category_root
+Revises: 0006_add_users_auth_lookup_index
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007_add_income_forecast_category_root"
+down_revision = "0006_add_users_auth_lookup_index"
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = "ix_income_forecasts_category_root"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing_columns = {column["name"] for column in inspector.get_columns("income_forecasts")}
+    if "category_root" not in existing_columns:
+        with op.batch_alter_table("income_forecasts", recreate="auto") as batch_op:
+            batch_op.add_column(sa.Column("category_root", sa.String(length=128), nullable=True))
+
+    # 回填一级分类
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "UPDATE income_forecasts SET category_root = NULLIF(split_part(category_path_text, '/', 1), '') "
+            "WHERE category_path_text IS NOT NULL"
+        )
+    else:
+        forecasts = sa.table(
+            "income_forecasts",
+            sa.column("id", sa.String),
+            sa.column("category_path_text", sa.String),
+            sa.column("category_root", sa.String),
+        )
+        rows = bind.execute(
+            sa.select(forecasts.c.id, forecasts.c.category_path_text).where(
+                forecasts.c.category_path_text.is_not(None)
+            )
+        ).all()
+        for row in rows:
+            bind.execute(
+                forecasts.update()
+                .where(forecasts.c.id == row.id)
+                .values(category_root=row.category_path_text.split("/", 1)[0] or None)
+            )
+
+    inspector = sa.inspect(bind)
+    existing_indexes = {index["name"] for index in inspector.get_indexes("income_forecasts")}
+    if INDEX_NAME not in existing_indexes:
+        op.create_index(INDEX_NAME, "income_forecasts", ["category_root"])
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name="income_forecasts")
+    with op.batch_alter_table("income_forecasts", recreate="auto") as batch_op:
+        batch_op.drop_column("category_root")
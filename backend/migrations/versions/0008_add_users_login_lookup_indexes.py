@@ -0,0 +1,37 @@
+"""add case-insensitive login lookup indexes on users
+
+Revision ID: 0008_add_users_login_lookup_indexes
+Revises: 0007_add_income_forecast_category_root
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0008_add_users_login_lookup_indexes"
+down_revision = "0007_add_income_forecast_category_root"
+branch_labels = None
+depends_on = None
+
+
+# 索引名 -> 被 lower() 的列；display_name 本身不唯一，因此两者都建普通索引
+INDEXES = {
+    "ix_users_email_lower": "email",
+    "ix_users_display_name_lower": "display_name",
+}
+
+
+# 表达式索引无法通过 inspector 反射（SQLite 会直接跳过），因此用 IF [NOT] EXISTS 保证幂等
+
+
+def upgrade() -> None:
+    for index_name, column in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON users (lower({column}))")
+
+
+def downgrade() -> None:
+    for index_name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {index_name}")
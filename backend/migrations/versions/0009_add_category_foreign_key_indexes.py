@@ -0,0 +1,43 @@
+"""add indexes on finance category foreign keys
+
+Revision ID: 0009_add_category_foreign_key_indexes
+Revises: 0008_add_users_login_lookup_indexes
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0009_add_category_foreign_key_indexes"
+down_revision = "0008_add_users_login_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+
+# 分类树按 parent_id 取子节点；预测/支出记录按 category_id 关联分类，删除分类时也需按该列置空
+INDEXES = (
+    ("ix_finance_categories_parent_id", "finance_categories", "parent_id"),
+    ("ix_expense_records_category_id", "expense_records", "category_id"),
+    ("ix_income_forecasts_category_id", "income_forecasts", "category_id"),
+    ("ix_expense_forecasts_category_id", "expense_forecasts", "category_id"),
+)
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for index_name, table_name, column_name in INDEXES:
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table_name)}
+        if index_name not in existing_indexes:
+            op.create_index(index_name, table_name, [column_name])
+
+
+def downgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    for index_name, table_name, _column_name in INDEXES:
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table_name)}
+        if index_name in existing_indexes:
+            op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,48 @@
+"""make the expense forecast company/date index covering
+
+Revision ID: 0010_add_expense_forecast_company_date_index
+Revises: 0009_add_category_foreign_key_indexes
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010_add_expense_forecast_company_date_index"
+down_revision = "0009_add_category_foreign_key_indexes"
+branch_labels = None
+depends_on = None
+
+
+# 0004 已创建同名的 (company_id, cash_out_date) 普通索引
+INDEX_NAME = "ix_expense_forecasts_company_date"
+INDEX_COLUMNS = ["company_id", "cash_out_date"]
+INCLUDED_COLUMNS = ["expected_amount", "category_id"]
+
+
+def _existing_indexes() -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("expense_forecasts")}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # 汇总查询只读取这些列，重建为带 INCLUDE 的覆盖索引后可走 index-only scan
+        if INDEX_NAME in _existing_indexes():
+            op.drop_index(INDEX_NAME, table_name="expense_forecasts")
+        op.create_index(INDEX_NAME, "expense_forecasts", INDEX_COLUMNS, postgresql_include=INCLUDED_COLUMNS)
+    elif INDEX_NAME not in _existing_indexes():
+        op.create_index(INDEX_NAME, "expense_forecasts", INDEX_COLUMNS)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        # 其他数据库上索引归 0004 所有，保持不变
+        return
+    if INDEX_NAME in _existing_indexes():
+        op.drop_index(INDEX_NAME, table_name="expense_forecasts")
+    op.create_index(INDEX_NAME, "expense_forecasts", INDEX_COLUMNS)
@@ -0,0 +1,70 @@
+"""store enum columns as their lowercase values
+
+Revision ID: 0011_store_enum_values
+Revises: 0010_add_expense_forecast_company_date_index
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0011_store_enum_values"
+down_revision = "0010_add_expense_forecast_company_date_index"
+branch_labels = None
+depends_on = None
+
+
+# 迁移建立的都是字符串列（默认值为小写枚举值），此前模型按枚举名（大写）写入；
+# 所有枚举的值都等于名称的小写形式，统一转换为值
+ENUM_COLUMNS = (
+    ("finance_categories", "category_type"),
+    ("users", "role"),
+    ("import_jobs", "source_type"),
+    ("import_jobs", "status"),
+    ("income_forecasts", "certainty"),
+    ("expense_forecasts", "certainty"),
+    ("nlq_queries", "chart_type"),
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # 0004 在 PostgreSQL 上为 expense_forecasts.certainty 建了原生 ENUM，改为与其他枚举列一致的 VARCHAR
+        op.execute("ALTER TABLE expense_forecasts ALTER COLUMN certainty DROP DEFAULT")
+        op.execute("ALTER TABLE expense_forecasts ALTER COLUMN certainty TYPE VARCHAR(16) USING certainty::text")
+        op.execute("ALTER TABLE expense_forecasts ALTER COLUMN certainty SET DEFAULT 'certain'")
+        op.execute("DROP TYPE IF EXISTS certainty")
+
+    for table_name, column_name in ENUM_COLUMNS:
+        column = sa.column(column_name, sa.String)
+        op.execute(
+            sa.table(table_name, column)
+            .update()
+            .where(column != sa.func.lower(column))
+            .values({column_name: sa.func.lower(column)})
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    for table_name, column_name in ENUM_COLUMNS:
+        if bind.dialect.name == "postgresql" and table_name == "expense_forecasts":
+            continue
+        column = sa.column(column_name, sa.String)
+        op.execute(
+            sa.table(table_name, column)
+            .update()
+            .where(column != sa.func.upper(column))
+            .values({column_name: sa.func.upper(column)})
+        )
+
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE TYPE certainty AS ENUM ('certain', 'uncertain')")
+        op.execute("ALTER TABLE expense_forecasts ALTER COLUMN certainty DROP DEFAULT")
+        op.execute("ALTER TABLE expense_forecasts ALTER COLUMN certainty TYPE certainty USING certainty::certainty")
+        op.execute("ALTER TABLE expense_forecasts ALTER COLUMN certainty SET DEFAULT 'certain'")
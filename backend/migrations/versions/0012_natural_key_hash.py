@@ -0,0 +1,118 @@
+"""replace wide natural-key unique indexes with a 16-byte hash
+
+Revision ID: 0012_natural_key_hash
+Revises: 0011_store_enum_values
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+import hashlib
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0012_natural_key_hash"
+down_revision = "0011_store_enum_values"
+branch_labels = None
+depends_on = None
+
+
+# (表名, 日期列, 金额列, 原六列唯一索引名, 新摘要唯一索引名)
+TABLES = (
+    ("revenue_details", "occurred_on", "amount", "uq_revenue_detail_natural_key", "uq_revenue_detail_natural_key_hash"),
+    (
+        "income_forecasts",
+        "cash_in_date",
+        "expected_amount",
+        "uq_income_forecast_natural_key",
+        "uq_income_forecast_natural_key_hash",
+    ),
+)
+BATCH_SIZE = 1000
+_CENT = Decimal("0.01")
+
+
+def _natural_key_hash(company_id, on_date, amount, category_id, description, account_name) -> bytes | None:
+    """与 app.models.financial.natural_key_hash 保持一致（迁移不依赖应用代码）"""
+    parts = (company_id, on_date, amount, category_id, description, account_name)
+    if any(part is None for part in parts):
+        return None
+    amount_text = str(Decimal(str(amount)).quantize(_CENT))
+    raw = "\x1f".join((company_id, on_date.isoformat(), amount_text, category_id, description, account_name))
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+
+def _backfill(table_name: str, date_column: str, amount_column: str) -> None:
+    bind = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.String),
+        sa.column("company_id", sa.String),
+        sa.column(date_column, sa.Date),
+        sa.column(amount_column, sa.Numeric(18, 2)),
+        sa.column("category_id", sa.String),
+        sa.column("description", sa.String),
+        sa.column("account_name", sa.String),
+        sa.column("natural_key_hash", sa.LargeBinary),
+    )
+    # 只有各部分齐全的记录才有摘要，其余保持 NULL
+    rows = bind.execute(
+        sa.select(
+            table.c.id,
+            table.c.company_id,
+            table.c[date_column],
+            table.c[amount_column],
+            table.c.category_id,
+            table.c.description,
+            table.c.account_name,
+        ).where(
+            table.c.category_id.is_not(None),
+            table.c.description.is_not(None),
+            table.c.account_name.is_not(None),
+        )
+    ).all()
+    updates = [{"row_id": row[0], "key_hash": _natural_key_hash(*row[1:])} for row in rows]
+    stmt = (
+        table.update()
+        .where(table.c.id == sa.bindparam("row_id"))
+        .values(natural_key_hash=sa.bindparam("key_hash"))
+    )
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(stmt, updates[start:start + BATCH_SIZE])
+
+
+def _drop_unique(table_name: str, name: str) -> None:
+    """唯一性在不同部署中可能是唯一索引（由迁移创建）或表级唯一约束（建表时随表创建）"""
+    inspector = sa.inspect(op.get_bind())
+    if name in {index["name"] for index in inspector.get_indexes(table_name)}:
+        op.drop_index(name, table_name=table_name)
+    elif name in {constraint["name"] for constraint in inspector.get_unique_constraints(table_name)}:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_constraint(name, type_="unique")
+
+
+def upgrade() -> None:
+    for table_name, date_column, amount_column, old_name, new_name in TABLES:
+        existing_columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table_name)}
+        if "natural_key_hash" not in existing_columns:
+            op.add_column(table_name, sa.Column("natural_key_hash", sa.LargeBinary(length=16), nullable=True))
+        _backfill(table_name, date_column, amount_column)
+        _drop_unique(table_name, old_name)
+        op.create_index(new_name, table_name, ["natural_key_hash"], unique=True)
+
+
+def downgrade() -> None:
+    for table_name, date_column, amount_column, old_name, new_name in TABLES:
+        _drop_unique(table_name, new_name)
+        op.create_index(
+            old_name,
+            table_name,
+            ["company_id", date_column, amount_column, "category_id", "description", "account_name"],
+            unique=True,
+        )
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("natural_key_hash")
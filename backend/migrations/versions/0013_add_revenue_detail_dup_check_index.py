@@ -0,0 +1,44 @@
+"""widen the revenue details company/date index for duplicate checks
+
+Revision ID: 0013_add_revenue_detail_dup_check_index
+Revises: 0012_natural_key_hash
+Create Date: 2026-10-15
+"""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0013_add_revenue_detail_dup_check_index"
+down_revision = "0012_natural_key_hash"
+branch_labels = None
+depends_on = None
+
+
+# 0002 创建的 (company_id, occurred_on) 索引是新索引的前缀，由新索引取代
+OLD_INDEX = ("ix_revenue_details_company_occurred", ["company_id", "occurred_on"])
+NEW_INDEX = ("ix_revenue_details_company_occurred_amount", ["company_id", "occurred_on", "amount", "category_id"])
+
+
+def _existing_indexes() -> set[str]:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("revenue_details")}
+
+
+def upgrade() -> None:
+    existing = _existing_indexes()
+    if NEW_INDEX[0] not in existing:
+        op.create_index(NEW_INDEX[0], "revenue_details", NEW_INDEX[1])
+    if OLD_INDEX[0] in existing:
+        op.drop_index(OLD_INDEX[0], table_name="revenue_details")
+
+
+def downgrade() -> None:
+    existing = _existing_indexes()
+    if OLD_INDEX[0] not in existing:
+        op.create_index(OLD_INDEX[0], "revenue_details", OLD_INDEX[1])
+    if NEW_INDEX[0] in existing:
+        op.drop_index(NEW_INDEX[0], table_name="revenue_details")
@@ -13,10 +13,16 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from app import db
-from app.api.deps import get_ai_parser, get_import_job_repository, get_storage_adapter
+from app.api.deps import (
+    CurrentUser,
+    get_ai_parser,
+    get_current_user,
+    get_import_job_repository,
+    get_storage_adapter,
+)
 from app.main import create_app
 from app.models.base import Base
-from app.models.financial import Company, RevenueDetail, IncomeForecast, ExpenseForecast
+from app.models.financial import Company, RevenueDetail, IncomeForecast, ExpenseForecast, UserRole
 from app.repositories.import_jobs import ImportJobRepository
 from app.schemas.imports import CandidateRecord, RecordType
 
@@ -88,9 +94,19 @@ def client_fixture(tmp_path) -> TestClient:
         finally:
             session.close()
 
+    async def override_user() -> CurrentUser:
+        return CurrentUser(
+            id="test-admin",
+            email="admin@example.com",
+            display_name="测试管理员",
+            role=UserRole.ADMIN,
+            is_active=True,
+        )
+
     app.dependency_overrides[get_ai_parser] = override_parser
     app.dependency_overrides[get_storage_adapter] = override_storage
     app.dependency_overrides[get_import_job_repository] = override_repo
+    app.dependency_overrides[get_current_user] = override_user
 
     with TestClient(app) as test_client:
         yield test_client
@@ -240,6 +256,53 @@ def test_confirm_revenue_requires_overwrite(client: TestClient) -> None:
         assert float(records[0].amount) == 999999.0
 
 
+def test_confirm_identical_revenue_returns_conflict(client: TestClient) -> None:
+    company_id = str(uuid.uuid4())
+    with db.session_scope() as session:
+        session.add(
+            Company(
+                id=company_id,
+                name="Same Revenue Co",
+                display_name="相同收入公司",
+                currency="CNY",
+            )
+        )
+
+    def parse_and_confirm() -> Any:
+        response = client.post(
+            "/api/v1/parse/upload",
+            data={"prompt": "收入情况", "company_id": company_id},
+        )
+        assert response.status_code == 202
+        job_payload = response.json()
+        preview_record = job_payload["preview"][0]
+        return client.post(
+            f"/api/v1/import-jobs/{job_payload['jobId']}/confirm",
+            json={
+                "actions": [
+                    {
+                        "recordType": preview_record["recordType"],
+                        "operation": "approve",
+                        "payload": preview_record["payload"],
+                    }
+                ]
+            },
+        )
+
+    assert parse_and_confirm().status_code == 200
+
+    # 同一笔收入（公司、日期、金额、分类、描述、账户均相同）再次导入，未允许覆盖时应返回 409
+    conflict_response = parse_and_confirm()
+    assert conflict_response.status_code == 409
+    detail = conflict_response.json()["detail"]
+    assert detail["message"] == "duplicate_record"
+    assert detail["recordType"] == "revenue"
+    assert detail["conflict"]["amount"] == 123456.78
+
+    with db.session_scope() as session:
+        assert session.query(RevenueDetail).filter_by(company_id=company_id).count() == 1
+
+
 def test_income_forecast_full_replace(client: TestClient) -> None:
     company_id = str(uuid.uuid4())
     with db.session_scope() as session:
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+from app.models.base import Base
+from app.models.financial import (
+    Certainty,
+    Company,
+    ImportJob,
+    ImportSource,
+    IncomeForecast,
+    RevenueDetail,
+    natural_key_hash,
+)
+
+
+def _load_migration(filename: str):
+    path = ROOT_DIR / "migrations" / "versions" / filename
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_migration = _load_migration("0012_natural_key_hash.py")
+
+KEY = ("company-a", date(2025, 3, 1), "category-a", "服务费", "基本户")
+
+
+@pytest.fixture(name="session")
+def session_fixture() -> Iterator[Session]:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(Company(id="company-a", name="A Co", display_name="A 公司", currency="CNY"))
+        session.add(ImportJob(id="job-a", source_type=ImportSource.MANUAL_UPLOAD))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _hash(amount) -> bytes | None:
+    company_id, on_date, category_id, description, account_name = KEY
+    return natural_key_hash(company_id, on_date, amount, category_id, description, account_name)
+
+
+def _revenue(amount, description: str = "服务费") -> RevenueDetail:
+    company_id, on_date, category_id, _description, account_name = KEY
+    return RevenueDetail(
+        company_id=company_id,
+        import_job_id="job-a",
+        category_id=category_id,
+        occurred_on=on_date,
+        amount=amount,
+        description=description,
+        account_name=account_name,
+    )
+
+
+def test_hash_normalises_amount_to_column_precision() -> None:
+    digests = {_hash(10), _hash(10.0), _hash(Decimal("10.00")), _hash("10")}
+    assert len(digests) == 1
+    assert _hash(10.01) not in digests
+    assert len(_hash(10)) == 16
+
+
+def test_hash_is_none_when_key_is_incomplete() -> None:
+    assert natural_key_hash("company-a", date(2025, 3, 1), 10, None, "服务费", "基本户") is None
+
+
+@pytest.mark.parametrize("amount", [10, 10.0, Decimal("10.00"), 1234567.891, Decimal("-0.5")])
+def test_migration_backfill_matches_model_hash(amount) -> None:
+    company_id, on_date, category_id, description, account_name = KEY
+    assert _migration._natural_key_hash(
+        company_id, on_date, amount, category_id, description, account_name
+    ) == _hash(amount)
+
+
+def test_orm_insert_rejects_duplicate(session: Session) -> None:
+    session.add(_revenue(10))
+    session.commit()
+
+    session.add(_revenue(Decimal("10.00")))
+    with pytest.raises(IntegrityError):
+        session.commit()
+
+
+def test_core_insert_fills_hash_and_rejects_duplicate(session: Session) -> None:
+    company_id, on_date, category_id, description, account_name = KEY
+    row = {
+        "company_id": company_id,
+        "import_job_id": "job-a",
+        "category_id": category_id,
+        "cash_in_date": on_date,
+        "certainty": Certainty.CERTAIN,
+        "description": description,
+        "account_name": account_name,
+    }
+    session.execute(insert(IncomeForecast.__table__), [{**row, "id": "forecast-1", "expected_amount": 10}])
+    session.commit()
+    assert session.scalar(select(IncomeForecast.natural_key_hash)) == _hash(10)
+
+    with pytest.raises(IntegrityError):
+        session.execute(
+            insert(IncomeForecast.__table__),
+            [{**row, "id": "forecast-2", "expected_amount": Decimal("10.00")}],
+        )
+
+
+def test_orm_update_recomputes_hash(session: Session) -> None:
+    first = _revenue(10)
+    second = _revenue(10, description="咨询费")
+    session.add_all([first, second])
+    session.commit()
+    assert second.natural_key_hash != first.natural_key_hash
+
+    second.description = "服务费"
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.rollback()
+
+    # 回滚后 description 恢复为“咨询费”，只修改金额
+    second.amount = 20
+    session.commit()
+    company_id, on_date, category_id, _description, account_name = KEY
+    assert second.natural_key_hash == natural_key_hash(company_id, on_date, 20, category_id, "咨询费", account_name)